@@ -1,12 +1,68 @@
 import datetime
 from django import forms
+from django.core.paginator import Paginator
+from django.db import connections, models
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from .cache import invalidate_advertisements
 from .models import User, DriverProfile, Cargo, CargoReview, Advertisement, ContactMessage
 
+
+def estimate_count(queryset):
+    """
+    Jadvaldagi qatorlar sonini COUNT(*) siz taxmin qiladi: PostgreSQL da statistika
+    (pg_class.reltuples), SQLite da butun sonli PK oralig'i (indeksdan ikki qidiruv).
+    Taxmin qilib bo'lmasa None.
+    """
+    connection = connections[queryset.db]
+    opts = queryset.model._meta
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [opts.db_table])
+        elif connection.vendor == 'sqlite' and isinstance(opts.pk, models.AutoField):
+            table, pk = connection.ops.quote_name(opts.db_table), connection.ops.quote_name(opts.pk.column)
+            cursor.execute(
+                'SELECT (SELECT MAX({pk}) FROM {table}) - (SELECT MIN({pk}) FROM {table}) + 1'.format(pk=pk, table=table)
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Katta jadvallar uchun: filtrsiz ro'yxatda aniq COUNT(*) (butun jadval skaneri) o'rniga
+    taxminiy son ishlatiladi. Kichik jadvallar va filtr/qidiruv bilan aniq son hisoblanadi.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, models.QuerySet) and not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Katta jadvallar uchun changelist: taxminiy son va ikkinchi (filtrsiz) COUNT(*) yo'q.
+    FK lar list_select_related va autocomplete_fields bilan beriladi (har bir qator yoki
+    select ichidagi har bir variant uchun so'rov bo'lmasligi uchun).
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 # Custom User uchun Admin
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(BaseUserAdmin, LargeTableAdmin):
     list_display = ('phone_number', 'name', 'email', 'is_staff', 'is_active')
     list_filter = ('is_staff', 'is_active')
     search_fields = ('phone_number', 'name', 'email')
@@ -26,22 +82,28 @@ class UserAdmin(BaseUserAdmin):
     filter_horizontal = ()
 
 # DriverProfile uchun Admin
-class DriverProfileAdmin(admin.ModelAdmin):
+class DriverProfileAdmin(LargeTableAdmin):
     list_display = ('user', 'vehicle_type', 'license_type', 'vehicle_capacity', 'experience')
     list_filter = ('vehicle_type',)
+    list_select_related = ('user',)
     search_fields = ('user__phone_number', 'user__name', 'vehicle_type')
+    autocomplete_fields = ('user',)
 
 # Cargo uchun Admin
-class CargoAdmin(admin.ModelAdmin):
+class CargoAdmin(LargeTableAdmin):
     list_display = ('name', 'customer', 'driver', 'vehicle_type', 'status', 'created_at')
     list_filter = ('vehicle_type', 'status')
+    list_select_related = ('customer', 'driver__user')
     search_fields = ('name', 'customer__phone_number', 'driver__user__phone_number')
     list_editable = ('status',)
+    autocomplete_fields = ('customer', 'driver')
 
 # CargoReview uchun Admin
-class CargoReviewAdmin(admin.ModelAdmin):
+class CargoReviewAdmin(LargeTableAdmin):
     list_display = ('cargo', 'customer', 'comment', 'created_at')
+    list_select_related = ('cargo', 'customer')
     search_fields = ('cargo__name', 'customer__phone_number', 'comment')
+    autocomplete_fields = ('cargo', 'customer')
 
 # Modellarni ro‘yxatdan o‘tkazish
 admin.site.register(User, UserAdmin)
@@ -65,10 +127,10 @@ class AdvertisementAdminForm(forms.ModelForm):
             advertisement.end_date = advertisement.start_date + datetime.timedelta(days=advertisement.duration_days)
         
         if commit:
-            advertisement.save()
+            advertisement.save()  # kesh post_save signali orqali tozalanadi
         return advertisement
 
-class AdvertisementAdmin(admin.ModelAdmin):
+class AdvertisementAdmin(LargeTableAdmin):
     form = AdvertisementAdminForm
     list_display = ('company_name', 'ad_type', 'duration_days', 'phone_number', 'status', 'is_active', 'created_at')
     list_filter = ('status', 'is_active', 'ad_type', 'duration_days')
@@ -88,37 +150,37 @@ class AdvertisementAdmin(admin.ModelAdmin):
     )
     actions = ['approve_advertisements', 'reject_advertisements', 'activate_advertisements', 'deactivate_advertisements']
 
+    # Amallar ommaviy UPDATE bilan: so'rovlar soni tanlangan reklamalar soniga bog'liq emas.
+    # Sanalar flag dan oldin beriladi: "hammasini tanlash" da queryset ro'yxat filtrini qayta
+    # qo'llaydi va UPDATE dan keyin qatorlar undan chiqib ketishi mumkin.
+    # update() post_save signalini chaqirmaydi, shuning uchun kesh qo'lda tozalanadi
     def approve_advertisements(self, request, queryset):
-        for ad in queryset:
-            ad.status = 'Tasdiqlangan'
-            if not ad.start_date and ad.is_active:
-                ad.start_date = timezone.now().date()
-                ad.end_date = ad.start_date + datetime.timedelta(days=ad.duration_days)
-            ad.save()
+        queryset.filter(is_active=True).start_pending(timezone.now().date())
+        queryset.update(status='Tasdiqlangan', updated_at=timezone.now())
+        invalidate_advertisements()
     approve_advertisements.short_description = "Tanlangan reklamalarni tasdiqlash"
 
     def reject_advertisements(self, request, queryset):
-        queryset.update(status='Rad etilgan')
+        queryset.update(status='Rad etilgan', updated_at=timezone.now())
+        invalidate_advertisements()
     reject_advertisements.short_description = "Tanlangan reklamalarni rad etish"
 
     def activate_advertisements(self, request, queryset):
-        for ad in queryset:
-            ad.is_active = True
-            if ad.status == 'Tasdiqlangan' and not ad.start_date:
-                ad.start_date = timezone.now().date()
-                ad.end_date = ad.start_date + datetime.timedelta(days=ad.duration_days)
-            ad.save()
+        queryset.filter(status='Tasdiqlangan').start_pending(timezone.now().date())
+        queryset.update(is_active=True, updated_at=timezone.now())
+        invalidate_advertisements()
     activate_advertisements.short_description = "Tanlangan reklamalarni faollashtirish"
 
     def deactivate_advertisements(self, request, queryset):
-        queryset.update(is_active=False)
+        queryset.update(is_active=False, updated_at=timezone.now())
+        invalidate_advertisements()
     deactivate_advertisements.short_description = "Tanlangan reklamalarni faolsizlashtirish"
 
 # Modellarni ro'yxatdan o'tkazish
 admin.site.register(Advertisement, AdvertisementAdmin)
 
 
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(LargeTableAdmin):
     list_display = ('name', 'email', 'phone_number', 'subject', 'status', 'created_at')  # Ko‘rinadigan ustunlar
     list_filter = ('status',)  # Status bo‘yicha filtr
     search_fields = ('name', 'email', 'phone_number', 'subject', 'message')  # Qidiruv maydonlari
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from . import metrics, signals
+        post_migrate.connect(signals.ensure_search_index, sender=self)
+        if metrics.get_options().get('ENABLED', True):
+            # Har bir DB ulanishiga SQL o'lchagich (tanlanmagan so'rovda deyarli bepul)
+            connection_created.connect(metrics.install_execute_wrapper, dispatch_uid='api.metrics')
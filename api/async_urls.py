@@ -0,0 +1,18 @@
+from django.urls import path
+from .async_views import (
+    AsyncDriverProfileView, AsyncCargoListView, AsyncCargoDetailView,
+    AsyncActiveAdvertisementsView, AsyncAdvertisementsByTypeView, AsyncCargoExportView, CargoEventStreamView
+)
+
+# ASGI da ko'p o'qiladigan endpointlar async view larga tushadi (yo'llar va nomlar api.urls bilan bir xil).
+# cargos/events/ (SSE) faqat shu yerda: WSGI da uzoq ochiq ulanish worker ni band qilib qo'yadi.
+# Oqimli javoblar (export, media) ham async iterator bilan: sync iterator ASGI da to'liq buferlanadi
+urlpatterns = [
+    path('profile/', AsyncDriverProfileView.as_view(), name='profile'),
+    path('cargos/', AsyncCargoListView.as_view(), name='cargo-list-create'),
+    path('cargos/events/', CargoEventStreamView.as_view(), name='cargo-events'),
+    path('cargos/export/', AsyncCargoExportView.as_view(), name='cargo-export'),
+    path('cargos/<int:pk>/', AsyncCargoDetailView.as_view(), name='cargo-detail'),
+    path('advertisements/', AsyncActiveAdvertisementsView.as_view(), name='active-ads'),
+    path('advertisements/<str:ad_type>/', AsyncAdvertisementsByTypeView.as_view(), name='ads-by-type'),
+]
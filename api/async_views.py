@@ -0,0 +1,255 @@
+"""
+ASGI ostida ishlaydigan async view lar (faqat o'qish yo'llari).
+
+Sync APIView lar ASGI da har bir so'rov uchun sync_to_async orqali thread oladi. Bu yerdagi
+view lar GET/HEAD ni Django async ORM (aget, aiterator, async for) bilan bajaradi; yozish
+metodlari (POST, PUT, DELETE, OPTIONS) o'zgarishsiz `sync_view` ga uzatiladi. URL lar
+api.async_urls da, ular ASGIURLConfMiddleware orqali faqat ASGI so'rovlariga ulanadi.
+Javoblar doim JSON (browsable API faqat sync yo'lda).
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .authentication import CachedTokenAuthentication
+from .cache import acached_advertisements
+from .conditional import (CARGO_VALIDATOR_FIELDS, PROFILE_VALIDATOR_FIELDS, is_conditional, make_etag,
+                          not_modified, set_validators, validator_row)
+from .events import bus, format_sse
+from .models import Advertisement, Cargo, DriverProfile
+from .serializers import AdvertisementSerializer, CargoSerializer, DriverProfileSerializer
+from .views import (
+    ActiveAdvertisementsView, AdvertisementsByTypeView, CargoDetailView, CargoExportMixin, CargoExportView,
+    CargoFilterMixin, CargoListCreateView, DriverProfileView, advertisements_response, get_cargo_representation,
+)
+
+
+class AsyncAPIView(View):
+    authentication_class = CachedTokenAuthentication
+    authentication_required = True
+    sync_view = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # APIView kabi: token bilan ishlaydigan API da CSRF tekshiruvi kerak emas
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') and self.sync_view is not None:
+            return await sync_to_async(self.sync_view.as_view())(request, *args, **kwargs)
+        try:
+            await self.authenticate(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    async def authenticate(self, request):
+        self.user = None
+        result = await self.authentication_class().aauthenticate(request)
+        if result is not None:
+            self.user = result[0]
+        elif self.authentication_required:
+            raise exceptions.NotAuthenticated()
+
+    def handle_exception(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+            response['WWW-Authenticate'] = self.authentication_class.keyword
+        return response
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+class AsyncDriverProfileView(AsyncAPIView):
+    sync_view = DriverProfileView
+
+    async def get(self, request):
+        if is_conditional(request):
+            row = await DriverProfile.objects.filter(user=self.user).values_list(*PROFILE_VALIDATOR_FIELDS).aget()
+            response = not_modified(request, make_etag(row, 'json'))
+            if response is not None:
+                return response
+        profile = await DriverProfile.objects.select_related('user').aget(user=self.user)
+        etag = make_etag(validator_row(profile, PROFILE_VALIDATOR_FIELDS), 'json')
+        return set_validators(self.render(DriverProfileSerializer(profile).data), etag)
+
+
+class AsyncCargoListView(CargoFilterMixin, AsyncAPIView):
+    sync_view = CargoListCreateView
+    pagination_class = CargoListCreateView.pagination_class
+
+    async def get(self, request):
+        # Filtr backend lari va paginatsiya DRF Request (query_params) bilan ishlaydi; ular bazaga murojaat qilmaydi
+        self.request = request = Request(request)
+        representation = get_cargo_representation(request)
+        paginator = self.pagination_class()
+        ordering = paginator.get_ordering(request, Cargo.objects.all(), self)
+        cargos = self.filter_queryset(Cargo.objects.with_related(ordering=ordering, **representation))
+        cargos = await paginator.apaginate_queryset(cargos, request, view=self)
+        serializer = CargoSerializer(cargos, many=True, **representation)
+        return self.render(paginator.get_paginated_response(serializer.data).data)
+
+
+class AsyncCargoDetailView(AsyncAPIView):
+    sync_view = CargoDetailView
+
+    async def get(self, request, pk):
+        representation = get_cargo_representation(Request(request))
+        row = None
+        if representation or is_conditional(request):
+            row = await Cargo.objects.filter(pk=pk).values_list(*CARGO_VALIDATOR_FIELDS).afirst()
+            if row is None:
+                raise exceptions.NotFound()
+            response = not_modified(request, *CargoDetailView.get_validators(row, representation, 'json'))
+            if response is not None:
+                return response
+        try:
+            cargo = await Cargo.objects.with_related(**representation).aget(pk=pk)
+        except Cargo.DoesNotExist:
+            raise exceptions.NotFound()
+        if row is None:
+            row = validator_row(cargo, CARGO_VALIDATOR_FIELDS)
+        response = self.render(CargoSerializer(cargo, **representation).data)
+        return set_validators(response, *CargoDetailView.get_validators(row, representation, 'json'))
+
+
+class AsyncCargoExportView(CargoExportMixin, AsyncAPIView):
+    """
+    CargoExportView ning ASGI varianti. Sync iterator ASGI da StreamingHttpResponse tomonidan
+    to'liq ro'yxatga yig'ilib keyin yuborilardi; bu yerda qatorlar aiterator() bilan bo'laklab
+    o'qiladi va har bo'lak darhol yuboriladi.
+    """
+    sync_view = CargoExportView
+
+    async def get(self, request):
+        self.request = request = Request(request)
+        renderer, _ = DefaultContentNegotiation().select_renderer(
+            request, [renderer() for renderer in self.renderer_classes]
+        )
+        # Oddiy values_list() iterable i so'rovni __iter__ da bajaradi va aiterator() uni event loop da
+        # chaqirardi (SynchronousOnlyOperation); named=True da __iter__ generator - so'rov thread da
+        rows = self.get_rows(named=True).aiterator(chunk_size=self.chunk_size)
+        return self.export_response(renderer, renderer.aiter_render(self.get_header(), rows))
+
+
+async def arender_advertisements(current_date, **filters):
+    advertisements = Advertisement.objects.active(current_date).filter(**filters)
+    serializer = AdvertisementSerializer([ad async for ad in advertisements.aiterator()], many=True)
+    return JSONRenderer().render(serializer.data)
+
+
+class AsyncActiveAdvertisementsView(AsyncAPIView):
+    authentication_required = False
+    sync_view = ActiveAdvertisementsView
+
+    async def get(self, request):
+        current_date = timezone.now().date()
+        content, etag = await acached_advertisements(
+            None, current_date, lambda: arender_advertisements(current_date)
+        )
+        return advertisements_response(request, content, etag)
+
+
+class AsyncAdvertisementsByTypeView(AsyncAPIView):
+    authentication_required = False
+    sync_view = AdvertisementsByTypeView
+
+    async def get(self, request, ad_type):
+        current_date = timezone.now().date()
+        content, etag = await acached_advertisements(
+            ad_type, current_date, lambda: arender_advertisements(current_date, ad_type=ad_type)
+        )
+        return advertisements_response(request, content, etag)
+
+
+class CargoEventStreamView(AsyncAPIView):
+    """
+    Yuk hodisalari (created, claimed, status_changed, deleted) Server-Sent Events oqimi.
+
+    Filtrlar: ?cargo=<id>, ?customer=<id>, ?vehicle_type=<tur>. Uzilgandan keyin EventSource
+    Last-Event-ID sarlavhasini yuboradi va oqim shu hodisadan keyingisidan davom etadi (birinchi
+    ulanishda ?last_event_id= bilan berish mumkin). EventSource sarlavha qo'sha olmagani uchun
+    token ?token= orqali ham qabul qilinadi. Faqat ASGI da ishlaydi.
+    """
+    heartbeat_interval = 15
+    retry_ms = 3000
+    filter_params = (
+        ('cargo', 'cargo_id', int),
+        ('customer', 'customer_id', int),
+        ('vehicle_type', 'vehicle_type', str),
+    )
+
+    async def authenticate(self, request):
+        key = request.GET.get('token')
+        if key and 'HTTP_AUTHORIZATION' not in request.META:
+            self.user = (await self.authentication_class().aauthenticate_credentials(key))[0]
+            return
+        await super().authenticate(request)
+
+    def get_filters(self, request):
+        filters = {}
+        for param, field, convert in self.filter_params:
+            value = request.GET.get(param)
+            if value:
+                try:
+                    filters[field] = convert(value)
+                except ValueError:
+                    raise exceptions.ValidationError({param: ["Butun son kutilgan."]})
+        return filters
+
+    def get_last_event_id(self, request):
+        value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        if not value:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise exceptions.ValidationError({'last_event_id': ["Butun son kutilgan."]})
+
+    async def get(self, request):
+        filters = self.get_filters(request)
+        last_id = self.get_last_event_id(request)
+        response = StreamingHttpResponse(self.stream(filters, last_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx javobni buferlamasin
+        return response
+
+    async def stream(self, filters, last_id):
+        # Obuna generator ichida: javob tanasi o'qilmasa (HEAD, uzilish) obunachi qolib ketmaydi
+        subscription = await bus.subscribe(**filters)
+        if last_id is None:
+            last_id = bus.last_id
+        try:
+            yield 'retry: %d\n\n' % self.retry_ms
+            replay = True
+            while True:
+                if replay or subscription.lagged:
+                    # Tarix (Last-Event-ID dan keyin) yoki navbat to'lib qolganda: bazadan yetib olish
+                    replay = subscription.lagged = False
+                    events = await bus.fetch(last_id, **filters)
+                    while events:
+                        for event in events:
+                            yield format_sse(event)
+                        last_id = events[-1].sequence
+                        events = await bus.fetch(last_id, **filters)
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                if event.sequence > last_id:
+                    last_id = event.sequence
+                    yield format_sse(event)
+        finally:
+            bus.unsubscribe(subscription)
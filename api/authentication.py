@@ -0,0 +1,120 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+
+class TokenCache:
+    """
+    Token -> (user, token) uchun chegaralangan LRU kesh, har bir yozuv TTL bilan.
+
+    Kesh jarayon (process) ichida yashaydi: token o'chirilganda yoki foydalanuvchi o'zgarganda
+    signal orqali shu jarayonda darhol tozalanadi, boshqa worker'larda esa TTL tugaganda. Shu sababli
+    TTL qisqa (bir necha soniya): kesh faqat ketma-ket so'rovlar to'lqinida JOIN ni tejaydi.
+    """
+
+    def __init__(self, max_size=10000, ttl=5, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, user, token = entry
+            if expires <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Har bir so'rov o'z nusxasini oladi, keshdagi obyekt o'zgarmaydi
+        return copy.copy(user), token
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, user, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (_, user, _) in self._entries.items() if user.pk == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _cache_settings():
+    options = getattr(settings, 'TOKEN_AUTH_CACHE', {})
+    return options.get('MAX_SIZE', 10000), options.get('TTL', 5)
+
+
+token_cache = TokenCache(*_cache_settings())
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication bilan bir xil, lekin token -> user natijasini xotirada keshlaydi,
+    shuning uchun takroriy so'rovlarda Token + User JOIN so'rovi bajarilmaydi.
+    """
+    cache = token_cache
+
+    def authenticate_credentials(self, key):
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        self.cache.set(key, user, token)
+        return copy.copy(user), token
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() ning async varianti (ASGI view lar uchun). Sarlavha tekshiruvi va xato
+        xabarlari TokenAuthentication bilan bir xil.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header. Token string should not contain invalid characters.')
+            )
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        self.cache.set(key, token.user, token)
+        return copy.copy(token.user), token
@@ -0,0 +1,201 @@
+"""
+Endpoint benchmark i (manage.py benchmark): ssenariylar, benchmark ma'lumotlari va natijalarni solishtirish.
+
+api/urls.py dagi har bir endpoint uchun kamida bitta ssenariy bor. Har bir ssenariy avval
+jarayon ichida (django.test.Client) bir marta bajariladi - SQL so'rovlar soni va Python xotira
+cho'qqisi (tracemalloc) olinadi, keyin alohida jarayondagi server ga berilgan parallellik
+darajalarida yuk beriladi. Bir martalik amallar (yukni band qilish PUT, o'chirish DELETE)
+takroriy yuk bilan o'lchab bo'lmagani uchun ssenariylarda yo'q.
+"""
+import itertools
+import json
+import tracemalloc
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from .loadgen import percentile
+from .models import Cargo, ChangeCounter, DriverProfile, User
+from .seed import Seeder
+
+PASSWORD = 'benchmark'
+CUSTOMER_PHONE = '+998990000001'
+DRIVER_PHONE = '+998990000002'
+BULK_SIZE = 50
+# /cargos/changes/ ?since= oxirgi shuncha versiyadan boshlanadi
+CHANGES_WINDOW = 200
+# p95 farqi shundan kichik bo'lsa (ms) regressiya hisoblanmaydi: o'lchash shovqini
+NOISE_FLOOR_MS = 0.5
+
+
+class Scenario:
+    """Bitta endpoint va metod. `body` - har chaqirilganda yangi JSON tanasi qaytaradigan funksiya."""
+
+    def __init__(self, name, method, url_name, args=(), query='', token=None, body=None):
+        self.name = name
+        self.method = method
+        self.url_name = url_name
+        self.path = reverse(url_name, args=args) + query
+        self.token = token
+        self.body = body
+
+    def headers(self):
+        headers = {}
+        if self.token:
+            headers['Authorization'] = 'Token %s' % self.token
+        if self.body is not None:
+            headers['Content-Type'] = 'application/json'
+        return headers
+
+    def make_body(self):
+        return b'' if self.body is None else json.dumps(self.body()).encode()
+
+
+def configure(path):
+    """Joriy jarayonni benchmark bazasiga o'tkazadi (DEBUG o'chiq, throttling yo'q)."""
+    settings.DEBUG = False
+    settings.TOKEN_BUCKET_THROTTLE = {**getattr(settings, 'TOKEN_BUCKET_THROTTLE', {}), 'RATES': {}}
+    connection.close()
+    connection.settings_dict['NAME'] = str(path)
+
+
+def seed(cargos, progress=None):
+    """Namuna baza: yuklar soniga mutanosib foydalanuvchilar, haydovchilar, xabarlar va reklamalar (api/seed.py)."""
+    Seeder(
+        users=max(cargos // 10, 10), drivers=max(cargos // 30, 3), cargos=cargos, contacts=cargos // 20,
+        advertisements=200, progress=progress,
+    ).run()
+
+
+def _account(phone_number, name):
+    user = User.objects.filter(phone_number=phone_number).first()
+    if user is None:
+        user = User.objects.create_user(
+            phone_number, PASSWORD, name=name, email='%s@bench.example.com' % phone_number.lstrip('+')
+        )
+        DriverProfile.objects.create(user=user)
+    return user, Token.objects.get_or_create(user=user)[0].key
+
+
+def prepare():
+    """Benchmark hisoblari (mijoz va haydovchi), tokenlar va ssenariylar uchun id lar; bor bo'lsa qayta ishlatiladi."""
+    customer, customer_token = _account(CUSTOMER_PHONE, 'Benchmark mijoz')
+    driver, driver_token = _account(DRIVER_PHONE, 'Benchmark haydovchi')
+    DriverProfile.objects.update_or_create(user=driver, defaults={'vehicle_type': 'Tentli', 'vehicle_capacity': 20})
+    cargo = Cargo.objects.filter(customer=customer).order_by('pk').first()
+    if cargo is None:
+        cargo = Cargo.objects.create(customer=customer, name='Benchmark yuk', weight=5, vehicle_type='Tentli')
+    version = ChangeCounter.objects.filter(name=Cargo.VERSION_COUNTER).values_list('value', flat=True).first() or 0
+    return {
+        'customer_token': customer_token,
+        'driver_token': driver_token,
+        'cargo': cargo.pk,
+        'since': max(0, version - CHANGES_WINDOW),
+    }
+
+
+def get_scenarios(data):
+    sequence = itertools.count(1)
+    customer, driver = data['customer_token'], data['driver_token']
+
+    def register():
+        n = next(sequence)
+        return {'name': 'Benchmark %d' % n, 'phone_number': '+99877%07d' % n,
+                'email': 'bench%d@example.com' % n, 'password': PASSWORD}
+
+    def cargo():
+        return {'name': 'Benchmark yuk', 'weight': 12.5, 'origin': 'Toshkent', 'destination': 'Samarqand',
+                'vehicle_type': 'Tentli', 'price': '1500000.00'}
+
+    return [
+        Scenario('register', 'POST', 'register', body=register),
+        Scenario('login', 'POST', 'login', body=lambda: {'phone_number': CUSTOMER_PHONE, 'password': PASSWORD}),
+        Scenario('profile', 'GET', 'profile', token=driver),
+        Scenario('driver-leaderboard', 'GET', 'driver-leaderboard', query='?limit=20', token=customer),
+        Scenario('cargo-list', 'GET', 'cargo-list-create', token=customer),
+        Scenario('cargo-create', 'POST', 'cargo-list-create', token=customer, body=cargo),
+        Scenario('cargo-bulk-create', 'POST', 'cargo-bulk-create', token=customer,
+                 body=lambda: [cargo() for _ in range(BULK_SIZE)]),
+        Scenario('cargo-changes', 'GET', 'cargo-changes', query='?since=%d' % data['since'], token=customer),
+        Scenario('cargo-export', 'GET', 'cargo-export', query='?format=ndjson&status=Yolda&vehicle_type=Tentli',
+                 token=customer),
+        Scenario('cargo-matches', 'GET', 'cargo-matches', token=driver),
+        Scenario('cargo-detail', 'GET', 'cargo-detail', args=[data['cargo']], token=customer),
+        Scenario('review-create', 'POST', 'review-create', token=customer,
+                 body=lambda: {'cargo': data['cargo'], 'comment': 'Benchmark', 'stars': 5}),
+        Scenario('contact', 'POST', 'contact', body=lambda: {
+            'name': 'Benchmark', 'email': 'bench@example.com', 'phone_number': '+998901234567',
+            'subject': 'Savol', 'message': 'Benchmark xabari',
+        }),
+        Scenario('ad-request', 'POST', 'ad-request', body=lambda: {
+            'company_name': 'Benchmark', 'ad_type': 'Native', 'duration_days': 7,
+            'phone_number': '+998901234567', 'description': 'Benchmark reklamasi',
+        }),
+        Scenario('active-ads', 'GET', 'active-ads'),
+        Scenario('ads-by-type', 'GET', 'ads-by-type', args=['Native']),
+    ]
+
+
+def profile(scenario, client=None):
+    """
+    Bitta so'rov (isitilgandan keyin): javob statusi, SQL so'rovlar soni va Python xotira
+    cho'qqisi (KiB). Oqimli javob ham shu o'lchov ichida to'liq o'qiladi.
+    """
+    client = client or Client()
+
+    def request():
+        response = client.generic(
+            scenario.method, scenario.path, scenario.make_body(), content_type='application/json',
+            headers=scenario.headers(),
+        )
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    request()  # isitish: token keshi, reklama keshi va h.k.
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'status': response.status_code, 'queries': len(queries), 'peak_memory_kb': peak // 1024}
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Ikkala natijada bor ssenariy/parallellik juftlari bo'yicha regressiyalar: p95 kechikish
+    `threshold` foizdan (va NOISE_FLOOR_MS dan) ko'proq oshgan yoki SQL so'rovlar soni ko'paygan.
+    """
+    problems = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            problems.append('%s: SQL so\'rovlar %d -> %d' % (name, base['queries'], result['queries']))
+        for level, stats in result['levels'].items():
+            old = base['levels'].get(level)
+            if old is None:
+                continue
+            if (stats['p95_ms'] > old['p95_ms'] * (1 + threshold / 100)
+                    and stats['p95_ms'] - old['p95_ms'] > NOISE_FLOOR_MS):
+                problems.append('%s @%s: p95 %.2f ms -> %.2f ms' % (name, level, old['p95_ms'], stats['p95_ms']))
+    return problems
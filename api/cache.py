@@ -0,0 +1,87 @@
+import datetime
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .conditional import make_etag
+
+ADVERTISEMENTS_VERSION_KEY = 'advertisements:version'
+
+
+def get_advertisement_cache():
+    # Standart holatda LocMemCache; bir nechta worker bo'lsa settings.CACHES da umumiy kesh (Redis, Memcached) beriladi
+    return caches[getattr(settings, 'ADVERTISEMENT_CACHE', 'default')]
+
+
+def _seconds_until_tomorrow(now):
+    tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min, now.tzinfo)
+    return max(int((tomorrow - now).total_seconds()), 1)
+
+
+def _advertisements_version(cache):
+    version = cache.get(ADVERTISEMENTS_VERSION_KEY)
+    if version is None:
+        cache.add(ADVERTISEMENTS_VERSION_KEY, 1, None)
+        version = cache.get(ADVERTISEMENTS_VERSION_KEY, 1)
+    return version
+
+
+async def _aadvertisements_version(cache):
+    version = await cache.aget(ADVERTISEMENTS_VERSION_KEY)
+    if version is None:
+        await cache.aadd(ADVERTISEMENTS_VERSION_KEY, 1, None)
+        version = await cache.aget(ADVERTISEMENTS_VERSION_KEY, 1)
+    return version
+
+
+def _advertisements_key(version, ad_type, current_date):
+    return 'advertisements:%s:%s:%s' % (version, quote(ad_type or '*', safe=''), current_date.isoformat())
+
+
+def cached_advertisements(ad_type, current_date, render):
+    """
+    (ad_type, sana) uchun tayyor JSON baytlari va ularning ETag ini qaytaradi.
+
+    Keshda bo'lmasa render() chaqiriladi va natija kun oxirigacha saqlanadi. Kalitda sana
+    borligi uchun kun almashganda eski yozuvlar o'z-o'zidan ishlatilmay qoladi.
+    """
+    cache = get_advertisement_cache()
+    key = _advertisements_key(_advertisements_version(cache), ad_type, current_date)
+    cached = cache.get(key)
+    if cached is None:
+        content = render()
+        cached = (content, make_etag(content))
+        cache.set(key, cached, _seconds_until_tomorrow(timezone.now()))
+    return cached
+
+
+async def acached_advertisements(ad_type, current_date, arender):
+    """cached_advertisements() ning async varianti; arender korutina funksiyasi."""
+    cache = get_advertisement_cache()
+    key = _advertisements_key(await _aadvertisements_version(cache), ad_type, current_date)
+    cached = await cache.aget(key)
+    if cached is None:
+        content = await arender()
+        cached = (content, make_etag(content))
+        await cache.aset(key, cached, _seconds_until_tomorrow(timezone.now()))
+    return cached
+
+
+def invalidate_advertisements():
+    """
+    Barcha reklama keshlarini bekor qiladi (versiyani oshirish orqali).
+
+    Tranzaksiya ichida chaqirilsa commit dan keyin bajariladi, aks holda parallel so'rov
+    hali commit qilinmagan eski ma'lumotni yangi versiya bilan keshlab qo'yishi mumkin.
+    """
+    def bump():
+        cache = get_advertisement_cache()
+        try:
+            cache.incr(ADVERTISEMENTS_VERSION_KEY)
+        except ValueError:
+            cache.set(ADVERTISEMENTS_VERSION_KEY, 2, None)
+
+    transaction.on_commit(bump)
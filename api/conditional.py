@@ -0,0 +1,66 @@
+"""
+Shartli GET (ETag / Last-Modified) yordamchilari.
+
+Validator lar serializer ishlatilmasdan, bitta kichik so'rov (yoki keshdagi qiymat) dan
+hisoblanadi; If-None-Match / If-Modified-Since mos kelsa 304 serializatsiyadan oldin qaytadi.
+"""
+import hashlib
+
+from django.db.models.fields.files import FieldFile
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Yuk javobidagi nested customer/driver ma'lumotlari ham ETag ga kiradi; sharhlar yoki ularning
+# mualliflari o'zgarganda yukning o'z versiyasi oshadi (signals.cargo_review_saved /
+# cargo_review_deleted / user_changed)
+CARGO_VALIDATOR_FIELDS = (
+    'version', 'updated_at',
+    'customer__name', 'customer__phone_number', 'customer__email',
+    'driver__id', 'driver__profile_picture', 'driver__vehicle_type', 'driver__license_type',
+    'driver__vehicle_capacity', 'driver__experience', 'driver__review_count', 'driver__rating_sum',
+    'driver__thumbnails',
+    'driver__user__id', 'driver__user__name', 'driver__user__phone_number', 'driver__user__email',
+)
+PROFILE_VALIDATOR_FIELDS = (
+    'id', 'profile_picture', 'vehicle_type', 'license_type', 'vehicle_capacity', 'experience',
+    'review_count', 'rating_sum', 'thumbnails', 'user__id', 'user__name', 'user__phone_number', 'user__email',
+)
+
+
+def is_conditional(request):
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def validator_row(instance, fields):
+    """
+    Allaqachon o'qilgan obyektdan values_list(*fields) bilan bir xil qatorni yig'adi
+    (shartsiz so'rovda validator uchun alohida so'rov bajarilmasligi uchun).
+    """
+    row = []
+    for path in fields:
+        value = instance
+        for name in path.split('__'):
+            value = None if value is None else getattr(value, name)
+        row.append(value.name if isinstance(value, FieldFile) else value)
+    return tuple(row)
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode('utf-8'), usedforsecurity=False).hexdigest())
+
+
+def not_modified(request, etag, last_modified=None):
+    """Mijozdagi nusxa hali yangi bo'lsa 304 javobini, aks holda None qaytaradi."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified and int(last_modified.timestamp())
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,166 @@
+"""
+Yuk hodisalari: CargoEvent jurnaliga yozish va jarayon ichidagi pub/sub (SSE oqimi uchun).
+
+Hodisa avval bazaga yoziladi (sequence - doimiy ketma-ketlik raqami), so'ng commit dan keyin shu
+jarayondagi shina uyg'otiladi. Shina har bir event loop da bitta vazifa orqali jurnalning oxirini
+o'qiydi va obunachilarga tarqatadi; boshqa worker larda yozilgan hodisalar `poll_interval` ichida
+keladi. Obunachi sekin bo'lib navbati to'lsa, hodisalarni bazadan qayta o'qib yetib oladi.
+"""
+import asyncio
+import json
+import logging
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Cargo, CargoEvent, ChangeCounter
+
+logger = logging.getLogger(__name__)
+
+
+def cargo_event(type, cargo):
+    return CargoEvent(
+        type=type,
+        cargo_id=cargo.pk,
+        customer_id=cargo.customer_id,
+        driver_id=cargo.driver_id,
+        vehicle_type=cargo.vehicle_type,
+        status=cargo.status,
+    )
+
+
+def record_cargo_events(type, cargos):
+    events = [cargo_event(type, cargo) for cargo in cargos]
+    # Raqamlar yuk versiyalari hisoblagichidan (bitta qulf - yozuvchilar orasida qulflash tartibi muammosi yo'q)
+    with transaction.atomic(savepoint=False):
+        last = ChangeCounter.objects.advance(Cargo.VERSION_COUNTER, len(events))
+        for sequence, event in enumerate(events, start=last - len(events) + 1):
+            event.sequence = sequence
+        events = CargoEvent.objects.bulk_create(events)
+    transaction.on_commit(bus.notify)
+    return events
+
+
+def record_cargo_event(type, cargo):
+    return record_cargo_events(type, [cargo])[0]
+
+
+def event_data(event):
+    return {
+        'id': event.sequence,
+        'type': event.type,
+        'cargo': event.cargo_id,
+        'customer': event.customer_id,
+        'driver': event.driver_id,
+        'vehicle_type': event.vehicle_type,
+        'status': event.status,
+        'created_at': event.created_at.isoformat(),
+    }
+
+
+def format_sse(event):
+    return 'id: %d\nevent: %s\ndata: %s\n\n' % (
+        event.sequence, event.type, json.dumps(event_data(event), ensure_ascii=False, separators=(',', ':'))
+    )
+
+
+class Subscription:
+    def __init__(self, filters, queue_size):
+        self.filters = filters
+        self.queue = asyncio.Queue(queue_size)
+        self.lagged = False
+
+    def matches(self, event):
+        return all(getattr(event, name) == value for name, value in self.filters.items())
+
+    def put(self, event):
+        if not self.matches(event):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+
+class CargoEventBus:
+    poll_interval = 1.0
+    batch_size = 500
+    queue_size = 1000
+
+    def __init__(self):
+        self.loop = None
+        self.task = None
+        self.subscribers = set()
+
+    def notify(self):
+        """Yangi hodisa commit qilindi; istalgan thread dan chaqirish mumkin."""
+        loop = self.loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:  # event loop yopilgan
+            pass
+
+    async def subscribe(self, **filters):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Yangi event loop (server qayta ishga tushgan, testlar): eski holat ishlatilmaydi
+            self.loop, self.task, self.subscribers = loop, None, set()
+            self.wakeup = asyncio.Event()
+        subscription = Subscription(filters, self.queue_size)
+        self.subscribers.add(subscription)
+        if self.task is None:
+            self.ready = asyncio.Event()
+            self.task = loop.create_task(self.run())
+        task = self.task
+        # last_id aniqlanmaguncha kutiladi: obunachi tarixni o'qiganda shina boshlagan joy qamrab olinadi
+        await self.ready.wait()
+        if task.done() and task.exception() is not None:
+            self.unsubscribe(subscription)
+            raise task.exception()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    async def run(self):
+        try:
+            self.last_id = await self.latest_id()
+        except Exception:
+            self.task = None
+            raise
+        finally:
+            self.ready.set()
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            if not self.subscribers:
+                self.task = None
+                return
+            try:
+                events = await self.fetch(self.last_id)
+            except Exception:
+                logger.exception("CargoEvent jurnalini o'qib bo'lmadi")
+                continue
+            for event in events:
+                for subscription in list(self.subscribers):
+                    subscription.put(event)
+            if events:
+                self.last_id = events[-1].sequence
+                if len(events) == self.batch_size:
+                    self.wakeup.set()
+
+    async def latest_id(self):
+        result = await CargoEvent.objects.aaggregate(last_id=Max('sequence'))
+        return result['last_id'] or 0
+
+    async def fetch(self, after_id, **filters):
+        events = CargoEvent.objects.filter(sequence__gt=after_id, **filters).order_by('sequence')[:self.batch_size]
+        return [event async for event in events]
+
+
+bus = CargoEventBus()
@@ -0,0 +1,67 @@
+import django_filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .models import Cargo
+from .search import search_cargos
+
+
+class CargoFilter(django_filters.FilterSet):
+    """
+    Yuklar ro'yxati filtrlari. Faqat indeks bilan qo'llab-quvvatlanadigan lookup'lar ochiq
+    (icontains kabi to'liq skaner talab qiladiganlari yo'q).
+    """
+    # ModelChoiceFilter qiymatni bazadan tekshirardi; id bo'yicha filtr qo'shimcha so'rovsiz ishlaydi
+    customer = django_filters.NumberFilter(field_name='customer_id')
+    driver = django_filters.NumberFilter(field_name='driver_id')
+
+    class Meta:
+        model = Cargo
+        fields = {
+            'status': ['exact', 'in'],
+            'vehicle_type': ['exact', 'in'],
+            'origin': ['exact'],
+            'destination': ['exact'],
+            'weight': ['gte', 'lte'],
+            'price': ['gte', 'lte'],
+            'driver': ['isnull'],
+            'created_at': ['gte', 'lte'],
+        }
+
+
+class CargoSearchFilter(BaseFilterBackend):
+    """
+    ?q= bo'yicha to'liq matnli qidiruv. Qidiruvda natijalar relevantlik bo'yicha tartiblanadi.
+    """
+    search_param = 'q'
+
+    def get_search_text(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        text = self.get_search_text(request)
+        if not text:
+            return queryset
+        return search_cargos(queryset, text)
+
+    def get_ordering(self, request, queryset, view):
+        # Paginatsiya tartibi: qidiruvda faqat relevantlik, ?ordering= jimgina e'tiborsiz qoldirilmaydi
+        if self.get_search_text(request):
+            if request.query_params.get(api_settings.ORDERING_PARAM):
+                raise ValidationError({api_settings.ORDERING_PARAM: [
+                    "?%s= bilan birga ishlatib bo'lmaydi: qidiruv natijalari relevantlik bo'yicha tartiblanadi."
+                    % self.search_param
+                ]})
+            return ['search_rank']
+        return None
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'name, description, origin, destination bo\'yicha qidiruv. Natijalar relevantlik '
+                           'bo\'yicha tartiblanadi, ?ordering= bilan birga berilsa 400.',
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,88 @@
+"""
+HTTP/1.1 keep-alive yuk generatori (manage.py loadtest va manage.py benchmark).
+
+Har bir "foydalanuvchi" bitta ulanish orqali javobni kutib keyingi so'rovni yuboradi, shuning
+uchun parallellik = ulanishlar soni. So'rov tayyor baytlar yoki har chaqirilganda yangi bayt
+qaytaradigan funksiya (masalan, har safar boshqa telefon raqami bilan ro'yxatdan o'tish).
+"""
+import asyncio
+import time
+
+
+def build_request(method, path, netloc, headers=None, body=b''):
+    lines = ['%s %s HTTP/1.1' % (method, path), 'Host: %s' % netloc, 'Connection: keep-alive']
+    lines += ['%s: %s' % item for item in (headers or {}).items()]
+    if body or method not in ('GET', 'HEAD'):
+        lines.append('Content-Length: %d' % len(body))
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+def percentile(latencies, p):
+    """Saralangan kechikishlar (soniya) ro'yxatidan millisekundda."""
+    if not latencies:
+        return 0.0
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+
+async def run(host, port, request, concurrency, duration):
+    """`duration` soniya davomida so'rov yuboradi: (kechikishlar, xatolar, o'tgan vaqt)."""
+    latencies, errors = [], [0]
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*[
+        worker(host, port, request, deadline, latencies, errors) for _ in range(concurrency)
+    ])
+    return latencies, errors[0], time.perf_counter() - started
+
+
+async def worker(host, port, request, deadline, latencies, errors):
+    """Bitta keep-alive ulanish orqali ketma-ket so'rovlar; uzilsa qayta ulanadi."""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            data = request() if callable(request) else request
+            sent = time.perf_counter()
+            writer.write(data)
+            status, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - sent)
+            if status >= 400:
+                errors[0] += 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors[0] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    status = int(status_line.split()[1])
+    headers = {}
+    for line in header_lines:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip().lower()
+
+    if status in (204, 304):
+        pass
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection') != 'close'
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import CachedTokenAuthentication
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = "TokenAuthentication va CachedTokenAuthentication uchun bitta so'rovdagi autentifikatsiya narxini o'lchaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        # Vaqtinchalik foydalanuvchi va token; oxirida rollback qilinadi
+        with transaction.atomic():
+            user = User(phone_number='+998000000000', name='bench', email='bench@example.invalid')
+            user.set_unusable_password()
+            user.save()
+            token = Token.objects.create(user=user)
+            request = APIRequestFactory().get('/', HTTP_AUTHORIZATION='Token ' + token.key)
+
+            for authentication_class in (TokenAuthentication, CachedTokenAuthentication):
+                self.run(authentication_class, request, iterations)
+            transaction.set_rollback(True)
+        CachedTokenAuthentication.cache.delete(token.key)
+
+    def run(self, authentication_class, request, iterations):
+        authenticator = authentication_class()
+        authenticator.authenticate(request)  # isitish (keshni to'ldirish)
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                authenticator.authenticate(request)
+            elapsed = time.perf_counter() - started
+        self.stdout.write('%-28s %8.1f us/request  %.2f queries/request' % (
+            authentication_class.__name__,
+            elapsed / iterations * 1e6,
+            len(context.captured_queries) / iterations,
+        ))
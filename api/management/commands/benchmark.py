@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import WSGIServer, run
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.utils import timezone
+
+from api import loadgen
+from api.benchmark import compare, configure, get_scenarios, prepare, profile, seed, summarize
+from api.models import Cargo
+
+
+class NoDelayWSGIServer(WSGIServer):
+    # Sarlavha va tana alohida yoziladi: Nagle + delayed ACK har javobga ~40 ms qo'shardi (gunicorn kabi)
+    def get_request(self):
+        request, address = super().get_request()
+        request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return request, address
+
+
+class Command(BaseCommand):
+    help = (
+        "api/urls.py dagi barcha endpointlarni sintetik ma'lumotli SQLite bazada o'lchaydi: "
+        "har bir parallellik darajasi uchun req/s va p50/p95/p99, har bir endpoint uchun SQL "
+        "so'rovlar soni va xotira cho'qqisi. Baza bir marta to'ldiriladi (--db), har ishga "
+        "tushirishda uning nusxasi ishlatiladi - natijalar bir xil holatdan boshlanadi. Masalan:\n"
+        "  manage.py benchmark --output before.json\n"
+        "  manage.py benchmark --compare before.json --threshold 15"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--db', type=Path, default=Path(settings.BASE_DIR) / 'bench.sqlite3',
+                            help="To'ldirilgan namuna baza")
+        parser.add_argument('--reseed', action='store_true', help="Namuna bazani qaytadan yaratish")
+        parser.add_argument('--cargos', type=int, default=20000, help="To'ldirishda yuklar soni")
+        parser.add_argument('--concurrency', default='1,16,64', help="Vergul bilan ajratilgan darajalar")
+        parser.add_argument('--duration', type=float, default=5.0, help="Har bir daraja uchun soniya")
+        parser.add_argument('--warmup', type=float, default=1.0)
+        parser.add_argument('--only', nargs='+', metavar='SCENARIO', help="Faqat shu ssenariylar")
+        parser.add_argument('--output', type=Path, help="Natijalar yoziladigan JSON fayl")
+        parser.add_argument('--compare', type=Path, metavar='JSON', help="Oldingi natija bilan solishtirish")
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help="--compare: p95 shu foizdan ko'p oshsa xato bilan tugaydi")
+        # Ichki: o'lchanadigan server jarayoni
+        parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['serve'] is not None:
+            return self.serve(options['db'], options['serve'])
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError("--concurrency: butun sonlar kutilgan, masalan 1,16,64")
+        baseline = None
+        if options['compare']:
+            baseline = json.loads(options['compare'].read_text())
+
+        template = options['db']
+        run_path = template.with_name(template.stem + '-run' + template.suffix)
+        if options['reseed'] and template.exists():
+            template.unlink()
+        configure(template)
+        call_command('migrate', verbosity=0, interactive=False)
+        if not Cargo.objects.exists():
+            self.stdout.write("Namuna baza to'ldirilmoqda: %s" % template)
+            seed(options['cargos'], progress=lambda name, count: self.stdout.write('  %-16s %d' % (name, count)))
+        connection.close()
+        shutil.copyfile(template, run_path)
+        configure(run_path)
+
+        scenarios = get_scenarios(prepare())
+        if options['only']:
+            unknown = set(options['only']) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError("Noma'lum ssenariy: %s" % ', '.join(sorted(unknown)))
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['only']]
+
+        results = {}
+        server, port = self.start_server(run_path)
+        try:
+            self.stdout.write('%-20s %5s %9s %9s %9s %9s %7s %8s %9s' % (
+                'scenario', 'conc', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors', 'queries', 'peak KiB'))
+            for scenario in scenarios:
+                result = profile(scenario)
+                if result['status'] >= 400:
+                    raise CommandError("%s: javob statusi %d" % (scenario.name, result['status']))
+                result.update(method=scenario.method, path=scenario.path, levels={})
+                for level in levels:
+                    stats = self.load(scenario, port, level, options['warmup'], options['duration'])
+                    result['levels'][str(level)] = stats
+                    self.stdout.write('%-20s %5d %9.1f %9.2f %9.2f %9.2f %7d %8d %9d' % (
+                        scenario.name, level, stats['throughput'], stats['p50_ms'], stats['p95_ms'],
+                        stats['p99_ms'], stats['errors'], result['queries'], result['peak_memory_kb']))
+                result['server_peak_rss_kb'] = self.peak_rss(server)
+                results[scenario.name] = result
+        finally:
+            server.terminate()
+            server.wait()
+            connection.close()
+
+        report = {'meta': self.meta(options, levels), 'results': results}
+        if options['output']:
+            options['output'].write_text(json.dumps(report, indent=2))
+            self.stdout.write("Natijalar: %s" % options['output'])
+        if baseline is not None:
+            problems = compare(baseline, report, options['threshold'])
+            if problems:
+                raise CommandError("Regressiya:\n  " + '\n  '.join(problems))
+            self.stdout.write(self.style.SUCCESS("Regressiya yo'q (chegara %.1f%%)" % options['threshold']))
+
+    def load(self, scenario, port, concurrency, warmup, duration):
+        netloc = '127.0.0.1:%d' % port
+
+        def request():
+            return loadgen.build_request(
+                scenario.method, scenario.path, netloc, scenario.headers(), scenario.make_body()
+            )
+
+        # Tanasiz so'rov bir marta quriladi
+        body_request = request if scenario.body is not None else request()
+        if warmup:
+            asyncio.run(loadgen.run('127.0.0.1', port, body_request, concurrency, warmup))
+        return summarize(*asyncio.run(loadgen.run('127.0.0.1', port, body_request, concurrency, duration)))
+
+    def start_server(self, path):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark',
+             '--db', str(path), '--serve', str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("Server ishga tushmadi (chiqish kodi %d)" % server.returncode)
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return server, port
+            except OSError:
+                time.sleep(0.1)
+        server.terminate()
+        raise CommandError("Server %d-portda javob bermadi" % port)
+
+    def serve(self, path, port):
+        configure(path)
+        run('127.0.0.1', port, get_wsgi_application(), threading=True, server_cls=NoDelayWSGIServer)
+
+    def peak_rss(self, server):
+        # Linux: jarayon boshidan beri eng katta RSS (VmHWM); boshqa tizimlarda None
+        try:
+            with open('/proc/%d/status' % server.pid) as status:
+                for line in status:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return None
+
+    def meta(self, options, levels):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': connection.Database.sqlite_version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'concurrency': levels,
+            'duration': options['duration'],
+            'cargos': options['cargos'],
+        }
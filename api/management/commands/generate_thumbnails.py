@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.models import DriverProfile
+from api.thumbnails import generate_thumbnails, thumbnail_paths
+
+
+class Command(BaseCommand):
+    help = "Profil rasmlari uchun thumbnail larni yaratadi (standart holatda faqat hali yo'qlari uchun)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Mavjud thumbnail larni ham qayta yaratish")
+
+    def handle(self, *args, **options):
+        profiles = DriverProfile.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        if not options['all']:
+            profiles = profiles.filter(thumbnails={})
+        done = failed = 0
+        for pk, source, thumbnails in profiles.values_list('pk', 'profile_picture', 'thumbnails').iterator():
+            # --all: sozlamalar (o'lcham, sifat) o'zgargan bo'lsa eski fayllar o'chiriladi
+            if generate_thumbnails(pk, source, thumbnail_paths(thumbnails)):
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS("%d ta profil uchun thumbnail yaratildi" % done))
+        if failed:
+            self.stdout.write(self.style.WARNING("%d ta rasmni o'qib bo'lmadi (log ga qarang)" % failed))
@@ -0,0 +1,56 @@
+import asyncio
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadgen import build_request, percentile, run
+
+
+class Command(BaseCommand):
+    help = (
+        "Berilgan URL larga parallel GET so'rovlar yuborib requests/second va kechikish "
+        "persentillarini o'lchaydi. WSGI va ASGI ni solishtirish uchun ikkala server alohida "
+        "portda ishga tushiriladi, masalan:\n"
+        "  gunicorn cargo.wsgi -w 4 --threads 16 -b :8000\n"
+        "  uvicorn cargo.asgi:application --workers 4 --port 8001\n"
+        "  manage.py loadtest http://127.0.0.1:8000/api/v1/cargos/ http://127.0.0.1:8001/api/v1/cargos/ "
+        "--token <key> --concurrency 256"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--duration', type=float, default=10.0, help="Har bir URL uchun soniya")
+        parser.add_argument('--warmup', type=float, default=1.0)
+        parser.add_argument('--token', help="Authorization: Token <key>")
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['Authorization'] = 'Token %s' % options['token']
+
+        self.stdout.write('%-48s %10s %9s %9s %9s %7s' % ('url', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors'))
+        for url in options['urls']:
+            parts = urlsplit(url)
+            if parts.scheme != 'http' or not parts.hostname:
+                raise CommandError("Faqat http:// URL lar qo'llab-quvvatlanadi: %s" % url)
+            if options['warmup']:
+                asyncio.run(self.run(parts, headers, options['concurrency'], options['warmup']))
+            latencies, errors, elapsed = asyncio.run(
+                self.run(parts, headers, options['concurrency'], options['duration'])
+            )
+            self.report(url, latencies, errors, elapsed)
+
+    def report(self, url, latencies, errors, elapsed):
+        latencies.sort()
+        self.stdout.write('%-48s %10.1f %9.2f %9.2f %9.2f %7d' % (
+            url, len(latencies) / elapsed, percentile(latencies, 0.50), percentile(latencies, 0.95),
+            percentile(latencies, 0.99), errors,
+        ))
+
+    async def run(self, parts, headers, concurrency, duration):
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        request = build_request('GET', path, parts.netloc, headers)
+        return await run(parts.hostname, parts.port or 80, request, concurrency, duration)
@@ -0,0 +1,23 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import CargoEvent
+
+
+class Command(BaseCommand):
+    help = "Eski yuk hodisalarini (SSE jurnali) o'chiradi; cron orqali kuniga bir marta ishga tushiriladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help="Shuncha kundan eski hodisalar o'chiriladi")
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - datetime.timedelta(days=options['days'])
+        # sequence va created_at birga o'sadi: chegara sequence bo'yicha topiladi, o'chirish indeks oralig'i bilan
+        last = CargoEvent.objects.filter(created_at__lt=threshold).order_by('-sequence').values_list(
+            'sequence', flat=True).first()
+        deleted = 0
+        if last is not None:
+            deleted, _ = CargoEvent.objects.filter(sequence__lte=last).delete()
+        self.stdout.write(self.style.SUCCESS("%d ta hodisa o'chirildi" % deleted))
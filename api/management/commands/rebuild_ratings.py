@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from api.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Yuk va haydovchi reytinglarini (review_count/rating_sum) sharhlardan qayta hisoblaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        cargos, drivers = rebuild_ratings(options['database'])
+        self.stdout.write(self.style.SUCCESS(
+            "Reyting qayta hisoblandi: %d ta yuk, %d ta haydovchi tuzatildi" % (cargos, drivers)
+        ))
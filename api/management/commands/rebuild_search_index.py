@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.search import is_supported, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Yuklar bo'yicha to'liq matnli qidiruv indeksini (FTS5) qaytadan quradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not is_supported(connection):
+            self.stdout.write(self.style.WARNING("FTS5 faqat SQLite da mavjud, qidiruv icontains bilan ishlaydi"))
+            return
+        rebuild_search_index(connection)
+        self.stdout.write(self.style.SUCCESS("Qidiruv indeksi qayta qurildi"))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import User
+from api.seed import DEFAULT_PASSWORD, Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Bazani sintetik ma'lumotlar bilan to'ldiradi: foydalanuvchilar, haydovchi profillari, yuklar, "
+        "sharhlar, kontakt xabarlari va reklamalar (bulk_create, umumiy parol hash i, qat'iy seed). "
+        "Masalan, million yuk: manage.py seed --users 100000 --drivers 30000 --cargos 1000000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--drivers', type=int, default=3000, help="Foydalanuvchilarning qanchasi haydovchi (qolganlari bo'sh profil oladi)")
+        parser.add_argument('--cargos', type=int, default=100000)
+        parser.add_argument('--review-ratio', type=float, default=0.6,
+                            help="Yetkazilgan yuklarning qancha qismiga sharh yoziladi")
+        parser.add_argument('--contacts', type=int, default=5000)
+        parser.add_argument('--advertisements', type=int, default=500)
+        parser.add_argument('--days', type=int, default=365, help="Yozuvlar shuncha kunga tarqatiladi")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help="Barcha foydalanuvchilar paroli")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email__endswith='@seed.example.com').exists():
+            raise CommandError("Baza allaqachon to'ldirilgan (seed foydalanuvchilari bor)")
+        if options['cargos'] and not options['users']:
+            raise CommandError("Yuklar uchun kamida bitta foydalanuvchi kerak")
+        started = time.monotonic()
+
+        def progress(name, count):
+            self.stdout.write('%-16s %10d  %7.1f s' % (name, count, time.monotonic() - started))
+
+        try:
+            seeder = Seeder(
+                users=options['users'], drivers=options['drivers'], cargos=options['cargos'],
+                review_ratio=options['review_ratio'], contacts=options['contacts'],
+                advertisements=options['advertisements'], days=options['days'], seed=options['seed'],
+                batch_size=options['batch_size'], password=options['password'], progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        seeder.run()
+        self.stdout.write(self.style.SUCCESS("Tayyor: %.1f s" % (time.monotonic() - started)))
@@ -0,0 +1,46 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.cache import invalidate_advertisements
+from api.models import Advertisement
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reklamalar muddatini kuzatadi: muddati tugaganlarini faolsizlantiradi, sanasi yo'q yoqilganlarini "
+        "ishga tushiradi. Cron bilan (masalan, har 5 daqiqada) yoki --loop bilan doimiy jarayon sifatida ishlaydi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="To'xtatilmaguncha --interval da bir ishlash")
+        parser.add_argument('--interval', type=int, default=300, help="Ishlashlar orasidagi soniyalar (--loop)")
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.sweep()
+            return
+        try:
+            while True:
+                # Uzoq yashaydigan jarayon: eskirgan yoki uzilgan ulanish keyingi ishlashga qolmasin
+                close_old_connections()
+                try:
+                    self.sweep()
+                except Exception:
+                    logger.exception("Reklamalarni tekshirib bo'lmadi")
+                close_old_connections()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def sweep(self):
+        started, expired = Advertisement.objects.sweep(timezone.now().date())
+        if started or expired:
+            invalidate_advertisements()
+        logger.info("Reklamalar: %d ta ishga tushirildi, %d ta faolsizlantirildi", started, expired)
+        self.stdout.write("%d ta reklama ishga tushirildi, %d ta faolsizlantirildi" % (started, expired))
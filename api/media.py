@@ -0,0 +1,198 @@
+"""
+MEDIA_ROOT dagi fayllarni (reklama videolari, profil rasmlari va thumbnail lar) berish.
+
+django.conf.urls.static.static() o'rniga: HTTP Range (206) - video butun fayl yuklanmasdan
+o'ynay boshlaydi, ETag / Last-Modified bilan shartli so'rovlar (304), mazmun hash i nomida
+bo'lgan fayllar uchun `immutable` keshlash. Fayl FileResponse orqali beriladi: gunicorn kabi
+server lar wsgi.file_wrapper bilan uni os.sendfile orqali (Python dan o'tkazmasdan) yuboradi.
+settings.MEDIA_SERVING['ACCEL_REDIRECT'] berilsa fayl nginx ga X-Accel-Redirect bilan topshiriladi.
+ASGI da aserve_media: fayl thread larda bo'laklab o'qiladigan async iterator bilan beriladi
+(FileResponse ning sync iteratori ASGI da to'liq xotiraga o'qilib keyin yuborilardi).
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# api/thumbnails.py nomlari: <katalog>/thumbs/<o'lcham>/<sha256[:20]>.<format>
+IMMUTABLE_RE = r'(^|/)thumbs/\d+/[0-9a-f]{20}\.\w+$'
+
+
+def _options():
+    return getattr(settings, 'MEDIA_SERVING', {})
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Bitta `bytes=` oralig'ini (start, end) ko'rinishida qaytaradi (end kiradi). Tushunilmagan yoki
+    bir nechta oraliq bo'lsa None - butun fayl 200 bilan beriladi (RFC 9110 bunga ruxsat beradi).
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end:
+            return None
+        suffix = int(end)
+        if suffix == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - suffix), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, end
+
+
+class RangeFile:
+    """
+    Ochiq faylning [start, start + length) qismi. `seek` yo'q - FileResponse Content-Length ni
+    o'zi hisoblamaydi; `fileno`/`tell` bor - sendfile shu joydan Content-Length bayt yuboradi.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.headers.get('If-Range')
+    if value is None:
+        return True
+    # Faqat kuchli taqqoslash: ETag aynan mos yoki Last-Modified sanasi aynan bir xil
+    return value == etag or value == http_date(last_modified)
+
+
+def cache_control(path):
+    options = _options()
+    if re.search(options.get('IMMUTABLE', IMMUTABLE_RE), path):
+        return 'public, max-age=31536000, immutable'
+    return 'public, max-age=%d' % options.get('MAX_AGE', 3600)
+
+
+def _file_response(fullpath, start, length, status, content_type, headers):
+    response = FileResponse(
+        RangeFile(open(fullpath, 'rb'), start, length), status=status, content_type=content_type, headers=headers
+    )
+    response.block_size = _options().get('BLOCK_SIZE', 64 * 1024)
+    return response
+
+
+async def aread_range(fullpath, start, length, block_size):
+    """Faylning [start, start + length) qismi; ochish va o'qish event loop dan tashqarida."""
+    file = await sync_to_async(open, thread_sensitive=False)(fullpath, 'rb')
+    try:
+        range_file = RangeFile(file, start, length)
+        read = sync_to_async(range_file.read, thread_sensitive=False)
+        while chunk := await read(block_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+def _async_file_response(fullpath, start, length, status, content_type, headers):
+    content = aread_range(fullpath, start, length, _options().get('BLOCK_SIZE', 64 * 1024))
+    return StreamingHttpResponse(content, status=status, content_type=content_type, headers=headers)
+
+
+def _serve(request, path, file_response):
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404()
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404()
+
+    size = st.st_size
+    last_modified = int(st.st_mtime)
+    etag = '"%x-%x"' % (st.st_mtime_ns, size)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        for name, value in headers.items():
+            response.headers.setdefault(name, value)
+        return response
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    if encoding or content_type is None:
+        content_type = 'application/octet-stream'
+
+    accel_prefix = _options().get('ACCEL_REDIRECT')
+    if accel_prefix:
+        # nginx faylni o'zi beradi (Range va sendfile bilan); bu yerda faqat tekshiruv va sarlavhalar
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + path.lstrip('/')
+        return response
+
+    start, end = 0, size - 1
+    status = 200
+    range_header = request.headers.get('Range')
+    if range_header and size and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416, headers=headers)
+            response['Content-Range'] = 'bytes */%d' % size
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            status = 206
+            headers['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+    length = end - start + 1 if size else 0
+    headers['Content-Length'] = str(length)
+
+    if request.method == 'HEAD':
+        return HttpResponse(status=status, content_type=content_type, headers=headers)
+    return file_response(fullpath, start, length, status, content_type, headers)
+
+
+@require_safe
+def serve_media(request, path):
+    return _serve(request, path, _file_response)
+
+
+@require_safe
+async def aserve_media(request, path):
+    # stat va shartli tekshiruvlar ham fayl tizimiga murojaat - thread da
+    return await sync_to_async(_serve, thread_sensitive=False)(request, path, _async_file_response)
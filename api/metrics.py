@@ -0,0 +1,204 @@
+"""
+So'rov metrikalari: umumiy vaqt, SQL so'rovlar soni va vaqti, serializer va render vaqti.
+
+MetricsMiddleware (api/middleware.py) tanlangan so'rov uchun RequestStats ni contextvar ga
+qo'yadi. SQL barcha ulanishlarga bir marta o'rnatiladigan execute_wrapper da, serializer
+TimedSerializerMixin da, render esa process_template_response dan render tugaguncha o'lchanadi.
+contextvar sync_to_async thread lariga ham o'tadi, shuning uchun ASGI da ham ishlaydi.
+Tanlanmagan so'rovda o'lchagichlar bitta contextvar o'qish bilan chetlab o'tiladi.
+
+Tanlangan so'rovlar (settings.METRICS['SAMPLE_RATE']) Server-Timing sarlavhasini oladi va
+bo'linmasi route bo'yicha histogrammalarga yig'iladi; umumiy vaqt va so'rovlar soni hamma
+so'rov uchun yoziladi. /metrics ularni Prometheus matn formatida beradi. Qiymatlar jarayon
+xotirasida: bir nechta worker bo'lsa har biri o'zinikini beradi (Prometheus da `instance`).
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# nom: (turi, tavsif)
+METRICS = {
+    'http_requests_total': ('counter', "So'rovlar soni"),
+    'http_request_duration_seconds': ('histogram', "So'rovning umumiy vaqti"),
+    'http_request_db_queries': ('histogram', "So'rovdagi SQL so'rovlar soni (tanlangan so'rovlar)"),
+    'http_request_db_duration_seconds': ('histogram', "SQL so'rovlar vaqti (tanlangan so'rovlar)"),
+    'http_request_serialize_duration_seconds': ('histogram', "Serializer vaqti (tanlangan so'rovlar)"),
+    'http_request_render_duration_seconds': ('histogram', "Javobni render qilish vaqti (tanlangan so'rovlar)"),
+}
+
+_current = ContextVar('request_stats', default=None)
+
+
+def get_options():
+    return getattr(settings, 'METRICS', {})
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db', 'serialize', 'render', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = self.serialize = self.render = 0.0
+        self.serializing = False
+
+    def server_timing(self, total):
+        return 'db;dur=%.2f;desc="%d queries", serialize;dur=%.2f, render;dur=%.2f, total;dur=%.2f' % (
+            self.db * 1000, self.queries, self.serialize * 1000, self.render * 1000, total * 1000,
+        )
+
+
+def current_stats():
+    return _current.get()
+
+
+def activate(stats):
+    return _current.set(stats)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db += time.perf_counter() - started
+
+
+def install_execute_wrapper(connection, **kwargs):
+    """connection_created signali: ulanishga bir marta (qayta ulanishda takrorlanmaydi)."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def install_execute_wrappers():
+    for connection in connections.all(initialized_only=True):
+        install_execute_wrapper(connection)
+
+
+class TimedSerializerMixin:
+    """Eng tashqi serializer ning to_representation vaqti; ichma-ich serializer lar qayta sanalmaydi."""
+
+    def to_representation(self, instance):
+        stats = _current.get()
+        if stats is None or stats.serializing:
+            return super().to_representation(instance)
+        stats.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serialize += time.perf_counter() - started
+            stats.serializing = False
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # oxirgisi +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels):
+    return ','.join(
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Jarayon ichidagi counter va histogrammalar; bitta so'rov natijasi bitta qulf ostida yoziladi."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def clear(self):
+        with self.lock:
+            self.values = {}
+
+    def _histogram(self, name, labels, buckets):
+        key = (name, labels)
+        histogram = self.values.get(key)
+        if histogram is None:
+            histogram = self.values[key] = Histogram(buckets)
+        return histogram
+
+    def record(self, route, method, status, total, stats=None):
+        labels = (('route', route), ('method', method))
+        durations = get_options().get('BUCKETS', DURATION_BUCKETS)
+        with self.lock:
+            key = ('http_requests_total', labels + (('status', status),))
+            self.values[key] = self.values.get(key, 0) + 1
+            self._histogram('http_request_duration_seconds', labels, durations).observe(total)
+            if stats is not None:
+                self._histogram('http_request_db_queries', labels, QUERY_BUCKETS).observe(stats.queries)
+                self._histogram('http_request_db_duration_seconds', labels, durations).observe(stats.db)
+                self._histogram('http_request_serialize_duration_seconds', labels, durations).observe(stats.serialize)
+                self._histogram('http_request_render_duration_seconds', labels, durations).observe(stats.render)
+
+    def render(self):
+        """Prometheus matn formati (version 0.0.4)."""
+        with self.lock:
+            items = sorted(
+                (key, value if not isinstance(value, Histogram) else
+                 (list(value.buckets), list(value.counts), value.sum, value.count))
+                for key, value in self.values.items()
+            )
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            series = [(labels, value) for (metric, labels), value in items if metric == name]
+            if not series:
+                continue
+            lines.append('# HELP %s %s' % (name, description))
+            lines.append('# TYPE %s %s' % (name, kind))
+            for labels, value in series:
+                if kind == 'counter':
+                    lines.append('%s{%s} %s' % (name, _format_labels(labels), value))
+                    continue
+                buckets, counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip([*buckets, '+Inf'], counts):
+                    cumulative += bucket_count
+                    lines.append('%s_bucket{%s} %d' % (
+                        name, _format_labels(labels + (('le', _format_number(bound)),)), cumulative))
+                lines.append('%s_sum{%s} %r' % (name, _format_labels(labels), total))
+                lines.append('%s_count{%s} %d' % (name, _format_labels(labels), count))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def metrics_view(request):
+    # Standart holatda faqat shu mashinadan (proxy ortida REMOTE_ADDR - proxy manzili)
+    allowed = get_options().get('ALLOWED_IPS')
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,115 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+
+from . import metrics
+
+
+class ASGIURLConfMiddleware:
+    """
+    ASGI orqali kelgan so'rovlarga settings.ASGI_URLCONF ni o'rnatadi (async view lar).
+    WSGI so'rovlari ROOT_URLCONF da qoladi. Middleware o'zi ham async: zanjirda thread almashmaydi.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.urlconf = getattr(settings, 'ASGI_URLCONF', None)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        self.route(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.route(request)
+        return await self.get_response(request)
+
+    def route(self, request):
+        if self.urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = self.urlconf
+
+
+class MetricsMiddleware:
+    """
+    So'rov vaqti va bo'linmasi (api/metrics.py): Server-Timing sarlavhasi va /metrics histogrammalari.
+    MIDDLEWARE ro'yxatida birinchi turadi - qolgan middleware lar ham umumiy vaqtga kiradi.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = metrics.get_options()
+        if not options.get('ENABLED', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = options.get('SAMPLE_RATE', 1.0)
+        self.server_timing = options.get('SERVER_TIMING', True)
+        metrics.install_execute_wrappers()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            # Sync hook ASGI da har so'rovda alohida thread ga o'tkazilardi
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started, stats, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                metrics.deactivate(token)
+        return self.finish(request, response, started, stats)
+
+    async def __acall__(self, request):
+        started, stats, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                metrics.deactivate(token)
+        return self.finish(request, response, started, stats)
+
+    def start(self):
+        stats = token = None
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            stats = metrics.RequestStats()
+            token = metrics.activate(stats)
+        return time.perf_counter(), stats, token
+
+    def finish(self, request, response, started, stats):
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.route if match is not None else 'unmatched'
+        metrics.registry.record(route, request.method, response.status_code, total, stats)
+        if stats is not None and self.server_timing:
+            response['Server-Timing'] = stats.server_timing(total)
+        return response
+
+    def process_template_response(self, request, response):
+        return self.time_render(response)
+
+    async def aprocess_template_response(self, request, response):
+        return self.time_render(response)
+
+    def time_render(self, response):
+        stats = metrics.current_stats()
+        if stats is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                stats.render += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
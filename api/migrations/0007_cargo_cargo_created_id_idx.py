@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_advertisement_contactmessage_alter_cargoreview_stars'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['-created_at', '-id'], name='cargo_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_cargo_cargo_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='cargo_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['vehicle_type', 'status', '-created_at', '-id'], name='cargo_vehicle_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['customer', '-created_at', '-id'], name='cargo_customer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['driver', 'status'], name='cargo_driver_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(condition=models.Q(('is_active', True), ('status', 'Tasdiqlangan')), fields=['end_date', 'start_date'], name='ad_active_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(condition=models.Q(('is_active', True), ('status', 'Tasdiqlangan')), fields=['ad_type', 'end_date', 'start_date'], name='ad_active_type_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['weight', 'id'], name='cargo_weight_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['origin', 'destination'], name='cargo_route_idx'),
+        ),
+    ]
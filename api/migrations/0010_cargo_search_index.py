@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:20
+
+import api.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+from api.search import drop_search_index, rebuild_search_index
+
+
+def create_index(apps, schema_editor):
+    rebuild_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_cargo_weight_route_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CargoSearchIndex',
+            fields=[
+                ('cargo', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='api.cargo')),
+                ('document', api.search.FTSMatchField(db_column='api_cargo_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'api_cargo_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_cargo_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(condition=models.Q(('driver__isnull', True), ('status', 'Jarayonda')), fields=['vehicle_type', '-price', '-created_at', '-id'], name='cargo_open_match_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_cargo_open_match_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CargoEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('created', 'created'), ('claimed', 'claimed'), ('status_changed', 'status_changed'), ('deleted', 'deleted')], max_length=20)),
+                ('cargo_id', models.BigIntegerField()),
+                ('customer_id', models.BigIntegerField()),
+                ('driver_id', models.BigIntegerField(blank=True, null=True)),
+                ('vehicle_type', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:05
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def backfill_versions(apps, schema_editor):
+    # Mavjud yuklarga id tartibida versiya beriladi, hisoblagich shundan davom etadi
+    Cargo = apps.get_model('api', 'Cargo')
+    ChangeCounter = apps.get_model('api', 'ChangeCounter')
+    db = schema_editor.connection.alias
+    Cargo.objects.using(db).update(version=F('id'), updated_at=F('created_at'))
+    last = Cargo.objects.using(db).aggregate(last=Max('id'))['last'] or 0
+    ChangeCounter.objects.using(db).update_or_create(name='cargo', defaults={'value': last})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_cargoevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CargoTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cargo_id', models.BigIntegerField()),
+                ('customer_id', models.BigIntegerField()),
+                ('version', models.BigIntegerField(unique=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='cargo',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='cargo',
+            name='version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_versions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['version'], name='cargo_version_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_ratings(apps, schema_editor):
+    # Mavjud sharhlardan bir martalik hisob: har jadval uchun bitta korrelyatsion UPDATE
+    Cargo = apps.get_model('api', 'Cargo')
+    CargoReview = apps.get_model('api', 'CargoReview')
+    DriverProfile = apps.get_model('api', 'DriverProfile')
+    db = schema_editor.connection.alias
+    for model, group_by in ((Cargo, 'cargo'), (DriverProfile, 'cargo__driver')):
+        reviews = (
+            CargoReview.objects.using(db).filter(**{group_by: OuterRef('pk')})
+            .order_by().values(group_by).annotate(count=Count('*'), stars=Sum('stars'))
+        )
+        model.objects.using(db).update(
+            review_count=Coalesce(Subquery(reviews.values('count')), Value(0)),
+            rating_sum=Coalesce(Subquery(reviews.values('stars')), Value(0)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_cargo_version_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cargo',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cargo',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='driverprofile',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='driverprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
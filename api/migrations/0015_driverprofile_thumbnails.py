@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driverprofile',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
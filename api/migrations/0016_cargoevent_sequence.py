@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:20
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def backfill_sequence(apps, schema_editor):
+    # Mavjud hodisalar raqami = id (mijozlardagi Last-Event-ID o'zgarmaydi); hisoblagich ikkalasidan kattasidan davom etadi
+    CargoEvent = apps.get_model('api', 'CargoEvent')
+    ChangeCounter = apps.get_model('api', 'ChangeCounter')
+    db = schema_editor.connection.alias
+    CargoEvent.objects.using(db).update(sequence=F('id'))
+    last = CargoEvent.objects.using(db).aggregate(last=Max('id'))['last'] or 0
+    counter, created = ChangeCounter.objects.using(db).get_or_create(name='cargo', defaults={'value': last})
+    if counter.value < last:
+        counter.value = last
+        counter.save(update_fields=['value'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_driverprofile_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cargoevent',
+            name='sequence',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(backfill_sequence, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cargoevent',
+            name='sequence',
+            field=models.BigIntegerField(unique=True),
+        ),
+    ]
@@ -1,6 +1,11 @@
-from django.db import models
+import datetime
+
+from django.db import connections, models, router, transaction
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
+from django.utils import timezone
+
+from .search import FTSMatchField
 
 class UserManager(BaseUserManager):
     def create_user(self, phone_number, password=None, **extra_fields):
@@ -33,23 +38,134 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'phone_number'
     REQUIRED_FIELDS = ['name', 'email']
 
+    # Yuk javoblarida (sharh muallifi sifatida) ko'rinadigan maydonlar (api/signals.py)
+    PUBLIC_FIELDS = ('name', 'phone_number', 'email')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_public = tuple(instance.__dict__.get(name) for name in cls.PUBLIC_FIELDS)
+        return instance
+
     def __str__(self):
         return self.phone_number
     
 
+class RatedModel(models.Model):
+    """
+    Sharhlar bo'yicha oldindan hisoblangan reyting (api/ratings.py). Qiymatlar faqat F() bilan
+    yangilanadi, shuning uchun to'liq save() ularni xotiradagi eski qiymat bilan ustidan yozmaydi.
+    """
+    RATING_FIELDS = ('review_count', 'rating_sum')
+
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Django ning o'zi kabi: .only() bilan o'qilmagan ustunlar ham yozilmaydi
+            skipped = {*self.RATING_FIELDS, *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in skipped and f.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
 # Boshqa modellar (DriverProfile, Cargo, CargoReview)
-class DriverProfile(models.Model):
+class DriverProfile(RatedModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     profile_picture = models.ImageField(upload_to='profiles/', null=True, blank=True)
     vehicle_type = models.CharField(max_length=50, blank=True)
     license_type = models.CharField(max_length=50, blank=True)
     vehicle_capacity = models.FloatField(null=True, blank=True)
     experience = models.IntegerField(null=True, blank=True)
+    # Fon worker i yaratgan kichik rasmlar: {'64': {'jpeg': nom, 'webp': nom}, ...} (api/thumbnails.py)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.user.name} profili"
 
-class Cargo(models.Model):
+class CargoQuerySet(models.QuerySet):
+    RELATIONS = ('customer', 'driver', 'reviews')
+
+    def with_related(self, expand=None, fields=None, ordering=()):
+        """
+        CargoSerializer uchun nested obyektlarni oldindan yuklaydi (N+1 bo'lmasligi uchun).
+
+        `expand` berilsa faqat shu bog'lanishlar join/prefetch qilinadi, `fields` berilsa
+        faqat shu ustunlar o'qiladi. `id`, `created_at` va `ordering` (paginatsiya tartibi,
+        masalan ?ordering=weight) ustunlari doim olinadi: kursor ularni har sahifada o'qiydi.
+        """
+        if expand is None:
+            expand = self.RELATIONS
+        wanted = None if fields is None else set(fields)
+
+        def is_wanted(name):
+            return wanted is None or name in wanted
+
+        queryset = self
+        related = []
+        if 'customer' in expand and is_wanted('customer'):
+            related.append('customer')
+        if 'driver' in expand and is_wanted('driver'):
+            related.append('driver__user')
+        if related:
+            queryset = queryset.select_related(*related)
+
+        if is_wanted('reviews'):
+            if 'reviews' in expand:
+                reviews = CargoReview.objects.select_related('customer')
+            else:
+                reviews = CargoReview.objects.only('id', 'cargo_id')
+            queryset = queryset.prefetch_related(models.Prefetch('reviews', queryset=reviews))
+
+        if wanted is not None:
+            wanted.update(field.lstrip('-') for field in ordering)
+            columns = {'id', 'created_at'}
+            columns.update(f.name for f in self.model._meta.concrete_fields if f.name in wanted)
+            if 'rating' in wanted:
+                columns.update(self.model.RATING_FIELDS)
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def advance_versions(self):
+        """
+        Har bir yukka yangi versiya beradi (ETag, delta sync): javobiga kiradigan bog'liq qator
+        o'zgarganda. Versiyalar alohida - ?since= sahifalari bir xil versiyada bo'linib qolmaydi.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            ids = list(self.order_by('pk').values_list('pk', flat=True).distinct())
+            if not ids:
+                return 0
+            first = ChangeCounter.objects.db_manager(self.db).advance(Cargo.VERSION_COUNTER, len(ids)) - len(ids) + 1
+            now = timezone.now()
+            cargos = [Cargo(pk=pk, version=first + i, updated_at=now) for i, pk in enumerate(ids)]
+            self.model.objects.using(self.db).bulk_update(cargos, ['version', 'updated_at'], batch_size=500)
+        return len(ids)
+
+    def matching(self, profile):
+        """
+        Haydovchi transportiga mos, hali hech kim olmagan yuklar: narxi yuqori va yangilari birinchi.
+        """
+        return self.filter(
+            status='Jarayonda',
+            driver__isnull=True,
+            vehicle_type=profile.vehicle_type,
+            weight__lte=profile.vehicle_capacity,
+        ).order_by(models.F('price').desc(nulls_last=True), '-created_at', '-id')
+
+
+class Cargo(RatedModel):
     VEHICLE_TYPES = (
         ('Bortli', 'Bortli'),
         ('Tentli', 'Tentli'),
@@ -64,6 +180,7 @@ class Cargo(models.Model):
         ('Yolda', 'Yolda'),
         ('Yetkazib berilgan', 'Yetkazib berilgan'),
     )
+    VERSION_COUNTER = 'cargo'
     customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='customer_cargos')
     driver = models.ForeignKey(DriverProfile, on_delete=models.SET_NULL, null=True, blank=True)
     name = models.CharField(max_length=100, default="Noma'lum")
@@ -75,10 +192,156 @@ class Cargo(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     description = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Delta sync (/cargos/changes/) uchun o'zgarish versiyasi: har yozishda ChangeCounter dan olinadi
+    version = models.BigIntegerField(default=0, editable=False)
+
+    objects = CargoQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset paginatsiya uchun: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='cargo_created_id_idx'),
+            # Ro'yxat va admin filtrlari: status / vehicle_type bo'yicha, yangilari birinchi
+            models.Index(fields=['status', '-created_at', '-id'], name='cargo_status_created_idx'),
+            models.Index(fields=['vehicle_type', 'status', '-created_at', '-id'], name='cargo_vehicle_status_idx'),
+            # Mijoz va haydovchining yuklari
+            models.Index(fields=['customer', '-created_at', '-id'], name='cargo_customer_created_idx'),
+            models.Index(fields=['driver', 'status'], name='cargo_driver_status_idx'),
+            # ?ordering=weight va yo'nalish (origin/destination) filtrlari
+            models.Index(fields=['weight', 'id'], name='cargo_weight_id_idx'),
+            models.Index(fields=['origin', 'destination'], name='cargo_route_idx'),
+            # /cargos/matches/: haydovchi hali olmagan yuklar, transport turi bo'yicha narx va sana tartibida
+            models.Index(
+                fields=['vehicle_type', '-price', '-created_at', '-id'],
+                condition=models.Q(status='Jarayonda', driver__isnull=True),
+                name='cargo_open_match_idx',
+            ),
+            models.Index(fields=['version'], name='cargo_version_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not update_fields:
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        # Versiya va qatorning o'zi bitta tranzaksiyada yoziladi (ChangeCounter docstring iga qarang)
+        with transaction.atomic(using=using, savepoint=False):
+            self.version = ChangeCounter.objects.db_manager(using).advance(Cargo.VERSION_COUNTER)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version', 'updated_at'}
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status o'zgarishini aniqlash uchun (CargoEvent, api/signals.py)
+        instance._loaded_status = instance.__dict__.get('status')
+        instance._loaded_driver_id = instance.__dict__.get('driver_id')
+        return instance
 
     def __str__(self):
         return self.name
 
+class ChangeCounterManager(models.Manager):
+    def advance(self, name, count=1):
+        """
+        Hisoblagichni `count` ga oshirib yangi qiymatni qaytaradi (oraliq: value - count + 1 .. value).
+        Chaqiruvchining tranzaksiyasi ichida ishlatiladi.
+        """
+        connection = connections[self.db]
+        if connection.vendor in ('sqlite', 'postgresql'):
+            table = connection.ops.quote_name(self.model._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'UPDATE %s SET value = value + %%s WHERE name = %%s RETURNING value' % table, [count, name]
+                )
+                row = cursor.fetchone()
+            value = row[0] if row else None
+        else:
+            updated = self.filter(name=name).update(value=models.F('value') + count)
+            value = self.filter(name=name).values_list('value', flat=True).get() if updated else None
+        if value is None:
+            counter, created = self.get_or_create(name=name, defaults={'value': count})
+            value = counter.value if created else self.advance(name, count)
+        return value
+
+
+class ChangeCounter(models.Model):
+    """
+    Nomlangan monoton hisoblagich (Cargo.version, CargoTombstone.version).
+
+    Hisoblagich qatori yozayotgan tranzaksiya ichida yangilanadi va qulfi commit gacha
+    saqlanadi: kichik versiya kattasidan keyin commit bo'lmaydi, shuning uchun ?since= bo'yicha
+    o'qigan mijoz keyinroq ko'rinadigan o'zgarishni o'tkazib yubormaydi.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    objects = ChangeCounterManager()
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class CargoTombstone(models.Model):
+    """
+    O'chirilgan yuk izi: delta sync mijozi uni ko'rib yukni o'z nusxasidan ham o'chiradi.
+    """
+    cargo_id = models.BigIntegerField()
+    customer_id = models.BigIntegerField()
+    version = models.BigIntegerField(unique=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.cargo_id} ({self.version})"
+
+
+class CargoSearchIndex(models.Model):
+    """
+    api_cargo_fts (FTS5) jadvali. Jadval va triggerlar api/search.py da yaratiladi,
+    model faqat Cargo bilan JOIN qilish uchun kerak.
+    """
+    cargo = models.OneToOneField(
+        Cargo, primary_key=True, db_column='rowid', related_name='search_index', on_delete=models.DO_NOTHING
+    )
+    document = FTSMatchField(db_column='api_cargo_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'api_cargo_fts'
+
+
+class CargoEvent(models.Model):
+    """
+    Yuk hodisalari jurnali (SSE oqimi uchun). `sequence` o'suvchi ketma-ketlik raqami bo'lib, mijoz
+    Last-Event-ID orqali shu joydan davom ettiradi. Yuk o'chirilgandan keyin ham hodisa qolishi
+    uchun bog'lanishlar oddiy id sifatida saqlanadi.
+
+    Autoincrement id INSERT da beriladi, commit da emas: parallel yozuvchilarda kichik id kattasidan
+    keyin ko'rinishi va o'tkazib yuborilishi mumkin. `sequence` esa yuk versiyalari bilan bir xil
+    ChangeCounter dan olinadi - qulf commit gacha saqlanadi, tartib commit tartibiga mos.
+    """
+    TYPES = (
+        ('created', 'created'),
+        ('claimed', 'claimed'),
+        ('status_changed', 'status_changed'),
+        ('deleted', 'deleted'),
+    )
+    type = models.CharField(max_length=20, choices=TYPES)
+    cargo_id = models.BigIntegerField()
+    customer_id = models.BigIntegerField()
+    driver_id = models.BigIntegerField(null=True, blank=True)
+    vehicle_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    sequence = models.BigIntegerField(unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sequence}: {self.type} #{self.cargo_id}"
+
+
 class CargoReview(models.Model):
     cargo = models.ForeignKey(Cargo, on_delete=models.CASCADE, related_name='reviews')
     customer = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -94,6 +357,13 @@ class CargoReview(models.Model):
     stars = models.IntegerField(choices=choose, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Baho o'zgarganda reyting farq bilan yangilanadi (api/signals.py)
+        instance._loaded_stars = instance.__dict__.get('stars')
+        return instance
+
     def __str__(self):
         return f"{self.customer.name} sharhi"
     
@@ -118,6 +388,54 @@ class ContactMessage(models.Model):
         return f"{self.name} - {self.subject}"
 
 
+class AdvertisementQuerySet(models.QuerySet):
+    def active(self, current_date):
+        # Faqat tasdiqlangan, faol va muddati tugamagan, media fayli bor reklamalar
+        return self.filter(
+            status='Tasdiqlangan',
+            is_active=True,
+            start_date__lte=current_date,
+            end_date__gte=current_date,
+            media_file__isnull=False,
+        )
+
+    def sweep(self, current_date):
+        """
+        Reklamalar hayot siklini sanaga moslaydi (manage.py sweep_advertisements):
+
+        - muddati tugagan tasdiqlangan reklamalar ommaviy faolsizlantiriladi - shunda
+          (status, is_active) bo'yicha partial indekslar faqat amaldagi to'plamni qamraydi;
+        - tasdiqlangan va yoqilgan, lekin sanasi yo'q reklamalar (masalan, admin ro'yxatidan
+          list_editable bilan yoqilgan) bugundan boshlab duration_days kunga ishga tushiriladi.
+
+        Kelajakdagi start_date li reklamalar o'zgartirilmaydi: ular active() dagi sana sharti bilan
+        o'z kunida chiqadi. (ishga tushirilgan, faolsizlantirilgan) sonlarini qaytaradi.
+        """
+        with transaction.atomic(using=self.db):
+            expired = self.filter(status='Tasdiqlangan', is_active=True, end_date__lt=current_date).update(
+                is_active=False, updated_at=timezone.now()
+            )
+            started = self.filter(status='Tasdiqlangan', is_active=True).start_pending(current_date)
+        return started, expired
+
+    def start_pending(self, current_date):
+        """
+        Sanasi yo'q reklamalarga start_date=bugun va end_date=bugun+duration_days beradi
+        (qaysilari - chaqiruvchi filtrlaydi). Har bir duration_days qiymati uchun bitta UPDATE
+        (DURATION_CHOICES - 5 ta), ya'ni so'rovlar soni reklamalar soniga bog'liq emas.
+        """
+        pending = self.filter(start_date__isnull=True)
+        started = 0
+        now = timezone.now()
+        for days in pending.order_by().values_list('duration_days', flat=True).distinct():
+            started += pending.filter(duration_days=days).update(
+                start_date=current_date,
+                end_date=current_date + datetime.timedelta(days=days),
+                updated_at=now,
+            )
+        return started
+
+
 class Advertisement(models.Model):
     STATUS_CHOICES = (
         ('Korib chiqilmoqda', 'Korib chiqilmoqda'),
@@ -157,6 +475,24 @@ class Advertisement(models.Model):
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
     admin_notes = models.TextField(blank=True, null=True)
+
+    objects = AdvertisementQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Ochiq reklama endpointlari faqat tasdiqlangan va faol reklamalarni o'qiydi,
+            # shuning uchun indeks faqat shu kichik to'plamni qamraydi (partial index)
+            models.Index(
+                fields=['end_date', 'start_date'],
+                condition=models.Q(status='Tasdiqlangan', is_active=True),
+                name='ad_active_dates_idx',
+            ),
+            models.Index(
+                fields=['ad_type', 'end_date', 'start_date'],
+                condition=models.Q(status='Tasdiqlangan', is_active=True),
+                name='ad_active_type_dates_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.company_name} - {self.ad_type}"
\ No newline at end of file
@@ -0,0 +1,198 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    (maydon, id) juftligi bo'yicha keyset (cursor) paginatsiya.
+
+    OFFSET ishlatilmaydi: har bir sahifa oldingi sahifaning oxirgi qatoridan
+    keyingi `page_size + 1` qatorni indeks bo'yicha o'qiydi, shuning uchun
+    javob vaqti jadval hajmiga bog'liq emas.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """ASGI view lar uchun: sahifa async ORM orqali o'qiladi."""
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.set_page([obj async for obj in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+
+        self.reverse, self.position = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self._invert(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(ordering, self.position))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return min(self.page_size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        View da OrderingFilter bo'lsa (?ordering=), undagi birinchi maydon bo'yicha tartiblaydi.
+        Yagona tartib bo'lishi uchun oxiriga doim id qo'shiladi.
+        """
+        for backend in getattr(view, 'filter_backends', ()):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    field = ordering[0]
+                    return (field, '-id' if field.startswith('-') else 'id')
+        return self.ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self._position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(True, self._position(self.page[0]))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return False, None
+
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            reverse = bool(data['r'])
+            values = data['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self._to_python(field, value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def encode_cursor(self, reverse, position):
+        data = {'r': int(reverse), 'p': position}
+        encoded = b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif value is not None and not isinstance(value, (int, float, str)):
+                value = str(value)
+            position.append(value)
+        return position
+
+    def _to_python(self, field, value):
+        name = field.lstrip('-')
+        try:
+            model_field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        try:
+            value = model_field.to_python(value)
+        except Exception:
+            raise ValueError(value)
+        if value is None:
+            raise ValueError(value)
+        return value
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _after(ordering, position):
+        """
+        (a, b) > (x, y) shartini OR zanjiriga aylantiradi: a > x OR (a = x AND b > y).
+
+        Oldiga qo'shilgan a >= x sharti ma'nosini o'zgartirmaydi, lekin SQL bazaga indeksni
+        boshidan skanerlash o'rniga shu nuqtadan boshlab o'qish (seek) imkonini beradi.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = '%s__lt' % name if field.startswith('-') else '%s__gt' % name
+            condition |= Q(**equal, **{lookup: value})
+            equal[name] = value
+
+        first, value = ordering[0], position[0]
+        name = first.lstrip('-')
+        lookup = '%s__lte' % name if first.startswith('-') else '%s__gte' % name
+        return Q(**{lookup: value}) & condition
+
+
+class CargoCursorPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,95 @@
+"""
+Yuk va haydovchi reytinglari: CargoReview.stars bo'yicha oldindan hisoblangan review_count/rating_sum.
+
+Har bir sharh yozilganda/o'chirilganda yuk va uning hozirgi haydovchisi F() ifodalari bilan
+bitta UPDATE da yangilanadi (o'qish-yozish poygasi yo'q). Haydovchi qiymati - hozir unga
+biriktirilgan yuklarning sharhlari yig'indisi; yuk haydovchisi almashganda qiymatlar ko'chiriladi.
+Nomuvofiqlik (masalan, bazaga to'g'ridan-to'g'ri yozish) `manage.py rebuild_ratings` bilan tuzatiladi.
+"""
+from django.db import transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import Cargo, CargoReview, ChangeCounter, DriverProfile
+
+
+def rating_expression():
+    """O'rtacha baho SQL ifodasi (reyting jadvali tartibi uchun)."""
+    return Cast('rating_sum', FloatField()) / F('review_count')
+
+
+def add_review(cargo_id, count, stars, using=None):
+    """
+    Yuk va uning haydovchisi reytingiga `count` ta sharh va `stars` yulduz qo'shadi (manfiy - ayirish).
+    Sharhlar yuk javobining bir qismi bo'lgani uchun yuk versiyasi (ETag, delta sync) ham oshadi.
+    """
+    with transaction.atomic(using=using, savepoint=False):
+        Cargo.objects.using(using).filter(pk=cargo_id).update(
+            version=ChangeCounter.objects.db_manager(using).advance(Cargo.VERSION_COUNTER),
+            updated_at=timezone.now(),
+            review_count=F('review_count') + count,
+            rating_sum=F('rating_sum') + stars,
+        )
+        if count or stars:
+            # Haydovchi id si yukdan subquery bilan olinadi: alohida SELECT kerak emas
+            DriverProfile.objects.using(using).filter(cargo=cargo_id).update(
+                review_count=F('review_count') + count,
+                rating_sum=F('rating_sum') + stars,
+            )
+
+
+def transfer_ratings(cargo_id, from_driver_id, to_driver_id, using=None):
+    """Yuk boshqa haydovchiga o'tganda uning sharhlarini eski haydovchidan yangisiga ko'chiradi."""
+    cargo = Cargo.objects.using(using).filter(pk=cargo_id)
+    review_count = Subquery(cargo.values('review_count'))
+    rating_sum = Subquery(cargo.values('rating_sum'))
+    profiles = DriverProfile.objects.using(using)
+    with transaction.atomic(using=using, savepoint=False):
+        if from_driver_id is not None:
+            profiles.filter(pk=from_driver_id).update(
+                review_count=F('review_count') - review_count, rating_sum=F('rating_sum') - rating_sum
+            )
+        if to_driver_id is not None:
+            profiles.filter(pk=to_driver_id).update(
+                review_count=F('review_count') + review_count, rating_sum=F('rating_sum') + rating_sum
+            )
+
+
+def _aggregates(reviews, group_by):
+    reviews = reviews.order_by().values(group_by).annotate(count=Count('*'), stars=Sum('stars'))
+    return (
+        Coalesce(Subquery(reviews.values('count')), Value(0)),
+        Coalesce(Subquery(reviews.values('stars')), Value(0)),
+    )
+
+
+def _stale(queryset, group_by):
+    """Saqlangan qiymati sharhlardan hisoblanganiga mos kelmaydigan qatorlar: (pk, count, stars)."""
+    reviews = CargoReview.objects.using(queryset.db).filter(**{group_by: OuterRef('pk')})
+    count, stars = _aggregates(reviews, group_by)
+    return (
+        queryset.annotate(actual_count=count, actual_stars=stars)
+        .exclude(review_count=F('actual_count'), rating_sum=F('actual_stars'))
+        .values_list('pk', 'actual_count', 'actual_stars')
+    )
+
+
+def rebuild_ratings(using=None):
+    """
+    review_count/rating_sum ni sharhlardan qayta hisoblaydi; faqat farq qiladigan qatorlar yoziladi
+    (yuklarda versiya ham oshadi). Tuzatilgan (yuklar, haydovchilar) sonini qaytaradi.
+    """
+    with transaction.atomic(using=using):
+        cargos = list(_stale(Cargo.objects.using(using), 'cargo'))
+        for pk, count, stars in cargos:
+            Cargo.objects.using(using).filter(pk=pk).update(
+                version=ChangeCounter.objects.db_manager(using).advance(Cargo.VERSION_COUNTER),
+                updated_at=timezone.now(),
+                review_count=count,
+                rating_sum=stars,
+            )
+        drivers = list(_stale(DriverProfile.objects.using(using), 'cargo__driver'))
+        for pk, count, stars in drivers:
+            DriverProfile.objects.using(using).filter(pk=pk).update(review_count=count, rating_sum=stars)
+    return len(cargos), len(drivers)
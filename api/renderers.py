@@ -0,0 +1,89 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class _Echo:
+    # csv.writer uchun: yozilgan qatorni saqlamasdan qaytaradi
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Qatorlar oqimini `chunk_rows` tadan bo'laklab kodlaydi: `iter_render` oddiy iterator (WSGI,
+    QuerySet.iterator()), `aiter_render` async iterator (ASGI, QuerySet.aiterator()) uchun.
+    """
+    charset = 'utf-8'
+    chunk_rows = 500
+
+    def start(self, header):
+        """(oqim boshidagi matn, qatorni matnga aylantiruvchi funksiya)"""
+        raise NotImplementedError
+
+    def iter_render(self, header, rows):
+        prefix, format_row = self.start(header)
+        if prefix:
+            yield prefix.encode(self.charset)
+        chunk = []
+        for row in rows:
+            chunk.append(format_row(row))
+            if len(chunk) >= self.chunk_rows:
+                yield ''.join(chunk).encode(self.charset)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk).encode(self.charset)
+
+    async def aiter_render(self, header, rows):
+        prefix, format_row = self.start(header)
+        if prefix:
+            yield prefix.encode(self.charset)
+        chunk = []
+        async for row in rows:
+            chunk.append(format_row(row))
+            if len(chunk) >= self.chunk_rows:
+                yield ''.join(chunk).encode(self.charset)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk).encode(self.charset)
+
+
+class CSVRenderer(StreamingRenderer):
+    """
+    Qatorlar (ketma-ketliklar) oqimini CSV ga aylantiradi. `iter_render` StreamingHttpResponse
+    uchun, `render` esa oddiy Response (masalan xato javoblari) uchun.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def start(self, header):
+        writer = csv.writer(_Echo())
+        return writer.writerow(header), writer.writerow
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            return b''.join(self.iter_render(['field', 'detail'], data.items()))
+        return b''.join(self.iter_render([], data))
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """
+    Har bir qator alohida JSON obyekt, qatorlar yangi satr bilan ajratilgan (application/x-ndjson).
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def start(self, header):
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        return '', lambda row: encoder.encode(dict(zip(header, row))) + '\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = [data]
+        return ''.join(json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for item in data).encode(self.charset)
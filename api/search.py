@@ -0,0 +1,124 @@
+"""
+Yuklar bo'yicha to'liq matnli qidiruv (SQLite FTS5).
+
+`api_cargo_fts` - api_cargo jadvaliga bog'langan (external content) FTS5 jadvali. U
+INSERT/UPDATE/DELETE triggerlari orqali sinxron turadi, shuning uchun bulk_create va
+queryset.update() ham indeksni yangilaydi.
+"""
+import re
+
+from django.db import connection, connections
+from django.db.models import F, FloatField, Lookup, Q, TextField, Value
+
+FTS_TABLE = 'api_cargo_fts'
+FTS_COLUMNS = ('name', 'description', 'origin', 'destination')
+
+_columns = ', '.join(FTS_COLUMNS)
+_new_values = ', '.join('new.%s' % column for column in FTS_COLUMNS)
+_old_values = ', '.join('old.%s' % column for column in FTS_COLUMNS)
+
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({columns}, content='api_cargo', "
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2')".format(table=FTS_TABLE, columns=_columns),
+    "CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON api_cargo BEGIN "
+    "INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new}); END".format(
+        table=FTS_TABLE, columns=_columns, new=_new_values),
+    "CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON api_cargo BEGIN "
+    "INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old}); END".format(
+        table=FTS_TABLE, columns=_columns, old=_old_values),
+    "CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {columns} ON api_cargo BEGIN "
+    "INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+    "INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new}); END".format(
+        table=FTS_TABLE, columns=_columns, old=_old_values, new=_new_values),
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS {table}_ai'.format(table=FTS_TABLE),
+    'DROP TRIGGER IF EXISTS {table}_ad'.format(table=FTS_TABLE),
+    'DROP TRIGGER IF EXISTS {table}_au'.format(table=FTS_TABLE),
+    'DROP TABLE IF EXISTS {table}'.format(table=FTS_TABLE),
+]
+
+
+class FTSMatchField(TextField):
+    """
+    FTS5 jadvalining o'zi nomidagi yashirin ustun: `fts MATCH 'so\'rov'` uchun ishlatiladi.
+    """
+
+
+@FTSMatchField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s MATCH %s' % (lhs, rhs), lhs_params + rhs_params
+
+
+def is_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install_search_index(using=connection):
+    """
+    FTS jadvali va triggerlarni yaratadi (mavjud bo'lsa tegmaydi).
+
+    SQLite da ALTER TABLE o'rniga jadval qayta yaratilganda (Django migratsiyalari shunday qiladi)
+    triggerlar o'chib ketadi, shuning uchun bu funksiya har migratsiyadan keyin chaqiriladi.
+    """
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_search_index(using=connection):
+    if not is_supported(using):
+        return
+    install_search_index(using)
+    with using.cursor() as cursor:
+        cursor.execute("INSERT INTO {table}({table}) VALUES ('rebuild')".format(table=FTS_TABLE))
+
+
+def drop_search_index(using=connection):
+    if not is_supported(using):
+        return
+    with using.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+def build_match_query(text):
+    """
+    Foydalanuvchi matnini xavfsiz FTS5 so'roviga aylantiradi: har bir so'z qo'shtirnoqqa olinadi,
+    so'zlar AND bilan bog'lanadi, oxirgi so'z prefiks (*) bo'yicha qidiriladi (yozish paytida qidiruv).
+    """
+    terms = ['"%s"' % term for term in re.findall(r'\w+', text)]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_cargos(queryset, text):
+    """
+    Qidiruv natijalarini `search_rank` (bm25, kichigi yaxshiroq) bilan annotatsiya qiladi.
+
+    FTS jadvali api_cargo bilan rowid orqali JOIN qilinadi: SQLite avval FTS indeksidan mos
+    qatorlarni topadi, keyin har biri uchun yukni primary key bo'yicha o'qiydi.
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+    if not is_supported(connections[queryset.db]):
+        condition = Q()
+        for term in re.findall(r'\w+', text):
+            term_condition = Q()
+            for column in FTS_COLUMNS:
+                term_condition |= Q(**{'%s__icontains' % column: term})
+            condition &= term_condition
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.filter(search_index__document__match=match).annotate(search_rank=F('search_index__rank'))
@@ -0,0 +1,255 @@
+"""
+Katta hajmdagi sintetik ma'lumotlar (manage.py seed, manage.py benchmark).
+
+Hamma narsa bulk_create bilan partiyalab yoziladi, parol hash i bir marta hisoblanib barcha
+foydalanuvchilarga beriladi (create_user har qator uchun PBKDF2 hisoblardi), tasodifiy qiymatlar
+qat'iy seed li random.Random dan olinadi - bir xil parametrlar bir xil bazani beradi (id va
+vaqt belgilari bundan mustasno: ular ishga tushirilgan vaqtga nisbatan). Xotira partiya hajmiga
+bog'liq: obyektlar generatordan partiya-partiya olinadi, faqat id lar saqlanadi.
+
+Signallar ishlamaydi, shuning uchun ular yuritadigan qiymatlar shu yerda hisoblanadi:
+reyting (review_count/rating_sum), Cargo.version va ChangeCounter. FTS indeksi bazadagi
+trigger lar bilan to'ladi.
+"""
+import contextlib
+import datetime
+import itertools
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Advertisement, Cargo, CargoReview, ChangeCounter, ContactMessage, DriverProfile, User
+
+DEFAULT_PASSWORD = 'seed-password'
+
+# Og'irliklar: ko'p yuk yetkazilgan, bir qismi yo'lda, qolgani haydovchi kutmoqda
+STATUS_WEIGHTS = {'Jarayonda': 30, 'Yolda': 20, 'Yetkazib berilgan': 50}
+VEHICLE_WEIGHTS = {
+    'Tentli': 30, 'Bortli': 20, 'Refrigatorli': 15, 'Samosval': 12, 'Konteyner': 10, 'Ploshadka': 8, 'Shalanda': 5,
+}
+# Transport turi bo'yicha yuk sig'imi (tonna)
+CAPACITIES = {
+    'Tentli': (10, 20, 25), 'Bortli': (5, 10, 15), 'Refrigatorli': (5, 10, 20), 'Samosval': (15, 25, 30),
+    'Konteyner': (20, 25, 30), 'Ploshadka': (20, 30, 40), 'Shalanda': (20, 25),
+}
+STAR_WEIGHTS = {1: 5, 2: 5, 3: 10, 4: 30, 5: 50}
+CITIES = (
+    'Toshkent', 'Samarqand', 'Buxoro', 'Andijon', "Farg'ona", 'Namangan', 'Navoiy', 'Qarshi', 'Termiz',
+    'Nukus', 'Urganch', 'Jizzax', 'Guliston', 'Xiva', 'Olmaliq',
+)
+GOODS = ('Sement', 'Un', 'Meva', 'Sabzavot', 'Mebel', 'Paxta', 'G\'isht', 'Metall', 'Maishiy texnika', 'Kiyim')
+# Reklamalar holati: (status, ulush)
+AD_STATES = {'pending': 15, 'rejected': 10, 'running': 45, 'scheduled': 10, 'expired': 20}
+
+
+@contextlib.contextmanager
+def explicit_timestamps(*models):
+    """
+    auto_now/auto_now_add ni vaqtincha o'chiradi: bulk_create ularni har doim "hozir" bilan
+    to'ldirardi, sintetik yozuvlar esa o'tgan vaqt oralig'iga tarqatiladi.
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class Seeder:
+    """
+    Seeder(users=..., cargos=...).run() - jadvallar bog'liqlik tartibida to'ldiriladi,
+    har bir bosqich tugagach `progress(nom, son)` chaqiriladi. Hammasi bitta tranzaksiyada.
+    """
+
+    def __init__(self, users=10000, drivers=3000, cargos=100000, review_ratio=0.6, contacts=5000,
+                 advertisements=500, days=365, seed=0, batch_size=5000, password=DEFAULT_PASSWORD, progress=None):
+        if drivers > users:
+            raise ValueError("Haydovchilar soni foydalanuvchilar sonidan oshmasligi kerak")
+        self.counts = {'users': users, 'drivers': drivers, 'cargos': cargos, 'contacts': contacts,
+                       'advertisements': advertisements}
+        self.review_ratio = review_ratio
+        self.days = days
+        self.batch_size = batch_size
+        self.password = password
+        self.progress = progress or (lambda name, count: None)
+        self.rng = random.Random(seed)
+        self.now = timezone.now()
+
+    def choice(self, weights):
+        return self.rng.choices(tuple(weights), tuple(weights.values()))[0]
+
+    def moment(self, index, total):
+        """`days` kunlik oraliqda index ga mos vaqt: yozuvlar id tartibida eskidan yangiga."""
+        span = datetime.timedelta(days=self.days).total_seconds()
+        offset = span * (1 - (index + self.rng.random()) / max(total, 1))
+        return self.now - datetime.timedelta(seconds=offset)
+
+    def insert(self, model, objects):
+        ids = []
+        for batch in _batches(objects, self.batch_size):
+            ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        return ids
+
+    def run(self):
+        with transaction.atomic(), explicit_timestamps(User, Cargo, CargoReview, ContactMessage, Advertisement):
+            self.user_ids = self.insert(User, self.generate_users())
+            self.progress('users', len(self.user_ids))
+            driver_users = self.rng.sample(self.user_ids, self.counts['drivers'])
+            self.driver_ids = self.insert(DriverProfile, self.generate_drivers(driver_users))
+            self.progress('drivers', len(self.driver_ids))
+            # RegisterView kabi profil har bir foydalanuvchida bor (/profile/ uni shartsiz o'qiydi)
+            driver_users = set(driver_users)
+            self.insert(DriverProfile, (DriverProfile(user_id=pk) for pk in self.user_ids if pk not in driver_users))
+            reviews = self.seed_cargos()
+            self.progress('cargos', self.counts['cargos'])
+            self.progress('reviews', reviews)
+            self.progress('contacts', len(self.insert(ContactMessage, self.generate_contacts())))
+            self.progress('advertisements', len(self.insert(Advertisement, self.generate_advertisements())))
+
+    def generate_users(self):
+        password = make_password(self.password)
+        for i in range(self.counts['users']):
+            yield User(
+                phone_number='+998%09d' % (900000000 + i),
+                name='Foydalanuvchi %d' % i,
+                email='user%d@seed.example.com' % i,
+                password=password,
+            )
+
+    def generate_drivers(self, user_ids):
+        for user_id in user_ids:
+            vehicle_type = self.choice(VEHICLE_WEIGHTS)
+            yield DriverProfile(
+                user_id=user_id,
+                vehicle_type=vehicle_type,
+                license_type=self.rng.choice(('C', 'CE')),
+                vehicle_capacity=self.rng.choice(CAPACITIES[vehicle_type]),
+                experience=self.rng.randint(0, 25),
+            )
+
+    def seed_cargos(self):
+        """Yuklar va ularning sharhlari partiyalab; reyting qiymatlari yozishdan oldin hisoblanadi."""
+        total = self.counts['cargos']
+        first = ChangeCounter.objects.advance(Cargo.VERSION_COUNTER, total) - total + 1 if total else 0
+        driver_ratings = {}
+        reviews = 0
+        cargos = (self.generate_cargo(i, first + i) for i in range(total))
+        for batch in _batches(cargos, self.batch_size):
+            stars = [self.generate_stars(cargo) for cargo in batch]
+            Cargo.objects.bulk_create(batch)
+            rows = []
+            for cargo, values in zip(batch, stars):
+                for value in values:
+                    rows.append(CargoReview(
+                        cargo_id=cargo.pk, customer_id=cargo.customer_id, comment='Yaxshi haydovchi', stars=value,
+                        created_at=cargo.updated_at,
+                    ))
+                if values and cargo.driver_id is not None:
+                    count, total_stars = driver_ratings.get(cargo.driver_id, (0, 0))
+                    driver_ratings[cargo.driver_id] = (count + len(values), total_stars + sum(values))
+            CargoReview.objects.bulk_create(rows)
+            reviews += len(rows)
+        profiles = [
+            DriverProfile(pk=pk, review_count=count, rating_sum=total_stars)
+            for pk, (count, total_stars) in driver_ratings.items()
+        ]
+        DriverProfile.objects.bulk_update(profiles, DriverProfile.RATING_FIELDS, batch_size=500)
+        return reviews
+
+    def generate_cargo(self, index, version):
+        status = self.choice(STATUS_WEIGHTS)
+        vehicle_type = self.choice(VEHICLE_WEIGHTS)
+        created_at = self.moment(index, self.counts['cargos'])
+        driver_id = None
+        if status != 'Jarayonda' and self.driver_ids:
+            driver_id = self.rng.choice(self.driver_ids)
+        return Cargo(
+            customer_id=self.rng.choice(self.user_ids),
+            driver_id=driver_id,
+            name='%s #%d' % (self.rng.choice(GOODS), index),
+            weight=round(self.rng.uniform(0.5, max(CAPACITIES[vehicle_type])), 1),
+            origin=self.rng.choice(CITIES),
+            destination=self.rng.choice(CITIES),
+            vehicle_type=vehicle_type,
+            status=status,
+            price=Decimal(self.rng.randrange(200, 20000) * 1000),
+            description=self.rng.choice((None, '', "Ehtiyotkorlik bilan tashish kerak", "Yuklash yordami kerak")),
+            created_at=created_at,
+            updated_at=min(self.now, created_at + datetime.timedelta(days=self.rng.randint(0, 5))),
+            version=version,
+        )
+
+    def generate_stars(self, cargo):
+        """Yetkazilgan yuklarning `review_ratio` qismiga 1-2 ta sharh; yukning reyting qiymatlari ham beriladi."""
+        if cargo.status != 'Yetkazib berilgan' or self.rng.random() >= self.review_ratio:
+            return []
+        values = [self.choice(STAR_WEIGHTS) for _ in range(self.rng.choice((1, 1, 1, 2)))]
+        cargo.review_count, cargo.rating_sum = len(values), sum(values)
+        return values
+
+    def generate_contacts(self):
+        total = self.counts['contacts']
+        for i in range(total):
+            yield ContactMessage(
+                name='Mijoz %d' % i,
+                email='contact%d@seed.example.com' % i,
+                phone_number='+998%09d' % self.rng.randrange(900000000, 1000000000),
+                subject=self.rng.choice(('Savol', 'Taklif', 'Shikoyat', 'Hamkorlik')),
+                message='Assalomu alaykum, yuk tashish bo\'yicha savolim bor.',
+                status=self.rng.choice([value for value, _ in ContactMessage.STATUS_CHOICES]),
+                created_at=self.moment(i, total),
+            )
+
+    def generate_advertisements(self):
+        """
+        Sana oralig'i holatga mos: ko'rib chiqilayotgan va rad etilganlarda sana yo'q, amaldagilarda
+        start_date <= bugun <= end_date, rejalashtirilganlar kelajakda, muddati o'tganlar faolsizlantirilgan.
+        """
+        total = self.counts['advertisements']
+        today = self.now.date()
+        ad_types = [value for value, _ in Advertisement.TYPE_CHOICES]
+        durations = [value for value, _ in Advertisement.DURATION_CHOICES]
+        for i in range(total):
+            state = self.choice(AD_STATES)
+            duration = self.rng.choice(durations)
+            created_at = self.moment(i, total)
+            ad = Advertisement(
+                company_name='Kompaniya %d' % i,
+                ad_type=self.rng.choice(ad_types),
+                duration_days=duration,
+                phone_number='+998%09d' % self.rng.randrange(900000000, 1000000000),
+                description='Kompaniya xizmatlari reklamasi',
+                status='Korib chiqilmoqda',
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            if state == 'rejected':
+                ad.status = 'Rad etilgan'
+            elif state != 'pending':
+                if state == 'running':
+                    start = today - datetime.timedelta(days=self.rng.randint(0, duration - 1))
+                elif state == 'scheduled':
+                    start = today + datetime.timedelta(days=self.rng.randint(1, 14))
+                else:
+                    start = today - datetime.timedelta(days=duration + self.rng.randint(1, 60))
+                ad.status = 'Tasdiqlangan'
+                ad.is_active = state != 'expired'
+                ad.media_file = 'advertisements/seed-%d.mp4' % (i % 20)
+                ad.start_date, ad.end_date = start, start + datetime.timedelta(days=duration)
+            yield ad
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from .metrics import TimedSerializerMixin
 from .models import User, DriverProfile, Cargo, CargoReview, Advertisement, ContactMessage
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'name', 'phone_number', 'email', 'password']
@@ -16,36 +17,78 @@ class UserSerializer(serializers.ModelSerializer):
         )
         return user
 
-class DriverProfileSerializer(serializers.ModelSerializer):
+class DriverProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = DriverProfile
-        fields = ['id', 'user', 'profile_picture', 'vehicle_type', 'license_type', 'vehicle_capacity', 'experience']
+        fields = ['id', 'user', 'profile_picture', 'thumbnails', 'vehicle_type', 'license_type', 'vehicle_capacity',
+                  'experience', 'review_count', 'rating']
+        read_only_fields = ['review_count']
+
+    def get_thumbnails(self, profile):
+        """{'64': {'jpeg': url, 'webp': url}, ...}; fon worker i tugatmaguncha bo'sh."""
+        if not profile.profile_picture:
+            return {}
+        storage = profile.profile_picture.storage
+        request = self.context.get('request')
+        result = {}
+        for size, names in profile.thumbnails.items():
+            urls = {name: storage.url(path) for name, path in names.items()}
+            if request is not None:
+                urls = {name: request.build_absolute_uri(url) for name, url in urls.items()}
+            result[size] = urls
+        return result
 
-class CargoReviewSerializer(serializers.ModelSerializer):
+class CargoReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     customer = UserSerializer(read_only=True)
     class Meta:
         model = CargoReview
         fields = ['id', 'cargo', 'customer', 'comment', 'stars', 'created_at']
 
-class CargoSerializer(serializers.ModelSerializer):
+class CargoSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     driver = DriverProfileSerializer(read_only=True)
     reviews = CargoReviewSerializer(many=True, read_only=True)
     customer = UserSerializer(read_only=True)
 
     class Meta:
         model = Cargo
-        fields = ['id', 'customer', 'driver', 'name', 'weight', 'origin', 'destination', 'vehicle_type', 'status', 'created_at', 'reviews', 'price', 'description']
+        fields = ['id', 'customer', 'driver', 'name', 'weight', 'origin', 'destination', 'vehicle_type', 'status', 'created_at', 'reviews', 'price', 'description',
+                  'updated_at', 'version', 'review_count', 'rating']
+        read_only_fields = ['updated_at', 'version', 'review_count']
+        expandable_fields = ['customer', 'driver', 'reviews']
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        """
+        fields - faqat shu maydonlarni qaytarish (?fields=)
+        expand - nested ko'rinishda qaytariladigan bog'lanishlar (?expand=); qolganlari faqat id
+        """
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if expand is not None:
+            for name in self.Meta.expandable_fields:
+                if name in self.fields and name not in expand:
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=name == 'reviews')
+
+    def update(self, instance, validated_data):
+        # Faqat o'zgargan ustunlar yoziladi, aks holda parallel band qilish (driver, status) ustidan yozib yuborilardi
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
 
 
 # serializers.py ga qo'shilishi kerak
-class ContactMessageSerializer(serializers.ModelSerializer):
+class ContactMessageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ContactMessage
         fields = ['id', 'name', 'email', 'phone_number', 'subject', 'message', 'created_at']
         read_only_fields = ['status']
 
-class AdvertisementSerializer(serializers.ModelSerializer):
+class AdvertisementSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Advertisement
         fields = ['id', 'company_name', 'ad_type', 'duration_days', 'phone_number', 'description', 
@@ -53,13 +96,13 @@ class AdvertisementSerializer(serializers.ModelSerializer):
         read_only_fields = ['status', 'is_active', 'media_file', 'start_date', 'end_date']
 
 
-class AdvertisementCreateSerializer(serializers.ModelSerializer):
+class AdvertisementCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Advertisement
         fields = ['company_name', 'ad_type', 'duration_days', 'phone_number', 'description']
 
 
-class AdminAdvertisementSerializer(serializers.ModelSerializer):
+class AdminAdvertisementSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Advertisement
         fields = ['id', 'company_name', 'ad_type', 'duration_days', 'phone_number', 'description', 
@@ -0,0 +1,86 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .cache import invalidate_advertisements
+from .events import record_cargo_event
+from .models import Advertisement, Cargo, CargoReview, CargoTombstone, ChangeCounter, User
+from .ratings import add_review, transfer_ratings
+from .search import install_search_index
+
+
+@receiver(post_save, sender=Advertisement)
+@receiver(post_delete, sender=Advertisement)
+def advertisement_changed(sender, **kwargs):
+    invalidate_advertisements()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, using, update_fields=None, **kwargs):
+    # Faolsizlantirish, parol almashtirish va boshqa o'zgarishlar keshdagi eski nusxani bekor qiladi
+    # (commit dan keyin yana bir marta: parallel so'rov eski qatorni qayta keshlab qo'ymasligi uchun)
+    if not created:
+        token_cache.delete_user(instance.pk)
+        transaction.on_commit(lambda: token_cache.delete_user(instance.pk))
+    public = tuple(getattr(instance, name) for name in User.PUBLIC_FIELDS)
+    if not created and (update_fields is None or set(update_fields) & set(User.PUBLIC_FIELDS)):
+        if getattr(instance, '_loaded_public', None) != public:
+            # Muallif sharhlar ichida yuk javobiga kiradi: o'sha yuklarning versiyasi (ETag) oshadi
+            Cargo.objects.using(using).filter(reviews__customer=instance).advance_versions()
+    instance._loaded_public = public
+
+
+@receiver(post_save, sender=Cargo)
+def cargo_saved(sender, instance, created, using, update_fields=None, **kwargs):
+    # Haydovchi yukni olishi (shartli UPDATE) va bulk_create signal yubormaydi, ular views.py da yoziladi
+    if created:
+        record_cargo_event('created', instance)
+    elif update_fields is None or 'status' in update_fields:
+        previous = getattr(instance, '_loaded_status', None)
+        if previous is not None and previous != instance.status:
+            record_cargo_event('status_changed', instance)
+    instance._loaded_status = instance.status
+    if not created and (update_fields is None or 'driver' in update_fields):
+        # Haydovchi almashdi (admin): yuk sharhlari reytingi yangi haydovchiga o'tadi
+        previous = getattr(instance, '_loaded_driver_id', instance.driver_id)
+        if previous != instance.driver_id:
+            transfer_ratings(instance.pk, previous, instance.driver_id, using)
+    instance._loaded_driver_id = instance.driver_id
+
+
+@receiver(post_delete, sender=Cargo)
+def cargo_deleted(sender, instance, using, **kwargs):
+    record_cargo_event('deleted', instance)
+    # O'chirish tranzaksiyasi ichida: delta sync mijozlari uchun iz
+    CargoTombstone.objects.using(using).create(
+        cargo_id=instance.pk,
+        customer_id=instance.customer_id,
+        version=ChangeCounter.objects.db_manager(using).advance(Cargo.VERSION_COUNTER),
+    )
+
+
+@receiver(post_save, sender=CargoReview)
+def cargo_review_saved(sender, instance, created, using, **kwargs):
+    previous = getattr(instance, '_loaded_stars', None)
+    if created:
+        add_review(instance.cargo_id, 1, instance.stars, using)
+    else:
+        add_review(instance.cargo_id, 0, 0 if previous is None else instance.stars - previous, using)
+    instance._loaded_stars = instance.stars
+
+
+@receiver(post_delete, sender=CargoReview)
+def cargo_review_deleted(sender, instance, using, **kwargs):
+    add_review(instance.cargo_id, -1, -getattr(instance, '_loaded_stars', instance.stars), using)
+
+
+def ensure_search_index(sender, using, **kwargs):
+    # SQLite jadvalni qayta yaratganda FTS triggerlari yo'qoladi; har migratsiyadan keyin tiklaymiz
+    install_search_index(connections[using])
@@ -1,3 +1,1839 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import json
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import urls as api_urls
+from .admin import AdvertisementAdmin, EstimatedCountPaginator
+from .benchmark import compare, get_scenarios, prepare, profile, seed
+from .async_views import AsyncCargoDetailView, AsyncCargoExportView, AsyncCargoListView
+from .events import bus
+from .loadgen import build_request
+from .media import serve_media
+from .metrics import registry
+from .authentication import CachedTokenAuthentication, TokenCache, _cache_settings, token_cache
+from .cache import cached_advertisements
+from .models import (
+    User, DriverProfile, Cargo, CargoEvent, CargoReview, CargoTombstone, ChangeCounter, Advertisement, ContactMessage,
+)
+from .pagination import CargoCursorPagination
+from .ratings import rebuild_ratings
+from .renderers import NDJSONRenderer
+from .seed import Seeder
+from .serializers import CargoSerializer
+from .throttling import IPTokenBucketThrottle
+from .thumbnails import delete_thumbnails, generate_thumbnails, thumbnail_paths
+from .views import CargoBulkCreateView, LoginView
+
+
+def create_user(phone_number='+998901234567', profile=None, **extra_fields):
+    extra_fields.setdefault('name', 'Test')
+    extra_fields.setdefault('email', '%s@example.com' % phone_number.lstrip('+'))
+    user = User.objects.create_user(phone_number=phone_number, password='parol12345', **extra_fields)
+    DriverProfile.objects.create(user=user, **(profile or {}))
+    return user
+
+
+def auth_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+    return client
+
+
+class CargoPaginationTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = auth_client(self.user)
+        Cargo.objects.bulk_create([
+            Cargo(customer=self.user, name='Yuk %d' % i, weight=i + 1) for i in range(25)
+        ])
+        self.url = reverse('cargo-list-create')
+
+    def test_first_page_is_newest_first(self):
+        response = self.client.get(self.url, {'page_size': 10})
+        self.assertEqual(response.status_code, 200)
+        ids = [row['id'] for row in response.data['results']]
+        expected = list(Cargo.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:10])
+        self.assertEqual(ids, expected)
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_walks_all_pages_forward_and_back(self):
+        seen = []
+        url = self.url + '?page_size=10'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            pages.append(response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+        response = self.client.get(pages[-1]['previous'])
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [row['id'] for row in pages[-2]['results']],
+        )
+
+    def test_page_size_is_capped(self):
+        Cargo.objects.bulk_create([
+            Cargo(customer=self.user, name='Yuk', weight=1) for _ in range(120)
+        ])
+        response = self.client.get(self.url, {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'notacursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Har bir endpoint uchun SQL so'rovlar soni qator soniga bog'liq bo'lmasligi kerak.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.customer = create_user('+998901111111')
+        self.driver = create_user('+998902222222')
+        self.client = auth_client(self.customer)
+
+    def create_cargos(self, count):
+        profile = self.driver.driverprofile
+        for i in range(count):
+            cargo = Cargo.objects.create(customer=self.customer, driver=profile, name='Yuk %d' % i, weight=10)
+            CargoReview.objects.create(cargo=cargo, customer=self.customer, comment='Yaxshi', stars=5)
+            CargoReview.objects.create(cargo=cargo, customer=self.driver, comment="Zo'r", stars=4)
+        return cargo
+
+    def assertMaxQueries(self, budget, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = func(*args, **kwargs)
+        self.assertLessEqual(
+            len(context.captured_queries), budget,
+            '\n'.join(query['sql'] for query in context.captured_queries)
+        )
+        return response
+
+    def test_cargo_list(self):
+        self.create_cargos(15)
+        response = self.assertMaxQueries(3, self.client.get, reverse('cargo-list-create'))
+        self.assertEqual(len(response.data['results']), 15)
+        self.assertEqual(len(response.data['results'][0]['reviews']), 2)
+
+    def test_cargo_detail(self):
+        cargo = self.create_cargos(1)
+        response = self.assertMaxQueries(3, self.client.get, reverse('cargo-detail', args=[cargo.pk]))
+        self.assertEqual(response.data['driver']['user']['id'], self.driver.pk)
+
+    def test_cargo_create(self):
+        # token + versiya + INSERT + hodisa raqami + CargoEvent INSERT + reviews
+        self.assertMaxQueries(6, self.client.post, reverse('cargo-list-create'), {'name': 'Yangi', 'weight': 3})
+
+    def test_cargo_update(self):
+        cargo = self.create_cargos(1)
+        # token + yuk + reviews + profil + versiya + UPDATE
+        self.assertMaxQueries(
+            6, self.client.put, reverse('cargo-detail', args=[cargo.pk]), {'name': 'Yangi nom'}, format='json'
+        )
+
+    def test_profile(self):
+        self.assertMaxQueries(2, self.client.get, reverse('profile'))
+
+    def test_review_create(self):
+        cargo = self.create_cargos(1)
+        # token + yuk tekshiruvi + INSERT + yuk versiyasi (hisoblagich) + yuk va haydovchi reytingi UPDATE
+        self.assertMaxQueries(
+            6, self.client.post, reverse('review-create'),
+            {'cargo': cargo.pk, 'comment': 'Rahmat', 'stars': 5}, format='json'
+        )
+
+    def test_active_advertisements(self):
+        today = timezone.now().date()
+        for i in range(5):
+            Advertisement.objects.create(
+                company_name='Kompaniya %d' % i, ad_type='Native', phone_number='+998900000000',
+                description='Reklama', status='Tasdiqlangan', is_active=True,
+                start_date=today, end_date=today, media_file='advertisements/a.mp4',
+            )
+        client = APIClient()
+        response = self.assertMaxQueries(1, client.get, reverse('active-ads'))
+        self.assertEqual(len(response.json()), 5)
+        self.assertMaxQueries(1, client.get, reverse('ads-by-type', args=['Native']))
+
+
+class CargoSparseFieldsTests(TestCase):
+    def setUp(self):
+        self.customer = create_user('+998901111111')
+        self.driver = create_user('+998902222222')
+        self.client = auth_client(self.customer)
+        self.cargo = Cargo.objects.create(
+            customer=self.customer, driver=self.driver.driverprofile, name='Olma', weight=5
+        )
+        self.review = CargoReview.objects.create(cargo=self.cargo, customer=self.customer, comment='Yaxshi', stars=5)
+
+    def test_default_response_is_fully_expanded(self):
+        response = self.client.get(reverse('cargo-detail', args=[self.cargo.pk]))
+        self.assertEqual(response.data['driver']['user']['id'], self.driver.pk)
+        self.assertEqual(response.data['reviews'][0]['customer']['id'], self.customer.pk)
+
+    def test_fields_limits_keys_and_columns(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('cargo-list-create'), {'fields': 'id,name,weight'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name', 'weight'})
+        cargo_sql = [q['sql'] for q in context.captured_queries if 'FROM "api_cargo"' in q['sql']]
+        self.assertEqual(len(cargo_sql), 1)
+        self.assertNotIn('"api_cargo"."description"', cargo_sql[0])
+        self.assertNotIn('JOIN', cargo_sql[0])
+        self.assertFalse(any('api_cargoreview' in q['sql'] for q in context.captured_queries))
+
+    def test_fields_include_ordering_column(self):
+        Cargo.objects.bulk_create([Cargo(customer=self.customer, name='Yuk %d' % i, weight=i) for i in range(4)])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                reverse('cargo-list-create'), {'fields': 'id,name', 'ordering': 'weight', 'page_size': 2}
+            )
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+        self.assertIsNotNone(response.data['next'])
+        # token + sahifa: kursor uchun weight qatorma-qator alohida o'qilmaydi
+        self.assertEqual(len(context.captured_queries), 2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['name'] for row in response.data['results']], ['Yuk 2', 'Yuk 3'])
+
+    def test_unexpanded_relations_are_ids(self):
+        response = self.client.get(
+            reverse('cargo-detail', args=[self.cargo.pk]), {'fields': 'id,driver,customer,reviews'}
+        )
+        self.assertEqual(response.data['driver'], self.driver.driverprofile.pk)
+        self.assertEqual(response.data['customer'], self.customer.pk)
+        self.assertEqual(response.data['reviews'], [self.review.pk])
+
+    def test_expand_only_joins_requested_relation(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('cargo-list-create'), {'expand': 'driver'})
+        row = response.data['results'][0]
+        self.assertEqual(row['driver']['user']['id'], self.driver.pk)
+        self.assertEqual(row['customer'], self.customer.pk)
+        self.assertEqual(row['reviews'], [self.review.pk])
+        self.assertEqual(len(context.captured_queries), 3)
+
+    def test_fields_with_expanded_relation(self):
+        response = self.client.get(
+            reverse('cargo-detail', args=[self.cargo.pk]), {'fields': 'id,driver', 'expand': 'driver'}
+        )
+        self.assertEqual(set(response.data), {'id', 'driver'})
+        self.assertEqual(response.data['driver']['user']['id'], self.driver.pk)
+
+
+def create_advertisement(**fields):
+    today = timezone.now().date()
+    fields.setdefault('company_name', 'Kompaniya')
+    fields.setdefault('ad_type', 'Native')
+    fields.setdefault('phone_number', '+998900000000')
+    fields.setdefault('description', 'Reklama')
+    fields.setdefault('status', 'Tasdiqlangan')
+    fields.setdefault('is_active', True)
+    fields.setdefault('start_date', today)
+    fields.setdefault('end_date', today + datetime.timedelta(days=3))
+    fields.setdefault('media_file', 'advertisements/a.mp4')
+    return Advertisement.objects.create(**fields)
+
+
+class AdvertisementCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ad = create_advertisement()
+
+    def test_repeat_requests_are_served_from_cache(self):
+        first = self.client.get(reverse('active-ads'))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('active-ads'))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+        self.assertEqual(second.json()[0]['id'], self.ad.pk)
+
+    def test_by_type_is_cached_per_type(self):
+        self.client.get(reverse('ads-by-type', args=['Native']))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('ads-by-type', args=['Boost']))
+        self.assertEqual(response.json(), [])
+
+    def test_save_invalidates(self):
+        self.client.get(reverse('active-ads'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ad.company_name = 'Yangi nom'
+            self.ad.save()
+        response = self.client.get(reverse('active-ads'))
+        self.assertEqual(response.json()[0]['company_name'], 'Yangi nom')
+
+    def test_admin_update_actions_invalidate(self):
+        self.client.get(reverse('active-ads'))
+        admin = AdvertisementAdmin(Advertisement, AdminSite())
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.deactivate_advertisements(None, Advertisement.objects.all())
+        self.assertEqual(self.client.get(reverse('active-ads')).json(), [])
+
+    def test_date_is_part_of_key(self):
+        today = timezone.now().date()
+        calls = []
+
+        def render():
+            calls.append(1)
+            return b'[]'
+
+        cached_advertisements(None, today, render)
+        cached_advertisements(None, today, render)
+        cached_advertisements(None, today + datetime.timedelta(days=1), render)
+        self.assertEqual(len(calls), 2)
+
+
+class QueryPlanTests(TestCase):
+    """
+    Asosiy so'rovlar to'liq jadval skaneri (SCAN <jadval>) o'rniga indeksdan foydalanishini tekshiradi.
+    """
+
+    def setUp(self):
+        self.user = create_user()
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, queryset, index_name=None):
+        plan = self.explain(queryset)
+        table = queryset.model._meta.db_table
+        for detail in plan:
+            if detail.startswith('SCAN %s' % table) or detail.startswith('SEARCH %s' % table):
+                self.assertIn('USING', detail, plan)
+        self.assertFalse(any('TEMP B-TREE' in detail for detail in plan), plan)
+        if index_name:
+            self.assertTrue(any(index_name in detail for detail in plan), plan)
+
+    def test_cargo_list(self):
+        self.assertUsesIndex(Cargo.objects.order_by('-created_at', '-id')[:21], 'cargo_created_id_idx')
+
+    def test_cargo_list_by_status(self):
+        queryset = Cargo.objects.filter(status='Yolda').order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'cargo_status_created_idx')
+
+    def test_cargo_list_by_vehicle_type(self):
+        queryset = Cargo.objects.filter(vehicle_type='Tentli', status='Jarayonda').order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'cargo_vehicle_status_idx')
+
+    def test_cargo_list_by_customer(self):
+        queryset = Cargo.objects.filter(customer=self.user).order_by('-created_at', '-id')[:21]
+        self.assertUsesIndex(queryset, 'cargo_customer_created_idx')
+
+    def test_cargo_by_driver(self):
+        queryset = Cargo.objects.filter(driver=self.user.driverprofile, status='Yolda')
+        self.assertUsesIndex(queryset, 'cargo_driver_status_idx')
+
+    def test_cargo_changes(self):
+        self.assertUsesIndex(Cargo.objects.filter(version__gt=10).order_by('version')[:101], 'cargo_version_idx')
+        self.assertUsesIndex(CargoTombstone.objects.filter(version__gt=10).order_by('version')[:101])
+
+    def test_active_advertisements(self):
+        today = timezone.now().date()
+        self.assertUsesIndex(Advertisement.objects.active(today), 'ad_active_dates_idx')
+        self.assertUsesIndex(Advertisement.objects.active(today).filter(ad_type='Boost'), 'ad_active_type_dates_idx')
+
+    def test_advertisement_sweep(self):
+        today = timezone.now().date()
+        expired = Advertisement.objects.filter(status='Tasdiqlangan', is_active=True, end_date__lt=today)
+        self.assertUsesIndex(expired, 'ad_active_dates_idx')
+
+    def test_driver_matches(self):
+        profile = DriverProfile(vehicle_type='Tentli', vehicle_capacity=10)
+        self.assertUsesIndex(Cargo.objects.matching(profile)[:20], 'cargo_open_match_idx')
+
+    def test_cargo_next_page_seeks_index(self):
+        position = [timezone.now(), 10]
+        queryset = Cargo.objects.filter(
+            CargoCursorPagination._after(('-created_at', '-id'), position)
+        ).order_by('-created_at', '-id')[:21]
+        plan = self.explain(queryset)
+        self.assertTrue(any(d.startswith('SEARCH api_cargo USING INDEX cargo_created_id_idx') for d in plan), plan)
+
+
+class CargoFilterTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.other = create_user('+998903333333')
+        self.client = auth_client(self.user)
+        Cargo.objects.bulk_create([
+            Cargo(customer=self.user, name='A', weight=5, vehicle_type='Tentli', status='Jarayonda', origin='Toshkent'),
+            Cargo(customer=self.user, name='B', weight=15, vehicle_type='Bortli', status='Yolda', origin='Toshkent'),
+            Cargo(customer=self.other, name='C', weight=25, vehicle_type='Tentli', status='Yolda', origin='Samarqand'),
+            Cargo(customer=self.other, name='D', weight=35, vehicle_type='Samosval', status='Jarayonda', price=100),
+        ])
+        self.url = reverse('cargo-list-create')
+
+    def names(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['name'] for row in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(sorted(self.names({'status': 'Yolda'})), ['B', 'C'])
+        self.assertEqual(sorted(self.names({'vehicle_type__in': 'Tentli,Samosval'})), ['A', 'C', 'D'])
+        self.assertEqual(sorted(self.names({'weight__gte': 10, 'weight__lte': 30})), ['B', 'C'])
+        self.assertEqual(self.names({'price__gte': 50}), ['D'])
+        self.assertEqual(sorted(self.names({'customer': self.other.pk})), ['C', 'D'])
+        self.assertEqual(sorted(self.names({'origin': 'Toshkent', 'status': 'Jarayonda'})), ['A'])
+        self.assertEqual(len(self.names({'driver__isnull': True})), 4)
+
+    def test_invalid_filter_value(self):
+        response = self.client.get(self.url, {'weight__gte': 'og\'ir'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ordering_with_pagination(self):
+        self.assertEqual(self.names({'ordering': 'weight'}), ['A', 'B', 'C', 'D'])
+        response = self.client.get(self.url, {'ordering': '-weight', 'page_size': 3})
+        self.assertEqual([row['name'] for row in response.data['results']], ['D', 'C', 'B'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['name'] for row in response.data['results']], ['A'])
+
+    def test_ordering_is_whitelisted(self):
+        self.assertEqual(self.names({'ordering': 'price'}), self.names({}))
+
+
+class CargoSearchTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = auth_client(self.user)
+        self.url = reverse('cargo-list-create')
+        self.apples = Cargo.objects.create(
+            customer=self.user, name='Olma', description='Qizil olma, olma yashiklarda', weight=5,
+            origin='Namangan', destination='Toshkent',
+        )
+        self.cement = Cargo.objects.create(
+            customer=self.user, name='Sement', description='Qoplarda', weight=20,
+            origin='Toshkent', destination='Samarqand',
+        )
+
+    def search(self, text, **params):
+        response = self.client.get(self.url, dict(params, q=text))
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['id'] for row in response.data['results']]
+
+    def test_matches_all_columns(self):
+        self.assertEqual(self.search('olma'), [self.apples.pk])
+        self.assertEqual(self.search('samarqand'), [self.cement.pk])
+        self.assertEqual(sorted(self.search('toshkent')), sorted([self.apples.pk, self.cement.pk]))
+        self.assertEqual(self.search('ol'), [self.apples.pk])
+        self.assertEqual(self.search('"), (*'), [])
+
+    def test_ranked_by_relevance(self):
+        Cargo.objects.create(customer=self.user, name='Aralash', description='Olma', weight=1)
+        self.assertEqual(self.search('olma')[0], self.apples.pk)
+
+    def test_combined_with_filters_and_pages(self):
+        for i in range(5):
+            Cargo.objects.create(customer=self.user, name='Olma %d' % i, weight=i + 1, status='Yolda')
+        ids = self.search('olma', status='Yolda', page_size=3)
+        self.assertEqual(len(ids), 3)
+        response = self.client.get(self.url, {'q': 'olma', 'status': 'Yolda', 'page_size': 3})
+        next_ids = [row['id'] for row in self.client.get(response.data['next']).data['results']]
+        self.assertEqual(len(next_ids), 2)
+        self.assertFalse(set(ids) & set(next_ids))
+
+    def test_ordering_is_rejected(self):
+        response = self.client.get(self.url, {'q': 'olma', 'ordering': 'weight'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.data)
+        self.assertEqual(self.search('olma', ordering=''), [self.apples.pk])
+
+    def test_index_follows_update_and_delete(self):
+        Cargo.objects.filter(pk=self.cement.pk).update(name='Gisht')
+        self.assertEqual(self.search('sement'), [])
+        self.assertEqual(self.search('gisht'), [self.cement.pk])
+        self.apples.delete()
+        self.assertEqual(self.search('olma'), [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO api_cargo_fts(api_cargo_fts) VALUES ('delete-all')")
+        self.assertEqual(self.search('olma'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('olma'), [self.apples.pk])
+
+
+class CargoMatchesTests(TestCase):
+    def setUp(self):
+        self.customer = create_user('+998901111111')
+        self.driver = create_user('+998902222222', profile={'vehicle_type': 'Tentli', 'vehicle_capacity': 10})
+        self.client = auth_client(self.driver)
+        self.url = reverse('cargo-matches')
+
+    def create(self, name, **fields):
+        fields.setdefault('vehicle_type', 'Tentli')
+        fields.setdefault('weight', 5)
+        return Cargo.objects.create(customer=self.customer, name=name, **fields)
+
+    def test_returns_fitting_open_cargos_ranked(self):
+        cheap = self.create('Arzon', price=100)
+        expensive = self.create('Qimmat', price=500)
+        no_price = self.create('Narxsiz')
+        newer_cheap = self.create('Yangi arzon', price=100)
+        self.create('Og\'ir', weight=11, price=1000)
+        self.create('Boshqa transport', vehicle_type='Samosval', price=1000)
+        self.create('Yolda', status='Yolda', price=1000)
+        self.create('Band', driver=self.customer.driverprofile, price=1000)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row['id'] for row in response.data],
+            [expensive.pk, newer_cheap.pk, cheap.pk, no_price.pk],
+        )
+
+    def test_limit(self):
+        for i in range(5):
+            self.create('Yuk %d' % i)
+        self.assertEqual(len(self.client.get(self.url, {'limit': 2}).data), 2)
+        self.assertEqual(len(self.client.get(self.url, {'limit': 'abc'}).data), 5)
+
+    def test_profile_without_vehicle(self):
+        response = auth_client(self.customer).get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+
+class CargoClaimTests(TestCase):
+    def setUp(self):
+        self.customer = create_user('+998901111111')
+        self.driver = create_user('+998902222222')
+        self.cargo = Cargo.objects.create(customer=self.customer, name='Olma', weight=5)
+        self.url = reverse('cargo-detail', args=[self.cargo.pk])
+
+    def test_claim_updates_only_driver_and_status(self):
+        with CaptureQueriesContext(connection) as context:
+            response = auth_client(self.driver).put(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'Yolda')
+        self.assertEqual(response.data['driver']['id'], self.driver.driverprofile.pk)
+        updates = [q['sql'] for q in context.captured_queries if q['sql'].startswith('UPDATE "api_cargo"')]
+        # Shartli band qilish va (yutgandan keyin) versiya
+        self.assertEqual(len(updates), 2)
+        self.assertFalse(any('"name"' in sql for sql in updates))
+
+    def test_losing_claim_keeps_version_counter(self):
+        auth_client(self.driver).put(self.url, {}, format='json')
+        counter = ChangeCounter.objects.get(name=Cargo.VERSION_COUNTER).value
+        response = auth_client(create_user('+998903333333')).put(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(ChangeCounter.objects.get(name=Cargo.VERSION_COUNTER).value, counter)
+
+    def test_customer_edits_own_cargo(self):
+        client = auth_client(self.customer)
+        response = client.put(self.url, {'name': 'Nok'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['driver'])
+        # Status "Jarayonda" bo'lmagan, haydovchisiz yuk ham tahrirlanadi (409 emas)
+        Cargo.objects.filter(pk=self.cargo.pk).update(status='Yetkazib berilgan')
+        response = client.put(self.url, {'name': 'Uzum'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Uzum')
+        self.assertEqual(auth_client(self.driver).put(self.url, {}, format='json').status_code, 409)
+
+    def test_second_claim_conflicts(self):
+        auth_client(self.driver).put(self.url, {}, format='json')
+        other = create_user('+998903333333')
+        response = auth_client(other).put(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.cargo.refresh_from_db()
+        self.assertEqual(self.cargo.driver_id, self.driver.driverprofile.pk)
+
+    def test_customer_edit_does_not_overwrite_claim(self):
+        Cargo.objects.filter(pk=self.cargo.pk).update(driver=self.driver.driverprofile)
+        stale = Cargo.objects.get(pk=self.cargo.pk)
+        Cargo.objects.filter(pk=self.cargo.pk).update(driver=None)
+        serializer = CargoSerializer(stale, data={'name': 'Nok'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        Cargo.objects.filter(pk=self.cargo.pk).update(driver=self.customer.driverprofile)
+        serializer.save()
+        self.cargo.refresh_from_db()
+        self.assertEqual(self.cargo.name, 'Nok')
+        self.assertEqual(self.cargo.driver_id, self.customer.driverprofile.pk)
+
+
+class ConcurrentCargoClaimTests(TransactionTestCase):
+    drivers = 12
+
+    def test_exactly_one_parallel_claim_wins(self):
+        customer = create_user('+998901111111')
+        cargo = Cargo.objects.create(customer=customer, name='Olma', weight=5)
+        clients = [auth_client(create_user('+99890%07d' % (i + 10))) for i in range(self.drivers)]
+        url = reverse('cargo-detail', args=[cargo.pk])
+        barrier = threading.Barrier(self.drivers)
+        results = []
+
+        def claim(client):
+            try:
+                barrier.wait()
+                results.append(client.put(url, {}, format='json').status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=claim, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), [200] + [409] * (self.drivers - 1))
+        cargo.refresh_from_db()
+        self.assertEqual(cargo.status, 'Yolda')
+        self.assertIsNotNone(cargo.driver_id)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user()
+        self.client = auth_client(self.user)
+        self.url = reverse('profile')
+
+    def test_repeat_requests_skip_token_query(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('authtoken_token' in q['sql'] for q in context.captured_queries))
+
+    def test_token_deletion_invalidates(self):
+        self.client.get(self.url)
+        Token.objects.filter(user=self.user).delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivation_invalidates(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_password_change_invalidates(self):
+        self.client.get(self.url)
+        self.assertEqual(len(token_cache), 1)
+        self.user.set_password('yangi-parol-123')
+        self.user.save()
+        self.assertEqual(len(token_cache), 0)
+
+    def test_lru_and_ttl(self):
+        now = [0]
+        cache = TokenCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.set('a', self.user, 'token-a')
+        cache.set('b', self.user, 'token-b')
+        cache.get('a')
+        cache.set('c', self.user, 'token-c')
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        now[0] = 11
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('c'))
+
+    def test_other_worker_sees_deleted_token_within_seconds(self):
+        # Boshqa worker keshi signal bilan tozalanmaydi, faqat TTL bilan
+        now = [0]
+        authentication = CachedTokenAuthentication()
+        authentication.cache = TokenCache(*_cache_settings(), clock=lambda: now[0])
+        key = Token.objects.get(user=self.user).key
+        authentication.authenticate_credentials(key)
+        Token.objects.filter(key=key).delete()
+        self.assertIsNotNone(authentication.cache.get(key))
+        now[0] = 6
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate_credentials(key)
+
+
+@override_settings(TOKEN_BUCKET_THROTTLE={
+    'CACHE': 'throttle',
+    'RATES': {'login.ip': '3/min', 'login.phone': '2/min', 'contact.ip': '1/min'},
+})
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.client = APIClient()
+        self.url = reverse('login')
+
+    def login(self, phone_number, ip='10.0.0.1'):
+        return self.client.post(
+            self.url, {'phone_number': phone_number, 'password': 'x'}, format='json', REMOTE_ADDR=ip
+        )
+
+    def test_limits_per_phone_number(self):
+        self.assertEqual(self.login('+998901111111').status_code, 401)
+        self.assertEqual(self.login('+998 90 111 11 11', ip='10.0.0.2').status_code, 401)
+        response = self.login('+998901111111', ip='10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response['Retry-After']), range(20, 31))
+
+    def test_limits_per_ip(self):
+        for phone_number in ('+998901111111', '+998902222222', '+998903333333'):
+            self.assertEqual(self.login(phone_number).status_code, 401)
+        self.assertEqual(self.login('+998904444444').status_code, 429)
+        self.assertEqual(self.login('+998904444444', ip='10.0.0.9').status_code, 401)
+
+    def test_rejection_skips_database(self):
+        self.client.post(reverse('contact'), {}, format='json')
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('contact'), {}, format='json')
+        self.assertEqual(response.status_code, 429)
+
+    def test_bucket_refills(self):
+        now = [1000.0]
+        throttle = IPTokenBucketThrottle()
+        throttle.timer = lambda: now[0]
+        view = LoginView()
+        request = APIRequestFactory().post(self.url, REMOTE_ADDR='10.0.0.5')
+        self.assertEqual([throttle.allow_request(request, view) for _ in range(4)], [True, True, True, False])
+        now[0] += 20
+        self.assertTrue(throttle.allow_request(request, view))
+        self.assertFalse(throttle.allow_request(request, view))
+
+    def test_forwarded_for_does_not_reset_ip_limit(self):
+        for i in range(3):
+            self.client.post(self.url, {'phone_number': '+99890000000%d' % i, 'password': 'x'},
+                             format='json', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.2.3.%d' % i)
+        response = self.client.post(self.url, {'phone_number': '+998905555555', 'password': 'x'},
+                                    format='json', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='9.9.9.9')
+        self.assertEqual(response.status_code, 429)
+
+    def test_busy_bucket_lock_rejects(self):
+        throttle = IPTokenBucketThrottle()
+        throttle.lock_attempts = 2
+        request = APIRequestFactory().post(self.url, REMOTE_ADDR='10.0.0.6')
+        caches['throttle'].add('throttle:login:ip:10.0.0.6:lock', 'boshqa worker', 5)
+        self.assertFalse(throttle.allow_request(request, LoginView()))
+        caches['throttle'].delete('throttle:login:ip:10.0.0.6:lock')
+        self.assertTrue(throttle.allow_request(request, LoginView()))
+        self.assertIsNone(caches['throttle'].get('throttle:login:ip:10.0.0.6:lock'))
+
+
+class CargoBulkCreateTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = auth_client(self.user)
+        self.url = reverse('cargo-bulk-create')
+
+    def test_json_array_with_row_errors(self):
+        rows = [
+            {'name': 'Olma', 'weight': 5, 'vehicle_type': 'Tentli'},
+            {'name': 'Xato', 'weight': 'og\'ir'},
+            {'name': 'Sement', 'weight': 20, 'price': '150.00'},
+            'satr',
+        ]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 3])
+        self.assertIn('weight', response.data['errors'][0]['errors'])
+        cargos = Cargo.objects.filter(pk__in=response.data['ids']).order_by('pk')
+        self.assertEqual([c.name for c in cargos], ['Olma', 'Sement'])
+        self.assertTrue(all(c.customer_id == self.user.pk for c in cargos))
+
+    def test_ndjson_stream_in_batches(self):
+        body = '\n'.join(json.dumps({'name': 'Yuk %d' % i, 'weight': i + 1}) for i in range(5))
+        body += '\n{buzuq json\n'
+        with mock.patch.object(CargoBulkCreateView, 'batch_size', 2), \
+                CaptureQueriesContext(connection) as context:
+            response = self.client.generic('POST', self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual(response.data['errors'][0]['index'], 5)
+        inserts = [q for q in context.captured_queries if q['sql'].startswith('INSERT INTO "api_cargo"')]
+        self.assertEqual(len(inserts), 3)
+
+    def test_all_rows_invalid(self):
+        response = self.client.post(self.url, [{'name': 'Xato'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Cargo.objects.count(), 0)
+
+    def test_rejects_non_array(self):
+        response = self.client.post(self.url, {'name': 'Olma', 'weight': 5}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CargoExportTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = auth_client(self.user)
+        self.url = reverse('cargo-export')
+        Cargo.objects.bulk_create([
+            Cargo(customer=self.user, name='Olma, qizil', weight=5, status='Jarayonda', price='10.50'),
+            Cargo(customer=self.user, name='Sement', weight=20, status='Yolda'),
+        ])
+
+    def test_csv_stream(self):
+        response = self.client.get(self.url, {'ordering': 'weight'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:5], ['id', 'customer', 'driver', 'name', 'weight'])
+        self.assertEqual([row[3] for row in rows[1:]], ['Olma, qizil', 'Sement'])
+        self.assertEqual(rows[1][10], '10.50')
+
+    def test_ndjson_with_filters(self):
+        response = self.client.get(self.url, {'format': 'ndjson', 'status': 'Yolda'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['name'], 'Sement')
+
+    def test_invalid_filter_is_rendered(self):
+        response = self.client.get(self.url, {'format': 'ndjson', 'weight__gte': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('weight__gte', json.loads(response.content))
+
+
+class AsyncReadPathTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        cache.clear()
+        self.user = create_user(profile={'vehicle_type': 'Tent'})
+        self.token = Token.objects.create(user=self.user)
+        self.client = auth_client(self.user)
+        self.async_client = AsyncClient()
+        self.headers = {'Authorization': 'Token ' + self.token.key}
+        Cargo.objects.bulk_create([
+            Cargo(customer=self.user, name='Yuk %d' % i, weight=i + 1, status='Jarayonda' if i % 2 else 'Yolda')
+            for i in range(7)
+        ])
+        self.cargo = Cargo.objects.order_by('id').first()
+        CargoReview.objects.create(cargo=self.cargo, customer=self.user, comment='Zo\'r', stars=5)
+
+    async def test_list_is_served_by_async_view_with_same_payload(self):
+        url = reverse('cargo-list-create') + '?page_size=2&status=Jarayonda&expand=customer'
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.resolver_match.func.view_class, AsyncCargoListView)
+        sync_response = await sync_to_async(self.client.get)(url)
+        self.assertEqual(response.json(), json.loads(sync_response.content))
+
+        response = await self.async_client.get(response.json()['next'], headers=self.headers)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIsNone(response.json()['next'])
+
+    async def test_detail_and_profile(self):
+        response = await self.async_client.get(reverse('cargo-detail', args=[self.cargo.pk]), headers=self.headers)
+        self.assertIs(response.resolver_match.func.view_class, AsyncCargoDetailView)
+        self.assertEqual(response.json()['reviews'][0]['stars'], 5)
+
+        response = await self.async_client.get(reverse('cargo-detail', args=[0]), headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_client.get(reverse('profile'), headers=self.headers)
+        self.assertEqual(response.json()['vehicle_type'], 'Tent')
+
+    async def test_authentication_errors(self):
+        response = await AsyncClient().get(reverse('cargo-list-create'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+        response = await AsyncClient().get(reverse('profile'), headers={'Authorization': 'Token wrong'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'detail': 'Invalid token.'})
+
+    async def test_writes_are_delegated_to_sync_views(self):
+        response = await self.async_client.post(
+            reverse('cargo-list-create'), {'name': 'Yangi', 'weight': 3}, content_type='application/json',
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(await Cargo.objects.filter(name='Yangi', customer=self.user).aexists())
+
+    async def test_export_is_streamed_by_async_iterator(self):
+        url = reverse('cargo-export') + '?format=ndjson&ordering=weight'
+        with mock.patch.object(NDJSONRenderer, 'chunk_rows', 2):
+            response = await self.async_client.get(url, headers=self.headers)
+            self.assertIs(response.resolver_match.func.view_class, AsyncCargoExportView)
+            # Async iterator ASGI da bo'lakma-bo'lak yuboriladi (sync iterator to'liq ro'yxatga yig'ilardi)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 4)
+        sync_content = await sync_to_async(lambda: b''.join(self.client.get(url).streaming_content))()
+        self.assertEqual(b''.join(chunks), sync_content)
+
+        response = await self.async_client.get(reverse('cargo-export') + '?weight__gte=x', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_advertisements_share_cache_with_sync_path(self):
+        await sync_to_async(create_advertisement)(ad_type='Banner')
+        response = await AsyncClient().get(reverse('ads-by-type', args=['Banner']))
+        self.assertEqual(len(response.json()), 1)
+
+        def sync_get():
+            with CaptureQueriesContext(connection) as context:
+                sync_response = APIClient().get(reverse('ads-by-type', args=['Banner']))
+            self.assertEqual(len(context.captured_queries), 0)
+            return sync_response
+
+        sync_response = await sync_to_async(sync_get)()
+        self.assertEqual(sync_response.content, response.content)
+
+        response = await AsyncClient().get(reverse('active-ads'))
+        self.assertEqual(len(response.json()), 1)
+
+
+class CargoEventStreamTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.customer = create_user()
+        self.driver = create_user('+998901111111', profile={'vehicle_type': 'Tentli', 'vehicle_capacity': 10})
+        self.token = Token.objects.create(user=self.customer)
+        self.url = reverse('cargo-events', urlconf=settings.ASGI_URLCONF)
+
+    def create_cargo(self, **fields):
+        fields.setdefault('name', 'Yuk')
+        fields.setdefault('weight', 5)
+        return Cargo.objects.create(customer=self.customer, **fields)
+
+    async def read_events(self, response, count):
+        """Oqimdan `count` ta hodisani o'qiydi (retry va ping qatorlari o'tkazib yuboriladi)."""
+        events = []
+        stream = aiter(response.streaming_content)
+        while len(events) < count:
+            chunk = await asyncio.wait_for(anext(stream), 5)
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if chunk.startswith('id: '):
+                lines = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+                events.append((int(lines['id']), lines['event'], json.loads(lines['data'])))
+        return events
+
+    def test_events_are_recorded(self):
+        cargo = self.create_cargo()
+        cargo = Cargo.objects.get(pk=cargo.pk)
+        cargo.name = 'Boshqa'
+        cargo.save()
+        cargo.status = 'Yetkazib berilgan'
+        cargo.save(update_fields=['status'])
+        auth_client(self.driver).put(reverse('cargo-detail', args=[self.create_cargo().pk]))
+        cargo.delete()
+        self.assertEqual(
+            list(CargoEvent.objects.order_by('sequence').values_list('type', 'status')),
+            [('created', 'Jarayonda'), ('status_changed', 'Yetkazib berilgan'), ('created', 'Jarayonda'),
+             ('claimed', 'Yolda'), ('deleted', 'Yetkazib berilgan')],
+        )
+
+    def test_sequence_is_allocated_under_counter_lock(self):
+        # Raqam commit tartibini beradigan hisoblagichdan (autoincrement id dan emas)
+        cargo = self.create_cargo()
+        event = CargoEvent.objects.get(cargo_id=cargo.pk)
+        self.assertEqual(event.sequence, ChangeCounter.objects.get(name=Cargo.VERSION_COUNTER).value)
+        self.assertGreater(event.sequence, Cargo.objects.get(pk=cargo.pk).version)
+
+    async def test_resume_from_last_event_id_with_filters(self):
+        first = await sync_to_async(self.create_cargo)(vehicle_type='Tentli')
+        await sync_to_async(self.create_cargo)(vehicle_type='Bortli')
+        second = await sync_to_async(self.create_cargo)(vehicle_type='Tentli')
+        first_event = await CargoEvent.objects.aget(cargo_id=first.pk)
+
+        response = await self.async_client.get(
+            self.url, {'vehicle_type': 'Tentli', 'token': self.token.key},
+            headers={'Last-Event-ID': str(first_event.sequence - 1)},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = await self.read_events(response, 2)
+        await response.streaming_content.aclose()
+        self.assertEqual([data['cargo'] for _, _, data in events], [first.pk, second.pk])
+        self.assertEqual({event for _, event, _ in events}, {'created'})
+
+    async def test_live_events_after_connect(self):
+        cargo = await sync_to_async(self.create_cargo)()
+        response = await self.async_client.get(
+            self.url, {'cargo': cargo.pk}, headers={'Authorization': 'Token ' + self.token.key}
+        )
+        stream = response.streaming_content
+        first_chunk = await anext(aiter(stream))
+        self.assertIn(b'retry:', first_chunk if isinstance(first_chunk, bytes) else first_chunk.encode())
+
+        claim = sync_to_async((await sync_to_async(auth_client)(self.driver)).put)
+        self.assertEqual((await claim(reverse('cargo-detail', args=[cargo.pk]))).status_code, 200)
+        await sync_to_async(self.create_cargo)()  # boshqa yuk: filtrdan o'tmaydi
+        bus.notify()
+        events = await self.read_events(response, 1)
+        await stream.aclose()
+        self.assertEqual(events[0][1], 'claimed')
+        self.assertEqual(events[0][2]['driver'], await DriverProfile.objects.values_list('pk', flat=True).aget(
+            user=self.driver
+        ))
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(self.url, {'token': 'wrong'})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(self.url, {'cargo': 'x', 'token': self.token.key})
+        self.assertEqual(response.status_code, 400)
+
+
+class CargoChangesTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = auth_client(self.user)
+        self.url = reverse('cargo-changes')
+
+    def create_cargo(self, **fields):
+        fields.setdefault('weight', 5)
+        return Cargo.objects.create(customer=self.user, **fields)
+
+    def test_versions_are_monotonic_across_writes(self):
+        first = self.create_cargo(name='A')
+        second = self.create_cargo(name='B')
+        self.assertLess(first.version, second.version)
+
+        first.name = 'A2'
+        first.save(update_fields=['name'])
+        first.refresh_from_db()
+        self.assertGreater(first.version, second.version)
+
+        self.client.post(reverse('cargo-bulk-create'), [{'name': 'C', 'weight': 1}, {'name': 'D', 'weight': 1}], format='json')
+        bulk = list(Cargo.objects.filter(name__in=['C', 'D']).order_by('id').values_list('version', flat=True))
+        self.assertEqual(bulk, [first.version + 1, first.version + 2])
+
+        second_pk = second.pk
+        second.delete()
+        tombstone = CargoTombstone.objects.get(cargo_id=second_pk)
+        self.assertEqual(tombstone.version, ChangeCounter.objects.get(name=Cargo.VERSION_COUNTER).value)
+
+    def test_changes_since_version(self):
+        kept = self.create_cargo(name='Qoladi')
+        removed = self.create_cargo(name='Ketadi')
+        since = self.client.get(self.url).data['version']
+        self.assertEqual(since, removed.version)
+
+        self.create_cargo(name='Yangi')
+        driver = create_user('+998901111111')
+        auth_client(driver).put(reverse('cargo-detail', args=[kept.pk]))
+        self.client.delete(reverse('cargo-detail', args=[removed.pk]))
+
+        response = self.client.get(self.url, {'since': since, 'fields': 'id,status'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['changed']], [Cargo.objects.get(name='Yangi').pk, kept.pk])
+        self.assertEqual(response.data['changed'][1]['status'], 'Yolda')
+        self.assertEqual(response.data['deleted'], [removed.pk])
+        self.assertFalse(response.data['has_more'])
+
+        response = self.client.get(self.url, {'since': response.data['version']})
+        self.assertEqual((response.data['changed'], response.data['deleted']), ([], []))
+
+    def test_limit_pages_through_changes(self):
+        for i in range(5):
+            self.create_cargo(name='Yuk %d' % i)
+        Cargo.objects.filter(name='Yuk 0').delete()
+
+        seen, deleted, since = [], [], 0
+        while True:
+            data = self.client.get(self.url, {'since': since, 'limit': 2}).data
+            seen += [row['name'] for row in data['changed']]
+            deleted += data['deleted']
+            since = data['version']
+            if not data['has_more']:
+                break
+        self.assertEqual(seen, ['Yuk 1', 'Yuk 2', 'Yuk 3', 'Yuk 4'])
+        self.assertEqual(len(deleted), 1)
+
+    def test_invalid_since(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'since': -1}).status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        cache.clear()
+        self.customer = create_user()
+        self.driver = create_user('+998901111111', profile={'vehicle_type': 'Tentli'})
+        self.client = auth_client(self.customer)
+        self.cargo = Cargo.objects.create(customer=self.customer, name='Olma', weight=5)
+        self.url = reverse('cargo-detail', args=[self.cargo.pk])
+
+    def assertNotModified(self, url, max_queries, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertLessEqual(len(context.captured_queries), max_queries)
+        return response
+
+    def test_cargo_detail_etag(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        # token + validator so'rovi; serializer va nested obyektlar o'qilmaydi
+        self.assertEqual(self.assertNotModified(self.url, 2, if_none_match=etag)['ETag'], etag)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        sparse = self.client.get(self.url, {'fields': 'id,status'})
+        self.assertNotEqual(sparse['ETag'], etag)
+        self.assertNotModified(self.url + '?fields=id,status', 2, if_none_match=sparse['ETag'])
+
+    def test_cargo_detail_etag_follows_review_author(self):
+        author = create_user('+998902222222')
+        CargoReview.objects.create(cargo=self.cargo, customer=author, comment='Yaxshi', stars=5)
+        etag = self.client.get(self.url)['ETag']
+        author = User.objects.get(pk=author.pk)
+        author.last_login = timezone.now()
+        author.save(update_fields=['last_login'])
+        self.assertNotModified(self.url, 2, if_none_match=etag)
+
+        author.name = 'Yangi muallif'
+        author.save()
+        response = self.client.get(self.url, headers={'if_none_match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['reviews'][0]['customer']['name'], 'Yangi muallif')
+
+    def test_cargo_detail_ignores_if_modified_since(self):
+        # Nested ma'lumot yukning updated_at ini o'zgartirmaydi: sana bo'yicha 304 eskirgan javob berardi
+        since = http_date((timezone.now() + datetime.timedelta(minutes=1)).timestamp())
+        User.objects.filter(pk=self.customer.pk).update(name='Yangi ism')
+        response = self.client.get(self.url, headers={'if_modified_since': since})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['customer']['name'], 'Yangi ism')
+
+    def test_cargo_detail_etag_changes_with_content(self):
+        etag = self.client.get(self.url)['ETag']
+        CargoReview.objects.create(cargo=self.cargo, customer=self.customer, comment='Yaxshi', stars=5)
+        response = self.client.get(self.url, headers={'if_none_match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['reviews']), 1)
+
+        etag = response['ETag']
+        DriverProfile.objects.filter(user=self.driver).update(experience=7)
+        Cargo.objects.filter(pk=self.cargo.pk).update(driver=self.driver.driverprofile)
+        # Nested haydovchi ma'lumoti ham ETag ga kiradi
+        response = self.client.get(self.url, headers={'if_none_match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['driver']['experience'], 7)
+        etag = response['ETag']
+        DriverProfile.objects.filter(user=self.driver).update(experience=8)
+        self.assertEqual(self.client.get(self.url, headers={'if_none_match': etag}).status_code, 200)
+
+    def test_profile(self):
+        url = reverse('profile')
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, 2, if_none_match=etag)
+        self.client.put(url, {'experience': 3}, format='json')
+        self.assertEqual(self.client.get(url, headers={'if_none_match': etag}).status_code, 200)
+
+    def test_advertisements(self):
+        create_advertisement()
+        url = reverse('active-ads')
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, 1, if_none_match=etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_advertisement(company_name='Boshqa')
+        self.assertEqual(self.client.get(url, headers={'if_none_match': etag}).status_code, 200)
+
+    async def test_async_views_share_etags(self):
+        headers = {'Authorization': 'Token ' + (await Token.objects.aget(user=self.customer)).key}
+        etag = (await sync_to_async(self.client.get)(self.url))['ETag']
+        response = await self.async_client.get(self.url, headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        response = await self.async_client.get(reverse('profile'), headers=headers)
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(
+            reverse('profile'), headers={**headers, 'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class RatingTests(TestCase):
+    def setUp(self):
+        self.customer = create_user('+998901111111')
+        self.driver = create_user('+998902222222', profile={'vehicle_type': 'Tentli'})
+        self.profile = self.driver.driverprofile
+        self.client = auth_client(self.customer)
+        self.cargo = Cargo.objects.create(customer=self.customer, name='Olma', weight=5, driver=self.profile)
+
+    def review(self, cargo, stars):
+        response = self.client.post(
+            reverse('review-create'), {'cargo': cargo.pk, 'comment': 'Sharh', 'stars': stars}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return CargoReview.objects.get(pk=response.data['id'])
+
+    def assertRating(self, instance, review_count, rating_sum):
+        instance.refresh_from_db()
+        self.assertEqual((instance.review_count, instance.rating_sum), (review_count, rating_sum))
+
+    def test_review_updates_cargo_and_driver(self):
+        self.review(self.cargo, 5)
+        review = self.review(self.cargo, 2)
+        self.assertRating(self.cargo, 2, 7)
+        self.assertRating(self.profile, 2, 7)
+        response = self.client.get(reverse('cargo-detail', args=[self.cargo.pk]))
+        self.assertEqual(response.data['rating'], 3.5)
+        self.assertEqual(response.data['driver']['review_count'], 2)
+
+        review.stars = 4
+        review.save()
+        self.assertRating(self.profile, 2, 9)
+        review.delete()
+        self.assertRating(self.cargo, 1, 5)
+        self.assertRating(self.profile, 1, 5)
+
+    def test_driver_change_moves_ratings(self):
+        other = Cargo.objects.create(customer=self.customer, name='Nok', weight=3)
+        self.review(other, 4)
+        self.assertRating(self.profile, 0, 0)
+        # Haydovchi yukni band qilganda uning mavjud sharhlari reytingga qo'shiladi
+        response = auth_client(self.driver).put(reverse('cargo-detail', args=[other.pk]), {}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertRating(self.profile, 1, 4)
+
+        second = create_user('+998903333333').driverprofile
+        other = Cargo.objects.get(pk=other.pk)
+        other.driver = second
+        other.save()
+        self.assertRating(self.profile, 0, 0)
+        self.assertRating(second, 1, 4)
+
+    def test_full_save_keeps_ratings(self):
+        stale = DriverProfile.objects.get(pk=self.profile.pk)
+        self.review(self.cargo, 5)
+        stale.license_type = 'C'
+        stale.save()
+        self.assertRating(self.profile, 1, 5)
+        self.assertEqual(self.profile.license_type, 'C')
+
+    def test_rebuild_ratings(self):
+        self.review(self.cargo, 5)
+        self.review(self.cargo, 3)
+        Cargo.objects.filter(pk=self.cargo.pk).update(review_count=0, rating_sum=0)
+        DriverProfile.objects.filter(pk=self.profile.pk).update(review_count=9, rating_sum=1)
+        version = Cargo.objects.get(pk=self.cargo.pk).version
+        out = StringIO()
+        call_command('rebuild_ratings', stdout=out)
+        self.assertIn('1 ta yuk, 1 ta haydovchi', out.getvalue())
+        self.assertRating(self.cargo, 2, 8)
+        self.assertRating(self.profile, 2, 8)
+        self.assertGreater(self.cargo.version, version)
+
+    def test_sparse_rating_field(self):
+        self.review(self.cargo, 4)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('cargo-list-create'), {'fields': 'id,rating,review_count'})
+        self.assertEqual(response.data['results'], [{'id': self.cargo.pk, 'review_count': 1, 'rating': 4.0}])
+        self.assertLessEqual(len(context.captured_queries), 2)
+
+    def test_leaderboard(self):
+        good = create_user('+998903333333', profile={'vehicle_type': 'Bortli'}).driverprofile
+        unrated = create_user('+998904444444').driverprofile
+        self.review(self.cargo, 3)
+        for stars in (5, 4):
+            self.review(Cargo.objects.create(customer=self.customer, weight=1, driver=good), stars)
+        url = reverse('driver-leaderboard')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertLessEqual(len(context.captured_queries), 2)  # token + haydovchilar (user bilan join)
+        self.assertEqual([(p['id'], p['rating']) for p in response.data], [(good.pk, 4.5), (self.profile.pk, 3.0)])
+        self.assertNotIn(unrated.pk, [p['id'] for p in response.data])
+
+        self.assertEqual([p['id'] for p in self.client.get(url, {'min_reviews': 2}).data], [good.pk])
+        self.assertEqual([p['id'] for p in self.client.get(url, {'vehicle_type': 'Tentli'}).data], [self.profile.pk])
+        self.assertEqual(len(self.client.get(url, {'limit': 1}).data), 1)
+        self.assertEqual(self.client.get(url, {'limit': 'x'}).status_code, 400)
+
+
+def image_upload(name='rasm.png', size=(600, 400), mode='RGBA'):
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ThumbnailTestMixin:
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.driver = create_user(profile={'vehicle_type': 'Tentli'})
+        self.client = auth_client(self.driver)
+
+    def upload(self, **kwargs):
+        response = self.client.put(reverse('profile'), {'profile_picture': image_upload(**kwargs)}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+
+class ThumbnailTests(ThumbnailTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch('api.thumbnails.get_executor')
+        self.executor = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_upload_schedules_without_decoding(self):
+        with mock.patch('api.thumbnails.generate_thumbnails') as generate, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.upload()
+        self.assertEqual(response.data['thumbnails'], {})
+        generate.assert_not_called()
+        profile = DriverProfile.objects.get(user=self.driver)
+        (_, profile_id, source, stale), _ = self.executor.submit.call_args
+        self.assertEqual((profile_id, source, stale), (profile.pk, profile.profile_picture.name, []))
+
+    def test_generate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+        profile = DriverProfile.objects.get(user=self.driver)
+        self.assertEqual(generate_thumbnails(profile.pk, profile.profile_picture.name), 1)
+        profile.refresh_from_db()
+        self.assertEqual(set(profile.thumbnails), {'64', '256'})
+        for size, names in profile.thumbnails.items():
+            for name, path in names.items():
+                with default_storage.open(path) as file, Image.open(file) as image:
+                    self.assertEqual(image.size, (int(size), int(size)))
+                    self.assertEqual(image.format, name.upper())
+
+        thumbnails = self.client.get(reverse('profile')).data['thumbnails']
+        self.assertRegex(thumbnails['64']['webp'], r'^/media/profiles/thumbs/64/[0-9a-f]{20}\.webp$')
+        # Bir xil rasm qayta yuklansa fayl nomlari (mazmun hash i) o'zgarmaydi
+        before = profile.thumbnails
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+        profile.refresh_from_db()
+        self.assertEqual(profile.thumbnails, {})
+        generate_thumbnails(profile.pk, profile.profile_picture.name)
+        profile.refresh_from_db()
+        self.assertEqual(profile.thumbnails, before)
+
+    def test_stale_source_is_ignored(self):
+        self.upload()
+        old = DriverProfile.objects.get(user=self.driver).profile_picture.name
+        self.upload(size=(300, 300), mode='RGB')
+        self.assertEqual(generate_thumbnails(self.driver.driverprofile.pk, old), 0)
+        self.assertEqual(DriverProfile.objects.get(user=self.driver).thumbnails, {})
+        # Yozilmagan natija fayllari qolib ketmaydi
+        self.assertEqual(default_storage.listdir('profiles/thumbs/64')[1], [])
+
+    def test_replaced_thumbnails_are_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+        profile = DriverProfile.objects.get(user=self.driver)
+        generate_thumbnails(profile.pk, profile.profile_picture.name)
+        profile.refresh_from_db()
+        old = thumbnail_paths(profile.thumbnails)
+        # Xuddi shu rasmni yuklagan boshqa profil fayllarni bo'lishadi
+        other = create_user('+998905555555').driverprofile
+        DriverProfile.objects.filter(pk=other.pk).update(thumbnails=profile.thumbnails)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(size=(300, 300), mode='RGB')
+        (_, *args), _ = self.executor.submit.call_args
+        self.assertEqual(args[2], old)
+        self.assertEqual(generate_thumbnails(*args), 1)
+        self.assertTrue(all(default_storage.exists(path) for path in old))
+
+        DriverProfile.objects.filter(pk=other.pk).update(thumbnails={})
+        self.assertEqual(delete_thumbnails(old), len(old))
+        self.assertFalse(any(default_storage.exists(path) for path in old))
+        profile.refresh_from_db()
+        self.assertTrue(all(default_storage.exists(path) for path in thumbnail_paths(profile.thumbnails)))
+
+    def test_broken_image(self):
+        profile = self.driver.driverprofile
+        profile.profile_picture = default_storage.save('profiles/buzuq.png', SimpleUploadedFile('buzuq.png', b'xx'))
+        profile.save()
+        with self.assertLogs('api.thumbnails', 'ERROR'):
+            self.assertEqual(generate_thumbnails(profile.pk, profile.profile_picture.name), 0)
+
+    def test_command(self):
+        self.upload()
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('1 ta profil', out.getvalue())
+        self.assertNotEqual(DriverProfile.objects.get(user=self.driver).thumbnails, {})
+
+
+class ThumbnailWorkerTests(ThumbnailTestMixin, TransactionTestCase):
+    def test_worker_pool(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        with mock.patch('api.thumbnails.get_executor', return_value=executor):
+            self.upload()
+        executor.shutdown(wait=True)
+        self.assertEqual(set(DriverProfile.objects.get(user=self.driver).thumbnails), {'64', '256'})
+
+
+class MediaServingTests(TestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.url = '/media/' + default_storage.save('advertisements/reklama.mp4', SimpleUploadedFile('r.mp4', self.content))
+
+    def get(self, url=None, **headers):
+        response = self.client.get(url or self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_file(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response['Content-Length'], '1024')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        self.assertEqual(self.get(if_none_match=response['ETag'])[0].status_code, 304)
+        self.assertEqual(self.get(if_modified_since=response['Last-Modified'])[0].status_code, 304)
+
+    def test_ranges(self):
+        response, body = self.get(range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[10:20])
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(response['Content-Length'], '10')
+        # sendfile (wsgi.file_wrapper) fayl deskriptorining joriy joyidan Content-Length bayt yuboradi
+        response = serve_media(RequestFactory().get(self.url, headers={'range': 'bytes=10-19'}), self.url[7:])
+        self.assertEqual(response.file_to_stream.tell(), 10)
+        response.close()
+
+        self.assertEqual(self.get(range='bytes=1000-')[1], self.content[1000:])
+        self.assertEqual(self.get(range='bytes=-5')[1], self.content[-5:])
+        self.assertEqual(self.get(range='bytes=1020-5000')[0]['Content-Range'], 'bytes 1020-1023/1024')
+
+        response, _ = self.get(range='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+        # Bir nechta oraliq va noto'g'ri sarlavha - butun fayl
+        self.assertEqual(self.get(range='bytes=0-1,5-6')[0].status_code, 200)
+        self.assertEqual(self.get(range='items=0-1')[0].status_code, 200)
+
+    def test_if_range(self):
+        etag = self.get()[0]['ETag']
+        self.assertEqual(self.get(range='bytes=0-9', if_range=etag)[0].status_code, 206)
+        response, body = self.get(range='bytes=0-9', if_range='"eski"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+
+    def test_head(self):
+        response = self.client.head(self.url, headers={'range': 'bytes=0-99'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(response.content, b'')
+
+    def test_immutable_thumbnails(self):
+        url = '/media/' + default_storage.save('profiles/thumbs/64/%s.webp' % ('a1' * 10), SimpleUploadedFile('t', b'x'))
+        self.assertEqual(self.get(url)[0]['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_not_found(self):
+        self.assertEqual(self.client.get('/media/advertisements/yoq.mp4').status_code, 404)
+        self.assertEqual(self.client.get('/media/advertisements/').status_code, 404)
+        self.assertEqual(self.client.get('/media/../cargo/settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/%2e%2e/cargo/settings.py').status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    async def test_async_stream(self):
+        with self.settings(MEDIA_SERVING={'BLOCK_SIZE': 100}):
+            response = await AsyncClient().get(self.url, headers={'range': 'bytes=10-409'})
+            self.assertEqual(response.status_code, 206)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([len(chunk) for chunk in chunks], [100] * 4)
+        self.assertEqual(b''.join(chunks), self.content[10:410])
+
+        response = await AsyncClient().get(self.url, headers={'if_none_match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual((await AsyncClient().get('/media/advertisements/yoq.mp4')).status_code, 404)
+
+    def test_accel_redirect(self):
+        with self.settings(MEDIA_SERVING={'ACCEL_REDIRECT': '/protected-media/'}):
+            response, body = self.get(range='bytes=0-9')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/advertisements/reklama.mp4')
+        self.assertEqual(body, b'')
+        self.assertTrue(response.has_header('ETag'))
+
+
+class AdvertisementSweepTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        day = datetime.timedelta(days=1)
+        self.current = create_advertisement(company_name='Amaldagi')
+        self.expired = create_advertisement(company_name='Eski', start_date=self.today - 10 * day,
+                                            end_date=self.today - day)
+        self.future = create_advertisement(company_name='Kelajak', start_date=self.today + day,
+                                           end_date=self.today + 5 * day)
+        self.pending = create_advertisement(company_name='Sanasiz', start_date=None, end_date=None, duration_days=7)
+        self.rejected = create_advertisement(company_name='Rad', status='Rad etilgan', end_date=self.today - day)
+
+    def states(self):
+        return {
+            ad.company_name: (ad.is_active, ad.start_date, ad.end_date)
+            for ad in Advertisement.objects.all()
+        }
+
+    def test_sweep(self):
+        before = self.states()
+        self.assertEqual(Advertisement.objects.sweep(self.today), (1, 1))
+        after = self.states()
+        self.assertFalse(after['Eski'][0])
+        self.assertEqual(after['Sanasiz'], (True, self.today, self.today + datetime.timedelta(days=7)))
+        for name in ('Amaldagi', 'Kelajak', 'Rad'):
+            self.assertEqual(after[name], before[name])
+        self.assertEqual(Advertisement.objects.sweep(self.today), (0, 0))
+        # Kelajakdagi reklama o'z kunida active() ga tushadi
+        self.assertIn(self.future, Advertisement.objects.active(self.future.start_date))
+
+    def test_command_invalidates_cache_and_logs(self):
+        client = APIClient()
+        self.assertEqual([ad['company_name'] for ad in client.get(reverse('active-ads')).json()], ['Amaldagi'])
+        out = StringIO()
+        with self.assertLogs('api.management.commands.sweep_advertisements', 'INFO') as logs, \
+                self.captureOnCommitCallbacks(execute=True):
+            call_command('sweep_advertisements', stdout=out)
+        self.assertIn('1 ta ishga tushirildi, 1 ta faolsizlantirildi', logs.output[0])
+        self.assertIn('1 ta reklama ishga tushirildi', out.getvalue())
+        names = sorted(ad['company_name'] for ad in client.get(reverse('active-ads')).json())
+        self.assertEqual(names, ['Amaldagi', 'Sanasiz'])
+
+    @mock.patch('api.management.commands.sweep_advertisements.close_old_connections')
+    def test_loop(self, close_old_connections):
+        with mock.patch('api.management.commands.sweep_advertisements.time.sleep',
+                        side_effect=[None, KeyboardInterrupt]) as sleep, \
+                mock.patch.object(Advertisement.objects, 'sweep', return_value=(0, 0)) as sweep:
+            call_command('sweep_advertisements', '--loop', '--interval', '60', stdout=StringIO())
+        self.assertEqual(sweep.call_count, 2)
+        sleep.assert_called_with(60)
+
+
+class LargeTableAdminTests(TestCase):
+    def setUp(self):
+        self.admin_user = create_user('+998900000001', is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin_user)
+
+    def add_cargos(self, count):
+        for i in range(count):
+            customer = create_user('+99891%07d' % len(User.objects.all()))
+            driver = create_user('+99892%07d' % len(User.objects.all())).driverprofile
+            cargo = Cargo.objects.create(customer=customer, driver=driver, name='Yuk %d' % i, weight=1)
+            CargoReview.objects.create(cargo=cargo, customer=customer, comment='Yaxshi', stars=4)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = [reverse('admin:api_%s_changelist' % name) for name in ('cargo', 'cargoreview', 'driverprofile')]
+        self.add_cargos(2)
+        before = [self.count_queries(url) for url in urls]
+        self.add_cargos(8)
+        self.assertEqual([self.count_queries(url) for url in urls], before)
+
+    def test_change_form_does_not_load_all_users(self):
+        self.add_cargos(5)
+        cargo = Cargo.objects.first()
+        self.client.get(reverse('admin:api_cargo_change', args=[cargo.pk]))  # ContentType keshi
+        before = self.count_queries(reverse('admin:api_cargo_change', args=[cargo.pk]))
+        self.add_cargos(5)
+        response = self.client.get(reverse('admin:api_cargo_change', args=[cargo.pk]))
+        # autocomplete: select ichida faqat tanlangan qiymat, qolganlari AJAX orqali
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(response, cargo.customer.phone_number)
+        self.assertNotContains(response, User.objects.latest('pk').phone_number)
+        self.assertEqual(self.count_queries(reverse('admin:api_cargo_change', args=[cargo.pk])), before)
+
+    def test_estimated_count(self):
+        self.add_cargos(3)
+        paginator = EstimatedCountPaginator(Cargo.objects.order_by('-id'), 100)
+        paginator.estimate_threshold = 2
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(paginator.count, 3)
+        self.assertNotIn('COUNT', context.captured_queries[0]['sql'])
+
+        # Filtr bilan va kichik jadvallarda aniq son
+        filtered = EstimatedCountPaginator(Cargo.objects.filter(name='Yuk 1'), 100)
+        filtered.estimate_threshold = 2
+        self.assertEqual(filtered.count, 1)
+        self.assertEqual(EstimatedCountPaginator(Cargo.objects.all(), 100).count, 3)
+
+    def test_bulk_actions_run_constant_queries(self):
+        ads = [create_advertisement(company_name='Reklama %d' % i, status='Korib chiqilmoqda', is_active=i % 2 == 0,
+                                    start_date=None, end_date=None, duration_days=(1, 3, 7)[i % 3])
+               for i in range(12)]
+        url = reverse('admin:api_advertisement_changelist')
+        data = {'action': 'approve_advertisements', '_selected_action': [ad.pk for ad in ads]}
+        with CaptureQueriesContext(connection) as context, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(url, data).status_code, 302)
+        # sessiya/foydalanuvchi + tanlovni tekshirish + duration lar + har bir duration uchun UPDATE + status UPDATE
+        self.assertLessEqual(len(context.captured_queries), 10)
+
+        today = timezone.now().date()
+        for ad in Advertisement.objects.all():
+            self.assertEqual(ad.status, 'Tasdiqlangan')
+            if ad.is_active:
+                self.assertEqual((ad.start_date, ad.end_date), (today, today + datetime.timedelta(days=ad.duration_days)))
+            else:
+                self.assertIsNone(ad.start_date)
+
+        data['action'] = 'activate_advertisements'
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(url, data)
+        self.assertLessEqual(len(context.captured_queries), 10)
+        self.assertFalse(Advertisement.objects.filter(start_date__isnull=True).exists())
+
+    def test_select_across_filtered_changelist(self):
+        for i in range(3):
+            create_advertisement(company_name='Reklama %d' % i, status='Korib chiqilmoqda',
+                                 start_date=None, end_date=None)
+        url = reverse('admin:api_advertisement_changelist') + '?status__exact=Korib+chiqilmoqda'
+        self.client.post(url, {'action': 'approve_advertisements', 'select_across': '1', '_selected_action': ['0']})
+        self.assertFalse(Advertisement.objects.filter(start_date__isnull=True).exists())
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    TOKEN_BUCKET_THROTTLE={'CACHE': 'throttle', 'RATES': {}},
+)
+class BenchmarkTests(TestCase):
+    def test_every_endpoint_has_scenario(self):
+        seed(cargos=20)
+        scenarios = get_scenarios(prepare())
+        self.assertEqual({scenario.url_name for scenario in scenarios}, {pattern.name for pattern in api_urls.urlpatterns})
+        self.assertEqual(len({scenario.name for scenario in scenarios}), len(scenarios))
+
+    def test_scenarios_succeed(self):
+        seed(cargos=50)
+        self.assertEqual(Cargo.objects.count(), 50)
+        self.assertTrue(Advertisement.objects.active(timezone.now().date()).exists())
+        for scenario in get_scenarios(prepare()):
+            with self.subTest(scenario.name):
+                result = profile(scenario)
+                self.assertLess(result['status'], 400)
+                self.assertGreater(result['peak_memory_kb'], 0)
+        # Yozuvchi ssenariylar har safar yangi tana yuboradi (takroriy telefon raqami yo'q)
+        self.assertEqual(User.objects.filter(phone_number__startswith='+99877').count(), 2)
+
+    def test_request_bytes(self):
+        request = build_request('POST', '/api/v1/login/', '127.0.0.1:8000', {'Content-Type': 'application/json'}, b'{}')
+        self.assertTrue(request.startswith(b'POST /api/v1/login/ HTTP/1.1\r\nHost: 127.0.0.1:8000\r\n'))
+        self.assertIn(b'\r\nContent-Length: 2\r\n', request)
+        self.assertTrue(request.endswith(b'\r\n\r\n{}'))
+        self.assertNotIn(b'Content-Length', build_request('GET', '/', 'localhost'))
+
+    def test_compare(self):
+        def report(p95, queries):
+            return {'results': {'cargo-list': {'queries': queries, 'levels': {'16': {'p95_ms': p95}}}}}
+
+        self.assertEqual(compare(report(20.0, 2), report(21.0, 2), threshold=10), [])
+        self.assertEqual(compare(report(2.0, 2), report(2.4, 2), threshold=10), [])  # shovqin chegarasidan kichik
+        self.assertEqual(len(compare(report(20.0, 2), report(25.0, 2), threshold=10)), 1)
+        self.assertEqual(len(compare(report(20.0, 2), report(20.0, 3), threshold=10)), 1)
+        # Yangi ssenariy yoki daraja solishtirilmaydi
+        self.assertEqual(compare({'results': {}}, report(25.0, 3), threshold=10), [])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SeedTests(TestCase):
+    def seed(self, **options):
+        options = {'users': 40, 'drivers': 15, 'cargos': 400, 'contacts': 30, 'advertisements': 60,
+                   'batch_size': 100, **options}
+        Seeder(**options).run()
+
+    def test_counts_and_batched_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.seed()
+        self.assertEqual(User.objects.count(), 40)
+        # Har bir foydalanuvchida profil, haydovchilarniki to'ldirilgan
+        self.assertEqual(DriverProfile.objects.count(), 40)
+        self.assertEqual(DriverProfile.objects.exclude(vehicle_type='').count(), 15)
+        self.assertEqual(Cargo.objects.count(), 400)
+        self.assertEqual(ContactMessage.objects.count(), 30)
+        self.assertEqual(Advertisement.objects.count(), 60)
+        # Qator boshiga so'rov yo'q: faqat partiyalar
+        self.assertLess(len(context.captured_queries), 60)
+        # Umumiy parol hash i
+        self.assertEqual(User.objects.values('password').distinct().count(), 1)
+        self.assertTrue(User.objects.first().check_password('seed-password'))
+
+    def test_profile_for_every_user(self):
+        self.seed()
+        customer = User.objects.filter(driverprofile__vehicle_type='').first()
+        response = auth_client(customer).get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['vehicle_type'], '')
+
+    def test_deterministic(self):
+        columns = ('name', 'status', 'vehicle_type', 'weight', 'price', 'review_count', 'rating_sum')
+        self.seed(seed=7)
+        first = list(Cargo.objects.order_by('pk').values_list(*columns))
+        User.objects.all().delete()
+        self.seed(seed=7)
+        self.assertEqual(list(Cargo.objects.order_by('pk').values_list(*columns)), first)
+        User.objects.all().delete()
+        self.seed(seed=8)
+        self.assertNotEqual(list(Cargo.objects.order_by('pk').values_list(*columns)), first)
+
+    def test_realistic_mix(self):
+        self.seed()
+        statuses = set(Cargo.objects.values_list('status', flat=True))
+        self.assertEqual(statuses, {value for value, _ in Cargo.STATUS_CHOICES})
+        self.assertGreater(Cargo.objects.values('vehicle_type').distinct().count(), 4)
+        self.assertFalse(Cargo.objects.filter(status='Jarayonda', driver__isnull=False).exists())
+        self.assertFalse(Cargo.objects.exclude(status='Jarayonda').filter(driver__isnull=True).exists())
+        self.assertFalse(CargoReview.objects.exclude(cargo__status='Yetkazib berilgan').exists())
+        # Vaqt belgilari o'tgan yilga tarqalgan, yangi yuklar katta id da
+        oldest = Cargo.objects.order_by('pk').values_list('created_at', flat=True).first()
+        newest = Cargo.objects.order_by('-pk').values_list('created_at', flat=True).first()
+        self.assertLess(oldest, timezone.now() - datetime.timedelta(days=300))
+        self.assertGreater(newest, oldest)
+
+    def test_derived_values(self):
+        self.seed()
+        self.assertTrue(CargoReview.objects.exists())
+        # Signallar ishlamasa ham reyting, versiya va hisoblagich mos
+        self.assertEqual(rebuild_ratings(), (0, 0))
+        versions = list(Cargo.objects.values_list('version', flat=True))
+        self.assertEqual(len(set(versions)), 400)
+        self.assertEqual(max(versions), ChangeCounter.objects.get(name=Cargo.VERSION_COUNTER).value)
+        self.assertEqual(Cargo.objects.filter(search_index__document='Sement').count(),
+                         Cargo.objects.filter(name__startswith='Sement').count())
+
+    def test_advertisement_windows(self):
+        self.seed()
+        today = timezone.now().date()
+        undated = Advertisement.objects.filter(start_date__isnull=True)
+        self.assertEqual(set(undated.values_list('status', flat=True)), {'Korib chiqilmoqda', 'Rad etilgan'})
+        self.assertFalse(undated.filter(is_active=True).exists())
+        approved = Advertisement.objects.filter(status='Tasdiqlangan')
+        for ad in approved:
+            self.assertEqual(ad.end_date, ad.start_date + datetime.timedelta(days=ad.duration_days))
+            # Muddati o'tganlar faolsizlantirilgan (sweep_advertisements bilan bir xil holat)
+            self.assertEqual(ad.is_active, ad.end_date >= today)
+        self.assertTrue(Advertisement.objects.active(today).exists())
+        self.assertTrue(approved.filter(start_date__gt=today).exists())
+        self.assertEqual(Advertisement.objects.sweep(today), (0, 0))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('seed', users=10, drivers=3, cargos=30, contacts=5, advertisements=5, stdout=out)
+        self.assertIn('cargos', out.getvalue())
+        self.assertEqual(Cargo.objects.count(), 30)
+        with self.assertRaises(CommandError):
+            call_command('seed', users=10, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('seed', users=1, drivers=2, stdout=StringIO())
+
+
+def parse_server_timing(header):
+    timings = {}
+    for entry in header.split(', '):
+        name, *params = entry.split(';')
+        timings[name] = dict(param.split('=', 1) for param in params)
+    return timings
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        token_cache.clear()
+        self.user = create_user(profile={'vehicle_type': 'Tentli'})
+        self.client = auth_client(self.user)
+        Cargo.objects.bulk_create([Cargo(customer=self.user, name='Yuk %d' % i, weight=i + 1) for i in range(3)])
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('cargo-list-create'))
+        timings = parse_server_timing(response['Server-Timing'])
+        self.assertEqual(set(timings), {'db', 'serialize', 'render', 'total'})
+        self.assertEqual(timings['db']['desc'], '"%d queries"' % len(context.captured_queries))
+        self.assertGreater(float(timings['serialize']['dur']), 0)
+        self.assertGreater(float(timings['render']['dur']), 0)
+        self.assertGreaterEqual(
+            float(timings['total']['dur']),
+            float(timings['db']['dur']) + float(timings['serialize']['dur']) + float(timings['render']['dur']) - 0.02,
+        )
+
+    async def test_async_view(self):
+        token = await Token.objects.aget(user=self.user)
+        response = await AsyncClient().get(reverse('cargo-list-create'), headers={'Authorization': 'Token ' + token.key})
+        self.assertIs(response.resolver_match.func.view_class, AsyncCargoListView)
+        # sync_to_async thread laridagi SQL va serializer ham shu so'rovga yoziladi
+        timings = parse_server_timing(response['Server-Timing'])
+        self.assertNotEqual(timings['db']['desc'], '"0 queries"')
+        self.assertGreater(float(timings['serialize']['dur']), 0)
+
+    def test_metrics_endpoint(self):
+        for _ in range(2):
+            self.client.get(reverse('cargo-list-create'))
+        self.client.get(reverse('cargo-detail', args=[Cargo.objects.first().pk]))
+        self.client.get('/api/v1/missing/')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertIn('http_requests_total{route="api/v1/cargos/",method="GET",status="200"} 2', text)
+        self.assertIn('http_requests_total{route="unmatched",method="GET",status="404"} 1', text)
+        self.assertIn('route="api/v1/cargos/<int:pk>/"', text)
+        labels = 'route="api/v1/cargos/",method="GET"'
+        self.assertIn('http_request_duration_seconds_bucket{%s,le="+Inf"} 2' % labels, text)
+        self.assertIn('http_request_duration_seconds_count{%s} 2' % labels, text)
+        self.assertIn('http_request_db_queries_count{%s} 2' % labels, text)
+        # Bucket lar kumulyativ
+        counts = [int(line.rsplit(' ', 1)[1]) for line in text.splitlines()
+                  if line.startswith('http_request_duration_seconds_bucket{%s' % labels)]
+        self.assertEqual(counts, sorted(counts))
+
+    def test_metrics_endpoint_is_restricted(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.5').status_code, 403)
+        with override_settings(METRICS={**settings.METRICS, 'ALLOWED_IPS': None}):
+            self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.5').status_code, 200)
+
+    def test_sampling(self):
+        with override_settings(METRICS={**settings.METRICS, 'SAMPLE_RATE': 0}):
+            response = APIClient().get(reverse('active-ads'))
+        self.assertNotIn('Server-Timing', response)
+        text = registry.render()
+        # Umumiy vaqt hamma so'rov uchun, bo'linma faqat tanlanganlar uchun
+        self.assertIn('http_request_duration_seconds_count{route="api/v1/advertisements/",method="GET"} 1', text)
+        self.assertNotIn('http_request_db_queries', text)
+
+    def test_disabled(self):
+        with override_settings(METRICS={'ENABLED': False}):
+            response = APIClient().get(reverse('active-ads'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(registry.render(), '\n')
@@ -0,0 +1,134 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+# Redis da chelak bitta atomik skript bilan yangilanadi (o'qish-yozish orasida boshqa worker kira olmaydi)
+BUCKET_SCRIPT = """
+local capacity, rate, now, ttl = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, tostring(tokens)}
+"""
+
+
+def parse_rate(rate):
+    """
+    '5/min' -> (5, 60): chelak sig'imi 5 ta, bir daqiqada to'liq to'ladi.
+    """
+    if rate is None:
+        return None
+    capacity, period = rate.split('/')
+    return int(capacity), PERIODS[period]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket: har so'rov chelakdan bitta token oladi, tokenlar `capacity / period`
+    tezlikda qayta to'ladi. Chelak bo'sh bo'lsa 429 va Retry-After qaytadi.
+
+    Limitlar view'dagi `throttle_scope` va `ident_kind` bo'yicha olinadi, masalan
+    settings.TOKEN_BUCKET_THROTTLE['RATES']['login.ip'] = '30/min'. Holat bazada emas,
+    keshda saqlanadi (settings.TOKEN_BUCKET_THROTTLE['CACHE']). Limit barcha worker lar uchun
+    bitta bo'lishi uchun kesh umumiy bo'lishi kerak: Redis da chelak Lua skript bilan, boshqa
+    backend larda cache.add() qulfi ostida yangilanadi (add memcached/DB keshida atomik).
+    """
+    ident_kind = None
+    timer = time.time
+    lock_timeout = 2
+    lock_attempts = 20
+    lock_wait = 0.005
+
+    def get_rate(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return None
+        rates = getattr(settings, 'TOKEN_BUCKET_THROTTLE', {}).get('RATES', {})
+        return parse_rate(rates.get('%s.%s' % (scope, self.ident_kind)))
+
+    def get_cache(self):
+        return caches[getattr(settings, 'TOKEN_BUCKET_THROTTLE', {}).get('CACHE', 'default')]
+
+    def get_ident_value(self, request):
+        raise NotImplementedError('.get_ident_value() must be overridden')
+
+    def allow_request(self, request, view):
+        rate = self.get_rate(view)
+        if rate is None:
+            return True
+        ident = self.get_ident_value(request)
+        if not ident:
+            return True
+
+        capacity, period = rate
+        refill_rate = capacity / period
+        key = 'throttle:%s:%s:%s' % (view.throttle_scope, self.ident_kind, ident)
+        cache = self.get_cache()
+        if isinstance(cache, RedisCache):
+            allowed, tokens = self.consume_redis(cache, key, capacity, refill_rate, period)
+        else:
+            allowed, tokens = self.consume_locked(cache, key, capacity, refill_rate, period)
+        self.wait_seconds = 0 if allowed else (1 - tokens) / refill_rate
+        return allowed
+
+    def consume_redis(self, cache, key, capacity, refill_rate, period):
+        key = cache.make_and_validate_key(key)
+        client = cache._cache.get_client(key, write=True)
+        allowed, tokens = client.eval(BUCKET_SCRIPT, 1, key, capacity, refill_rate, self.timer(), period)
+        return bool(allowed), float(tokens)
+
+    def consume_locked(self, cache, key, capacity, refill_rate, period):
+        lock_key, owner = key + ':lock', uuid.uuid4().hex
+        for _ in range(self.lock_attempts):
+            if cache.add(lock_key, owner, self.lock_timeout):
+                break
+            time.sleep(self.lock_wait)
+        else:
+            # Bitta mijozdan juda ko'p parallel so'rov: qulfni kutib o'tirmasdan rad etiladi
+            return False, 0
+        try:
+            now = self.timer()
+            tokens, updated = cache.get(key) or (capacity, now)
+            tokens = min(capacity, tokens + max(0, now - updated) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            cache.set(key, (tokens, now), period)
+        finally:
+            if cache.get(lock_key) == owner:
+                cache.delete(lock_key)
+        return allowed, tokens
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None)
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    ident_kind = 'ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class PhoneTokenBucketThrottle(TokenBucketThrottle):
+    ident_kind = 'phone'
+
+    def get_ident_value(self, request):
+        phone_number = request.data.get('phone_number')
+        if not isinstance(phone_number, str):
+            return None
+        return ''.join(ch for ch in phone_number if ch.isdigit())
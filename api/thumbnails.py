@@ -0,0 +1,160 @@
+"""
+Haydovchi profil rasmi uchun thumbnail lar (Pillow).
+
+Yangi rasm saqlangandan keyin (commit da) ish fon thread pool iga beriladi: so'rov thread i
+rasmni dekodlamaydi. Worker har bir o'lcham uchun kvadrat JPEG va WebP yaratadi, fayl nomi
+mazmun hash idan olinadi (bir xil natija qayta yozilmaydi, URL o'zgarmas - uzoq keshlash
+mumkin) va natija DriverProfile.thumbnails ga yoziladi. Ish paytida rasm yana almashgan
+bo'lsa eski natija yozilmaydi. Tayyor bo'lgunicha `thumbnails` bo'sh, mijoz profile_picture
+ni ishlatadi. Almashtirilgan (yoki yozilmay qolgan) to'plam fayllari keyin o'chiriladi - bir xil
+rasm bir xil nom bergani uchun boshqa profil ishlatmayotgani tekshirilgandan so'ng.
+"""
+import hashlib
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import Q, TextField
+from django.db.models.functions import Cast
+from PIL import Image, ImageOps, features
+
+from .models import DriverProfile
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'jpeg': {'format': 'JPEG', 'quality': 85, 'optimize': True, 'progressive': True},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _options():
+    return getattr(settings, 'PROFILE_THUMBNAILS', {})
+
+
+def get_sizes():
+    return tuple(_options().get('SIZES', (64, 256)))
+
+
+def get_formats():
+    # Pillow libwebp siz yig'ilgan bo'lsa faqat JPEG
+    return tuple(name for name in _options().get('FORMATS', ('jpeg', 'webp'))
+                 if name != 'webp' or features.check('webp'))
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_options().get('WORKERS', 2), thread_name_prefix='thumbnails'
+            )
+        return _executor
+
+
+def schedule_thumbnails(profile, stale=()):
+    """
+    Profil rasmi uchun thumbnail yaratishni commit dan keyin fon worker iga topshiradi;
+    `stale` - almashtirilgan eski to'plam fayllari, yangisi yozilgach o'chiriladi.
+    """
+    pk, source, stale = profile.pk, profile.profile_picture.name, list(stale)
+    if source or stale:
+        transaction.on_commit(lambda: get_executor().submit(_run, pk, source, stale))
+
+
+def _run(profile_id, source, stale=()):
+    try:
+        if not source:
+            return delete_thumbnails(stale)
+        return generate_thumbnails(profile_id, source, stale)
+    finally:
+        # Worker thread ining o'z ulanishi
+        connections.close_all()
+
+
+def _to_rgb(image):
+    if image.mode == 'RGB':
+        return image
+    if 'A' in image.getbands() or 'transparency' in image.info:
+        # Shaffof joylar oq fonga (JPEG da alfa kanal yo'q)
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_thumbnails(image, storage, directory):
+    """Ochilgan rasmdan barcha o'lcham va formatlarni yaratib saqlaydi: {'64': {'jpeg': nom, ...}, ...}"""
+    image = _to_rgb(ImageOps.exif_transpose(image))
+    result = {}
+    for size in get_sizes():
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        names = {}
+        for name in get_formats():
+            buffer = BytesIO()
+            thumbnail.save(buffer, **FORMATS[name])
+            content = buffer.getvalue()
+            digest = hashlib.sha256(content).hexdigest()[:20]
+            path = posixpath.join(directory, str(size), '%s.%s' % (digest, name))
+            if not storage.exists(path):
+                path = storage.save(path, ContentFile(content))
+            names[name] = path
+        result[str(size)] = names
+    return result
+
+
+def thumbnail_paths(thumbnails):
+    return [path for names in thumbnails.values() for path in names.values()]
+
+
+def delete_thumbnails(paths):
+    """Hech bir profil ishlatmayotgan thumbnail fayllarini o'chiradi; o'chirilganlar sonini qaytaradi."""
+    paths = set(paths)
+    if not paths:
+        return 0
+    try:
+        # JSON matnidan qidiruv: nomlar noyob (mazmun hash i), o'zgarish kam - to'liq skaner arzon
+        condition = Q()
+        for path in paths:
+            condition |= Q(thumbnails_text__contains=path)
+        rows = DriverProfile.objects.annotate(
+            thumbnails_text=Cast('thumbnails', TextField())
+        ).filter(condition).values_list('thumbnails', flat=True)
+        referenced = {path for thumbnails in rows for path in thumbnail_paths(thumbnails)}
+        storage = DriverProfile._meta.get_field('profile_picture').storage
+        unused = paths - referenced
+        for path in unused:
+            storage.delete(path)
+        return len(unused)
+    except Exception:
+        logger.exception("Eski thumbnail larni o'chirib bo'lmadi")
+        return 0
+
+
+def generate_thumbnails(profile_id, source, stale=()):
+    """
+    Worker da (yoki buyruqdan to'g'ridan-to'g'ri) bajariladi; xatolar log ga yoziladi.
+    Oxirida `stale` va yozilmay qolgan yangi to'plamning ishlatilmayotgan fayllari o'chiriladi.
+    """
+    thumbnails, updated = {}, 0
+    try:
+        field = DriverProfile._meta.get_field('profile_picture')
+        storage = field.storage
+        with storage.open(source, 'rb') as file, Image.open(file) as image:
+            image.draft('RGB', (max(get_sizes()) * 2,) * 2)  # JPEG ni kichraytirib dekodlash
+            thumbnails = render_thumbnails(image, storage, posixpath.join(posixpath.dirname(source), 'thumbs'))
+        # Shartli UPDATE: rasm bu orada yana almashgan bo'lsa eski thumbnail yozilmaydi
+        updated = DriverProfile.objects.filter(pk=profile_id, profile_picture=source).update(thumbnails=thumbnails)
+    except Exception:
+        logger.exception("Profil rasmi uchun thumbnail yaratib bo'lmadi: %s", source)
+    delete_thumbnails([*stale, *([] if updated else thumbnail_paths(thumbnails))])
+    return updated
@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
-    RegisterView, LoginView, DriverProfileView, CargoListCreateView, 
-    CargoDetailView, CargoReviewCreateView, ContactMessageView,
+    RegisterView, LoginView, DriverProfileView, DriverLeaderboardView, CargoListCreateView, CargoBulkCreateView, CargoChangesView,
+    CargoExportView, CargoDetailView, CargoMatchesView, CargoReviewCreateView, ContactMessageView,
     AdvertisementRequestView, ActiveAdvertisementsView, AdvertisementsByTypeView
 )
 
@@ -10,7 +10,12 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('profile/', DriverProfileView.as_view(), name='profile'),
+    path('drivers/top/', DriverLeaderboardView.as_view(), name='driver-leaderboard'),
     path('cargos/', CargoListCreateView.as_view(), name='cargo-list-create'),
+    path('cargos/bulk/', CargoBulkCreateView.as_view(), name='cargo-bulk-create'),
+    path('cargos/changes/', CargoChangesView.as_view(), name='cargo-changes'),
+    path('cargos/export/', CargoExportView.as_view(), name='cargo-export'),
+    path('cargos/matches/', CargoMatchesView.as_view(), name='cargo-matches'),
     path('cargos/<int:pk>/', CargoDetailView.as_view(), name='cargo-detail'),
     path('reviews/', CargoReviewCreateView.as_view(), name='review-create'),
     
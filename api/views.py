@@ -1,17 +1,37 @@
+import json
+
 from rest_framework import status
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from rest_framework.views import APIView
+from rest_framework.filters import OrderingFilter
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ParseError, ValidationError
+from rest_framework.renderers import JSONRenderer
 from django.contrib.auth import authenticate
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import User, DriverProfile, Cargo, CargoReview, Advertisement
+from .models import User, DriverProfile, Cargo, CargoReview, CargoTombstone, ChangeCounter, Advertisement
+from .cache import cached_advertisements
+from .conditional import (CARGO_VALIDATOR_FIELDS, PROFILE_VALIDATOR_FIELDS, is_conditional, make_etag,
+                          not_modified, set_validators, validator_row)
+from .events import record_cargo_event, record_cargo_events
+from .filters import CargoFilter, CargoSearchFilter
+from .pagination import CargoCursorPagination
+from .ratings import rating_expression, transfer_ratings
+from .renderers import CSVRenderer, NDJSONRenderer
+from .thumbnails import schedule_thumbnails, thumbnail_paths
+from .throttling import IPTokenBucketThrottle, PhoneTokenBucketThrottle
 from .serializers import (UserSerializer, DriverProfileSerializer, CargoSerializer, CargoReviewSerializer, 
                           AdvertisementSerializer, AdvertisementCreateSerializer, ContactMessageSerializer)
 
 # Registratsiya (Ochiq)
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle, PhoneTokenBucketThrottle]
+    throttle_scope = 'register'
 
     def post(self, request):
         serializer = UserSerializer(data=request.data)
@@ -25,6 +45,8 @@ class RegisterView(APIView):
 # Custom Login (Ochiq)
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle, PhoneTokenBucketThrottle]
+    throttle_scope = 'login'
 
     def post(self, request):
         phone_number = request.data.get('phone_number')
@@ -44,28 +66,116 @@ class DriverProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        profile = DriverProfile.objects.get(user=request.user)
+        if is_conditional(request):
+            row = DriverProfile.objects.filter(user=request.user).values_list(*PROFILE_VALIDATOR_FIELDS).get()
+            etag = make_etag(row, request.accepted_renderer.format)
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+        profile = DriverProfile.objects.select_related('user').get(user=request.user)
         serializer = DriverProfileSerializer(profile)
-        return Response(serializer.data)
+        etag = make_etag(validator_row(profile, PROFILE_VALIDATOR_FIELDS), request.accepted_renderer.format)
+        return set_validators(Response(serializer.data), etag)
 
     def put(self, request):
-        profile = DriverProfile.objects.get(user=request.user)
+        profile = DriverProfile.objects.select_related('user').get(user=request.user)
         serializer = DriverProfileSerializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            if 'profile_picture' in serializer.validated_data:
+                # Eski thumbnail lar darhol olib tashlanadi (fayllari worker da, yangilari yozilgach o'chiriladi)
+                stale = thumbnail_paths(profile.thumbnails)
+                serializer.save(thumbnails={})
+                schedule_thumbnails(profile, stale)
+            else:
+                serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-# Yuklar ro‘yxati va qo‘shish (Faqat autentifikatsiya bilan)
-class CargoListCreateView(APIView):
+# Eng yuqori reytingli haydovchilar (Faqat autentifikatsiya bilan)
+class DriverLeaderboardView(APIView):
+    """
+    O'rtacha baho bo'yicha eng yaxshi haydovchilar; oldindan hisoblangan review_count/rating_sum
+    dan o'qiladi (sharhlar jadvali agregatsiya qilinmaydi). ?min_reviews= (standart 1) dan kam
+    sharhga ega haydovchilar ko'rsatilmaydi, ?vehicle_type= bo'yicha filtrlash mumkin.
+    """
     permission_classes = [IsAuthenticated]
+    default_limit = 10
+    max_limit = 100
+
+    def get_int(self, request, name, default, minimum, maximum=None):
+        try:
+            value = int(request.query_params[name])
+        except KeyError:
+            return default
+        except ValueError:
+            raise ValidationError({name: ["Butun son kutilgan."]})
+        value = max(minimum, value)
+        return value if maximum is None else min(value, maximum)
 
     def get(self, request):
-        cargos = Cargo.objects.all()
-        serializer = CargoSerializer(cargos, many=True)
+        limit = self.get_int(request, 'limit', self.default_limit, 1, self.max_limit)
+        min_reviews = self.get_int(request, 'min_reviews', 1, 1)
+        profiles = DriverProfile.objects.select_related('user').filter(review_count__gte=min_reviews)
+        vehicle_type = request.query_params.get('vehicle_type')
+        if vehicle_type:
+            profiles = profiles.filter(vehicle_type=vehicle_type)
+        profiles = profiles.alias(average=rating_expression()).order_by('-average', '-review_count', 'id')
+        serializer = DriverProfileSerializer(profiles[:limit], many=True)
         return Response(serializer.data)
 
+
+def _query_list(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def get_cargo_representation(request):
+    """
+    ?fields=id,name,driver&expand=driver parametrlarini o'qiydi.
+
+    Ikkalasi ham berilmasa javob avvalgidek to'liq (barcha bog'lanishlar nested) bo'ladi.
+    Aks holda faqat expand qilingan bog'lanishlar nested, qolganlari id ko'rinishida qaytadi.
+    """
+    fields = _query_list(request, 'fields')
+    expand = _query_list(request, 'expand')
+    if fields is None and expand is None:
+        return {}
+    return {'fields': fields, 'expand': expand or []}
+
+
+class CargoFilterMixin:
+    """
+    Yuklar ro'yxati va eksport uchun umumiy filtrlar (?status=, ?q=, ?ordering= ...).
+    """
+    filter_backends = [DjangoFilterBackend, CargoSearchFilter, OrderingFilter]
+    filterset_class = CargoFilter
+    # Faqat indeksli va NULL bo'lmaydigan ustunlar (keyset paginatsiya uchun)
+    ordering_fields = ['created_at', 'weight']
+    ordering = ['-created_at']
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+
+# Yuklar ro‘yxati va qo‘shish (Faqat autentifikatsiya bilan)
+class CargoListCreateView(CargoFilterMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = CargoCursorPagination
+
+    def get(self, request):
+        representation = get_cargo_representation(request)
+        paginator = self.pagination_class()
+        ordering = paginator.get_ordering(request, Cargo.objects.all(), self)
+        cargos = self.filter_queryset(Cargo.objects.with_related(ordering=ordering, **representation))
+        cargos = paginator.paginate_queryset(cargos, request, view=self)
+        serializer = CargoSerializer(cargos, many=True, **representation)
+        return paginator.get_paginated_response(serializer.data)
+
     def post(self, request):
         serializer = CargoSerializer(data=request.data)
         if serializer.is_valid():
@@ -74,27 +184,231 @@ class CargoListCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class CargoExportMixin(CargoFilterMixin):
+    """
+    Eksport ustunlari va javobi (sync va async view lar uchun umumiy).
+    """
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    chunk_size = 2000
+    columns = (
+        ('id', 'id'), ('customer', 'customer_id'), ('driver', 'driver_id'), ('name', 'name'),
+        ('weight', 'weight'), ('origin', 'origin'), ('destination', 'destination'),
+        ('vehicle_type', 'vehicle_type'), ('status', 'status'), ('created_at', 'created_at'),
+        ('price', 'price'), ('description', 'description'),
+    )
+
+    def get_rows(self, **kwargs):
+        return self.filter_queryset(Cargo.objects.all()).values_list(*[column for _, column in self.columns], **kwargs)
+
+    def get_header(self):
+        return [name for name, _ in self.columns]
+
+    def export_response(self, renderer, content):
+        response = StreamingHttpResponse(
+            content, content_type='%s; charset=%s' % (renderer.media_type, renderer.charset),
+        )
+        response['Content-Disposition'] = 'attachment; filename="cargos.%s"' % renderer.format
+        return response
+
+
+# Yuklarni CSV / NDJSON ko'rinishida oqim bilan eksport qilish (Faqat autentifikatsiya bilan)
+class CargoExportView(CargoExportMixin, APIView):
+    """
+    Ro'yxat bilan bir xil filtrlarni qabul qiladi. Natija QuerySet.iterator() orqali bo'laklab
+    o'qiladi va StreamingHttpResponse bilan darhol yuborila boshlaydi, shuning uchun xotira
+    qatorlar soniga bog'liq emas. Format: ?format=csv (standart) yoki ?format=ndjson.
+    ASGI da bu yo'lni AsyncCargoExportView oladi: sync iterator u yerda to'liq buferlanardi.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        rows = self.get_rows().iterator(chunk_size=self.chunk_size)
+        renderer = request.accepted_renderer
+        return self.export_response(renderer, renderer.iter_render(self.get_header(), rows))
+
+
+# Yuklarni ommaviy yuklash: JSON massiv yoki NDJSON (Faqat autentifikatsiya bilan)
+class CargoBulkCreateView(APIView):
+    """
+    Har bir qator CargoSerializer qoidalari bo'yicha tekshiriladi, to'g'rilari `batch_size`
+    tadan bulk_create bilan (har partiya alohida tranzaksiyada) yoziladi. NDJSON tanasi
+    qatorma-qator oqim sifatida o'qiladi, shuning uchun katta fayllarda ham xotira chegaralangan.
+    """
+    permission_classes = [IsAuthenticated]
+    batch_size = 500
+    ndjson_media_types = ('application/x-ndjson', 'application/jsonl')
+
+    def iter_rows(self, request):
+        media_type = request.content_type.split(';')[0].strip()
+        if media_type in self.ndjson_media_types:
+            for line in request._request:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield None
+            return
+        data = request.data
+        if not isinstance(data, list):
+            raise ParseError("JSON massiv yoki NDJSON kutilgan.")
+        yield from data
+
+    def post(self, request):
+        validator = CargoSerializer()
+        batch, ids, errors = [], [], []
+        for index, row in enumerate(self.iter_rows(request)):
+            if not isinstance(row, dict):
+                errors.append({'index': index, 'errors': {'non_field_errors': ["Yaroqsiz JSON obyekt."]}})
+                continue
+            try:
+                validated_data = validator.run_validation(row)
+            except ValidationError as exc:
+                errors.append({'index': index, 'errors': exc.detail})
+                continue
+            batch.append(Cargo(customer=request.user, **validated_data))
+            if len(batch) >= self.batch_size:
+                ids.extend(self.save_batch(batch))
+                batch = []
+        if batch:
+            ids.extend(self.save_batch(batch))
+
+        response_status = status.HTTP_201_CREATED if ids or not errors else status.HTTP_400_BAD_REQUEST
+        return Response({'created': len(ids), 'ids': ids, 'errors': errors}, status=response_status)
+
+    def save_batch(self, batch):
+        with transaction.atomic():
+            # bulk_create save() ni chaqirmaydi: versiyalar oralig'i bitta so'rov bilan olinadi
+            last_version = ChangeCounter.objects.advance(Cargo.VERSION_COUNTER, len(batch))
+            for version, cargo in enumerate(batch, start=last_version - len(batch) + 1):
+                cargo.version = version
+            Cargo.objects.bulk_create(batch)
+            record_cargo_events('created', batch)
+        return [cargo.pk for cargo in batch]
+
+
+# Haydovchi transportiga mos yuklar (Faqat autentifikatsiya bilan)
+class CargoMatchesView(APIView):
+    permission_classes = [IsAuthenticated]
+    limit_query_param = 'limit'
+    max_limit = CargoCursorPagination.max_page_size
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return CargoCursorPagination.page_size
+        return max(1, min(limit, self.max_limit))
+
+    def get(self, request):
+        profile = DriverProfile.objects.get(user=request.user)
+        if not profile.vehicle_type or profile.vehicle_capacity is None:
+            return Response(
+                {"detail": "Profilda transport turi va yuk sig'imi ko'rsatilmagan."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        representation = get_cargo_representation(request)
+        cargos = Cargo.objects.with_related(**representation).matching(profile)[:self.get_limit(request)]
+        serializer = CargoSerializer(cargos, many=True, **representation)
+        return Response(serializer.data)
+
+
+# Offline mijozlar uchun delta sync (Faqat autentifikatsiya bilan)
+class CargoChangesView(APIView):
+    """
+    ?since=<version> dan keyin yaratilgan/o'zgargan yuklar va o'chirilgan yuklar id lari, versiya
+    tartibida. Javobdagi `version` keyingi so'rovning ?since= qiymati; `has_more` bo'lsa darhol
+    yana so'raladi. Ish hajmi jadval hajmiga emas, o'zgarishlar soniga bog'liq (version indeksi).
+    ?fields= va ?expand= ro'yxatdagidek ishlaydi.
+    """
+    permission_classes = [IsAuthenticated]
+    limit_query_param = 'limit'
+    default_limit = 100
+    max_limit = 500
+
+    def get_since(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            since = -1
+        if since < 0:
+            raise ValidationError({'since': ["Manfiy bo'lmagan butun son kutilgan."]})
+        return since
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get(self, request):
+        since = self.get_since(request)
+        limit = self.get_limit(request)
+        representation = get_cargo_representation(request)
+        if representation.get('fields') is not None:
+            representation['fields'] = [*representation['fields'], 'version']
+
+        changed = Cargo.objects.with_related(**representation).filter(version__gt=since).order_by('version')
+        deleted = CargoTombstone.objects.filter(version__gt=since).order_by('version').values_list('version', 'cargo_id')
+        # Ikkala ro'yxat bitta hisoblagichdan versiya oladi: birlashtirib, eng kichik `limit` tasi olinadi
+        items = sorted(
+            [(cargo.version, cargo, None) for cargo in changed[:limit + 1]]
+            + [(version, None, cargo_id) for version, cargo_id in deleted[:limit + 1]],
+            key=lambda item: item[0],
+        )
+        has_more = len(items) > limit
+        items = items[:limit]
+
+        serializer = CargoSerializer([cargo for _, cargo, _ in items if cargo is not None], many=True, **representation)
+        return Response({
+            'version': items[-1][0] if items else since,
+            'has_more': has_more,
+            'changed': serializer.data,
+            'deleted': [cargo_id for _, cargo, cargo_id in items if cargo is None],
+        })
+
+
 # Yukni tahrirlash va o‘chirish (Faqat autentifikatsiya bilan)
 class CargoDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        cargo = Cargo.objects.get(pk=pk)
-        serializer = CargoSerializer(cargo)
-        return Response(serializer.data)
+        representation = get_cargo_representation(request)
+        row = None
+        # Sparse javobda nested obyektlar o'qilmaydi, shuning uchun validator alohida (kichik) so'rov bilan olinadi
+        if representation or is_conditional(request):
+            row = Cargo.objects.filter(pk=pk).values_list(*CARGO_VALIDATOR_FIELDS).first()
+            if row is None:
+                raise NotFound()
+            validators = self.get_validators(row, representation, request.accepted_renderer.format)
+            response = not_modified(request, *validators)
+            if response is not None:
+                return response
+        cargo = Cargo.objects.with_related(**representation).get(pk=pk)
+        if row is None:
+            row = validator_row(cargo, CARGO_VALIDATOR_FIELDS)
+        serializer = CargoSerializer(cargo, **representation)
+        validators = self.get_validators(row, representation, request.accepted_renderer.format)
+        return set_validators(Response(serializer.data), *validators)
+
+    @staticmethod
+    def get_validators(row, representation, format):
+        """
+        ETag javob ko'rinishiga (fields, expand, format) ham bog'liq. Last-Modified berilmaydi:
+        nested customer/driver qatorlarida updated_at yo'q, yukniki esa ular o'zgarganda oshmaydi.
+        """
+        return (make_etag(row, sorted(representation.items()), format),)
 
     def put(self, request, pk):
-        cargo = Cargo.objects.get(pk=pk)
-        if cargo.customer != request.user and not request.user.driverprofile:  # Faqat mijoz yoki haydovchi o‘zgartirishi mumkin
+        cargo = Cargo.objects.with_related().get(pk=pk)
+        profile = getattr(request.user, 'driverprofile', None)
+        if cargo.customer != request.user and not profile:  # Faqat mijoz yoki haydovchi o‘zgartirishi mumkin
             return Response({"detail": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
         
-        # Agar haydovchi o‘zi o‘zi belgilamoqchi bo‘lsa
-        if request.user.driverprofile and not cargo.driver:
-            cargo.driver = request.user.driverprofile
-            cargo.status = "Yolda"  # Haydovchi tanlaganidan keyin status o‘zgaradi
-            cargo.save()
-            serializer = CargoSerializer(cargo)
-            return Response(serializer.data)
+        # Agar haydovchi o‘zi o‘zi belgilamoqchi bo‘lsa (har bir foydalanuvchida profil bor - mijoz o'z yukini tahrirlaydi)
+        if cargo.customer != request.user and profile and not cargo.driver_id and cargo.status == 'Jarayonda':
+            return self.claim(cargo, profile)
 
         # Oddiy tahrirlash (faqat mijoz uchun)
         if cargo.customer == request.user:
@@ -103,7 +417,40 @@ class CargoDetailView(APIView):
                 serializer.save()
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        return Response({"detail": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
+        return self.already_claimed()
+
+    def claim(self, cargo, profile):
+        """
+        Yukni bitta shartli UPDATE bilan band qiladi: bir vaqtda band qilmoqchi bo'lgan
+        haydovchilardan faqat bittasi yutadi, qolganlari 409 oladi.
+        """
+        with transaction.atomic():
+            updated_at = timezone.now()
+            claimed = Cargo.objects.filter(pk=cargo.pk, driver__isnull=True, status='Jarayonda').update(
+                driver=profile,
+                status='Yolda',  # Haydovchi tanlaganidan keyin status o‘zgaradi
+                updated_at=updated_at,
+            )
+            if not claimed:
+                return self.already_claimed()
+            # Versiya faqat yutgan haydovchiga: yutqazganlar hisoblagich qulfini kutmaydi va versiya sarflamaydi
+            version = ChangeCounter.objects.advance(Cargo.VERSION_COUNTER)
+            Cargo.objects.filter(pk=cargo.pk).update(version=version)
+            # Yukka allaqachon yozilgan sharhlar (bo'lsa) haydovchi reytingiga qo'shiladi
+            transfer_ratings(cargo.pk, None, profile.pk)
+            cargo.driver = profile
+            cargo.status = 'Yolda'
+            cargo.version = version
+            cargo.updated_at = updated_at
+            record_cargo_event('claimed', cargo)
+        serializer = CargoSerializer(cargo)
+        return Response(serializer.data)
+
+    def already_claimed(self):
+        return Response(
+            {"detail": "Yuk allaqachon boshqa haydovchi tomonidan olingan."},
+            status=status.HTTP_409_CONFLICT
+        )
 
     def delete(self, request, pk):
         cargo = Cargo.objects.get(pk=pk)
@@ -127,6 +474,8 @@ class CargoReviewCreateView(APIView):
 
 class ContactMessageView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle, PhoneTokenBucketThrottle]
+    throttle_scope = 'contact'
     
     def post(self, request):
         serializer = ContactMessageSerializer(data=request.data)
@@ -140,6 +489,8 @@ class AdvertisementRequestView(APIView):
     Foydalanuvchilar uchun reklama so'rovini yuborish API
     """
     permission_classes = [AllowAny]
+    throttle_classes = [IPTokenBucketThrottle, PhoneTokenBucketThrottle]
+    throttle_scope = 'ad_request'
     
     def post(self, request):
         serializer = AdvertisementCreateSerializer(data=request.data)
@@ -151,42 +502,38 @@ class AdvertisementRequestView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def render_advertisements(current_date, **filters):
+    advertisements = Advertisement.objects.active(current_date).filter(**filters)
+    serializer = AdvertisementSerializer(advertisements, many=True)
+    return JSONRenderer().render(serializer.data)
+
+
+def advertisements_response(request, content, etag):
+    # Keshdagi baytlar bilan birga saqlangan ETag: mos kelsa 304, tana yuborilmaydi
+    return not_modified(request, etag) or set_validators(HttpResponse(content, content_type='application/json'), etag)
+
+
 class ActiveAdvertisementsView(APIView):
     """
-    Frontend uchun faol reklamalarni qaytaruvchi API
+    Frontend uchun faol reklamalarni qaytaruvchi API (javob kesh dan beriladi)
     """
     permission_classes = [AllowAny]
     
     def get(self, request):
         current_date = timezone.now().date()
-        # Faqat tasdiqlangan, faol va muddati tugamagan reklamalarni qaytarish
-        advertisements = Advertisement.objects.filter(
-            status='Tasdiqlangan',
-            is_active=True,
-            start_date__lte=current_date,
-            end_date__gte=current_date,
-            media_file__isnull=False  # Media fayli bo'lgan reklamalarni olish
-        )
-        serializer = AdvertisementSerializer(advertisements, many=True)
-        return Response(serializer.data)
+        content, etag = cached_advertisements(None, current_date, lambda: render_advertisements(current_date))
+        return advertisements_response(request, content, etag)
 
 
 class AdvertisementsByTypeView(APIView):
     """
-    Frontend uchun reklama turlariga qarab reklamalarni qaytaruvchi API
+    Frontend uchun reklama turlariga qarab reklamalarni qaytaruvchi API (javob kesh dan beriladi)
     """
     permission_classes = [AllowAny]
     
     def get(self, request, ad_type):
         current_date = timezone.now().date()
-        # Turi bo'yicha reklama tanlash
-        advertisements = Advertisement.objects.filter(
-            status='Tasdiqlangan',
-            is_active=True,
-            ad_type=ad_type,
-            start_date__lte=current_date,
-            end_date__gte=current_date,
-            media_file__isnull=False
+        content, etag = cached_advertisements(
+            ad_type, current_date, lambda: render_advertisements(current_date, ad_type=ad_type)
         )
-        serializer = AdvertisementSerializer(advertisements, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return advertisements_response(request, content, etag)
@@ -0,0 +1,17 @@
+"""
+ASGI so'rovlari uchun URL konfiguratsiyasi: api.async_urls dagi yo'llar birinchi tekshiriladi,
+qolgan hamma narsa cargo.urls ga tushadi.
+"""
+import re
+
+from django.conf import settings
+from django.urls import include, path, re_path
+
+from api.media import aserve_media
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/v1/', include('api.async_urls')),
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), aserve_media, name='media'),
+] + sync_urlpatterns
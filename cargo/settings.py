@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -23,7 +24,8 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # Keshsiz variant: 'rest_framework.authentication.TokenAuthentication'
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Hamma uchun ruxsat
@@ -31,11 +33,26 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    # Mijoz IP si (throttle lar uchun): 0 - faqat REMOTE_ADDR, X-Forwarded-For ga ishonilmaydi.
+    # nginx kabi bitta reverse proxy ortida 1 qo'yiladi
+    'NUM_PROXIES': 0,
 }
 
 AUTH_USER_MODEL = 'api.User'
 
+# CachedTokenAuthentication: xotiradagi token -> user keshi (yozuvlar soni, TTL soniyalarda).
+# Kesh har bir worker da alohida: o'chirilgan token yoki bloklangan foydalanuvchi boshqa worker larda
+# TTL tugaguncha o'tib turadi, shuning uchun TTL bir necha soniyadan oshmasligi kerak
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 5,
+}
+
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ASGIURLConfMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -46,6 +63,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# ASGI (cargo/asgi.py) ostida o'qish endpointlari async view larga yo'naltiriladi
+ASGI_URLCONF = 'cargo.asgi_urls'
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
 ]
@@ -72,9 +92,70 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Parallel yozuvlar "database is locked" bilan yiqilmasdan navbat kutishi uchun (soniya)
+            'timeout': 20,
+        },
+        'TEST': {
+            # In-memory (shared cache) test bazasida oqimlar bir-birini kutmasdan xato beradi;
+            # parallel so'rovlar testlari uchun fayl bazasi ishlatiladi
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rate limit holati barcha worker lar uchun umumiy bo'lishi kerak, aks holda limit worker lar
+    # soniga ko'payadi. Production da REDIS_URL beriladi; LocMemCache faqat bitta jarayonli
+    # ishga tushirish (runserver, testlar) uchun
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+
+# Reklama endpointlari javoblari saqlanadigan kesh (CACHES dagi nom)
+ADVERTISEMENT_CACHE = 'default'
+
+# Haydovchi profil rasmi thumbnail lari (api/thumbnails.py): kvadrat o'lchamlar (px), formatlar
+# va fon worker lari soni
+PROFILE_THUMBNAILS = {
+    'SIZES': (64, 256),
+    'FORMATS': ('jpeg', 'webp'),
+    'WORKERS': 2,
+}
+
+# So'rov metrikalari (api/metrics.py): Server-Timing sarlavhasi va /metrics (Prometheus). SQL, serializer
+# va render bo'linmasi SAMPLE_RATE ulushdagi so'rovlar uchun o'lchanadi (production da, masalan, 0.1);
+# umumiy vaqt va so'rovlar soni hamma so'rov uchun. /metrics faqat ALLOWED_IPS dan (None - cheklovsiz)
+METRICS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0,
+    'SERVER_TIMING': True,
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+}
+
+# Ochiq yozish endpointlari uchun token bucket limitlari: '<scope>.<ip|phone>': 'sig'im/davr'
+TOKEN_BUCKET_THROTTLE = {
+    'CACHE': 'throttle',
+    'RATES': {
+        'register.ip': '10/hour',
+        'register.phone': '3/hour',
+        'login.ip': '30/min',
+        'login.phone': '10/min',
+        'contact.ip': '5/min',
+        'contact.phone': '5/hour',
+        'ad_request.ip': '5/min',
+        'ad_request.phone': '5/hour',
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -93,6 +174,13 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Media fayllarni berish (api/media.py). Mazmun hash i nomida bo'lgan fayllar (IMMUTABLE regex)
+# bir yilga, qolganlari MAX_AGE soniyaga keshlanadi. nginx ortida ACCEL_REDIRECT ga internal
+# location prefiksi (masalan '/protected-media/') berilsa fayl nginx ning o'zi tomonidan yuboriladi.
+MEDIA_SERVING = {
+    'MAX_AGE': 3600,
+    'ACCEL_REDIRECT': None,
+}
 ROOT_URLCONF = 'cargo.urls'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 APPEND_SLASH = True
\ No newline at end of file
@@ -1,11 +1,15 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 
+from api.media import serve_media
+from api.metrics import metrics_view
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Logistika API",
@@ -24,4 +28,7 @@ urlpatterns = [
     path('api/v1/', include('api.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    path('metrics', metrics_view, name='metrics'),
+    # Media fayllar DEBUG dan qat'i nazar shu view orqali (Range, ETag, keshlash; api/media.py)
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+]
\ No newline at end of file